@@ -275,7 +275,8 @@ class Backend(PeriodicImportBackend):
                 newest = meme.which_is_newest(task.get_modified(),
                                               self._evo_get_modified(evo_task))
                 if newest == "remote":
-                    self._populate_task(task, evo_task)
+                    with task.batch():
+                        self._populate_task(task, evo_task)
                     meme.set_remote_last_modified(
                         self._evo_get_modified(evo_task))
                     meme.set_local_last_modified(task.get_modified())
@@ -214,7 +214,8 @@ class Backend(PeriodicImportBackend):
 
             elif action == SyncEngine.UPDATE:
                 task = self.datastore.get_task(tid)
-                self._populate_task(task, bug_dic)
+                with task.batch():
+                    self._populate_task(task, bug_dic)
                 meme = self.sync_engine.get_meme_from_remote_id(
                     bug_dic['self_link'])
                 meme.set_local_last_modified(task.get_modified())
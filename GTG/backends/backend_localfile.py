@@ -25,17 +25,40 @@ This backend contains comments that are meant as a reference, in case someone
 wants to write a backend.
 '''
 
+import hashlib
 import os
+import threading
+import xml.dom.minidom
+from collections import OrderedDict
 
 from GTG import _
 from GTG.backends.genericbackend import GenericBackend
 from GTG.backends.backendsignals import BackendSignals
 from GTG.core import CoreConfig
-from GTG.tools import cleanxml, taskxml
+from GTG.tools import cleanxml, parallelxml, tasklines, taskxml, \
+    tasksnapshot
+from GTG.tools.journal import Journal, OP_SET, OP_REMOVE
+from GTG.tools.logger import Log
 
 # Ignore all other elements but this one
 TASK_NODE = "task"
 
+# In journal mode, the journal is folded into the XML file once it holds
+# this many records
+JOURNAL_COMPACT_SIZE = 500
+
+# Smaller XML files are not worth starting worker processes to parse them
+PARALLEL_PARSE_SIZE = 4 * 1024 * 1024
+
+# Values of the "format" parameter
+FORMAT_XML = "xml"
+FORMAT_LINES = "lines"
+
+
+def _digest(fragment):
+    """ Return the digest of a serialized task """
+    return hashlib.sha1(fragment.encode("utf-8")).digest()
+
 
 class Backend(GenericBackend):
     """
@@ -68,12 +91,37 @@ class Backend(GenericBackend):
     # These are the parameters to configure a new backend of this type. A
     # parameter has a name, a type and a default value.
     # Here, we define a parameter "path", which is a string, and has a default
-    # value as a random file in the default path
+    # value as a random file in the default path.
+    # "journal" switches to the journal mode: changes are appended to a
+    # sidecar file instead of rewriting the whole XML file on every change.
+    # Otherwise, changes are saved in background at most once every
+    # "save-interval" seconds.
+    # With "lazy-content", the content of a task is read only when it is
+    # needed, which saves memory for stores with long notes.
+    # A large XML file is parsed by "parse-workers" processes.
+    # With the "lines" format, the file holds one task per line instead of
+    # XML, and a change appends a line instead of rewriting the file (see
+    # tasklines). The other parameters apply to the XML format only.
     _static_parameters = {
         "path": {
             GenericBackend.PARAM_TYPE: GenericBackend.TYPE_STRING,
             GenericBackend.PARAM_DEFAULT_VALUE:
-            "gtg_tasks.xml"}}
+            "gtg_tasks.xml"},
+        "journal": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_BOOL,
+            GenericBackend.PARAM_DEFAULT_VALUE: False},
+        "save-interval": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_INT,
+            GenericBackend.PARAM_DEFAULT_VALUE: cleanxml.SAVE_INTERVAL},
+        "lazy-content": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_BOOL,
+            GenericBackend.PARAM_DEFAULT_VALUE: False},
+        "parse-workers": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_INT,
+            GenericBackend.PARAM_DEFAULT_VALUE: 1},
+        "format": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_STRING,
+            GenericBackend.PARAM_DEFAULT_VALUE: FORMAT_XML}}
 
     def __init__(self, parameters):
         """
@@ -95,15 +143,26 @@ class Backend(GenericBackend):
         if not self.KEY_DEFAULT_BACKEND in parameters:
             parameters[self.KEY_DEFAULT_BACKEND] = True
 
-        self.doc, self.xmlproj = cleanxml.openxmlfile(
-            self.get_path(), "project")
+        self._journal = Journal(self.get_path() + ".journal")
+        self._lines = tasklines.TaskLineFile(self.get_path())
+        self._doc_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._compaction_thread = None
+
+        # The XML file is read only when the tasks are requested, see
+        # start_get_tasks()
+        self.doc, self.xmlproj = None, None
+        self._nodes = {}
+        # tid -> record of the task, for the snapshot. A record is dropped
+        # when its node changes, and made again only when needed.
+        self._records = {}
+        # tid -> (version, digest of the node) of the tasks saved by
+        # set_task(), so that unchanged tasks are not serialized again
+        self._fragments = {}
 
         # status if backup was used while trying to open xml file
-        self._used_backup = cleanxml.used_backup()
-        self._backup_file_info = cleanxml.backup_file_info()
-
-        # Make safety daily backup after loading
-        cleanxml.savexml(self.get_path(), self.doc, backup=True)
+        self._used_backup = False
+        self._backup_file_info = ""
 
     def get_path(self):
         """
@@ -118,11 +177,238 @@ class Backend(GenericBackend):
             path = os.path.join(data_dir, path)
         return os.path.abspath(path)
 
+    def is_journaled(self):
+        """ Return True if changes are appended to the journal """
+        return bool(self._parameters.get("journal", False))
+
+    def has_lazy_content(self):
+        """ Return True if the contents of the tasks are read lazily """
+        return bool(self._parameters.get("lazy-content", False))
+
+    def has_line_format(self):
+        """ Return True if the tasks are stored one per line """
+        return self._parameters.get("format", FORMAT_XML) == FORMAT_LINES
+
     def initialize(self):
         """ This is called when a backend is enabled """
         super(Backend, self).initialize()
-        self.doc, self.xmlproj = cleanxml.openxmlfile(
-            self.get_path(), "project")
+        # The XML file will be read again by start_get_tasks()
+        with self._doc_lock:
+            self.doc, self.xmlproj = None, None
+            self._nodes = {}
+            self._records = {}
+            self._fragments = {}
+
+    def _open_xml(self, records=None):
+        """ Load the whole XML snapshot at once, recovering it from backups
+        if needed, and replay the journal on top of it
+
+        @param records: the records of the tasks of the XML file, if they
+                        are already known """
+        with self._doc_lock:
+            self.doc, self.xmlproj = cleanxml.openxmlfile(
+                self.get_path(), "project")
+            self._used_backup = cleanxml.used_backup()
+            self._backup_file_info = cleanxml.backup_file_info()
+            self._index_nodes()
+            if records is not None and not self._used_backup:
+                self._records = dict((record["tid"], record)
+                                     for record in records)
+            self._replay_journal()
+
+    def _stream_xml(self):
+        """ Read the XML snapshot incrementally, yielding each <task> node as
+        soon as it has been read. The journal is applied in the same pass.
+
+        If the file is missing or damaged, we fall back to _open_xml(), which
+        knows how to recover it. The tasks read before the damage have been
+        pushed already: they are kept, and only the other tasks of the
+        recovered file are yielded. """
+        changes = self._journal_changes()
+        path = self.get_path()
+        with self._doc_lock:
+            self.doc, self.xmlproj = cleanxml.emptydoc("project")
+            self._nodes = {}
+            self._records = {}
+            self._fragments = {}
+
+        streamed = False
+        if os.path.exists(path):
+            try:
+                for node in cleanxml.iterxmlfile(path, TASK_NODE):
+                    tid = node.getAttribute("id")
+                    if tid in changes:
+                        node = changes.pop(tid)
+                        if node is None:
+                            continue
+                    with self._doc_lock:
+                        node = self.doc.importNode(node, True)
+                        self._put_node(tid, node)
+                    yield node
+                streamed = True
+            except (IOError, xml.parsers.expat.ExpatError) as msg:
+                Log.warning("Error while reading %s: %s" % (path, msg))
+
+        if streamed:
+            self._used_backup = False
+            self._backup_file_info = ""
+            # tasks which were created after the last compaction
+            for tid, node in changes.items():
+                if node is None:
+                    continue
+                with self._doc_lock:
+                    node = self.doc.importNode(node, True)
+                    self._put_node(tid, node)
+                yield node
+        else:
+            with self._doc_lock:
+                read = dict(self._nodes)
+            self._open_xml()
+            with self._doc_lock:
+                # The tasks read are newer than the ones of a backup
+                for tid, node in read.items():
+                    self._put_node(tid, self.doc.importNode(node, True))
+                recovered = [node for tid, node in self._nodes.items()
+                             if tid not in read]
+            for node in recovered:
+                yield node
+
+    def _ensure_loaded(self, records=None):
+        """ Load the XML file if start_get_tasks() has not done it yet """
+        with self._load_lock:
+            if self.doc is None:
+                self._open_xml(records)
+
+    def _journal_is_empty(self):
+        """ Return True if the XML file holds all the changes """
+        return next(self._journal.replay(), None) is None
+
+    def _load_snapshot(self):
+        """ Return the records of the snapshot of the XML file, or None if
+        the snapshot can't be used """
+        if not self._journal_is_empty():
+            return None
+        return tasksnapshot.load_snapshot(self.get_path(),
+                                          lazy=self.has_lazy_content())
+
+    def _parse_in_parallel(self):
+        """ Return the records of the XML file parsed by several processes,
+        or None if it is not worth it or parsing failed """
+        workers = self._parameters.get("parse-workers", 1)
+        path = self.get_path()
+        if workers <= 1 or not self._journal_is_empty():
+            return None
+        try:
+            if os.path.getsize(path) < PARALLEL_PARSE_SIZE:
+                return None
+            return parallelxml.parse_xml_file(path, workers)
+        except Exception as msg:
+            # The file is damaged or the processes could not be started.
+            # _stream_xml() will deal with it.
+            Log.warning("Could not parse %s in parallel: %s" % (path, msg))
+            return None
+
+    def _write_snapshot(self, path):
+        """ Write the snapshot of the XML file, which has just been saved.
+        Must be called with the lock held. """
+        records = []
+        for tid, node in self._nodes.items():
+            record = self._records.get(tid)
+            if record is None:
+                record = taskxml.record_from_xml(
+                    node, lazy=self.has_lazy_content())
+                self._records[tid] = record
+            records.append(record)
+        tasksnapshot.write_snapshot(path, records)
+
+    def _replay_journal(self):
+        """ Apply the changes recorded in the journal to the XML object """
+        for tid, node in self._journal_changes().items():
+            if node is None:
+                self._remove_node(tid)
+            else:
+                self._put_node(tid, self.doc.importNode(node, True))
+
+    def _journal_changes(self):
+        """ Return the final state of the tasks changed in the journal, as an
+        ordered dictionary tid -> <task> node, or None if removed """
+        changes = OrderedDict()
+        for op, tid, data in self._journal.replay():
+            if op == OP_SET and data:
+                try:
+                    node = xml.dom.minidom.parseString(data).documentElement
+                except xml.parsers.expat.ExpatError:
+                    continue
+                changes[tid] = node
+            elif op == OP_REMOVE:
+                changes[tid] = None
+        return changes
+
+    def _index_nodes(self):
+        """ Build the dictionary tid -> <task> node of the XML object """
+        self._nodes = {}
+        self._records = {}
+        self._fragments = {}
+        for node in self.xmlproj.childNodes:
+            if node.nodeName == TASK_NODE:
+                self._nodes[node.getAttribute("id")] = node
+
+    def _put_node(self, tid, node):
+        """ Replace the <task> node of tid, or append it if it is new """
+        existing = self._nodes.get(tid)
+        if existing is not None:
+            self.xmlproj.replaceChild(node, existing)
+        else:
+            self.xmlproj.appendChild(node)
+        self._nodes[tid] = node
+        self._records.pop(tid, None)
+        self._fragments.pop(tid, None)
+
+    def _remove_node(self, tid):
+        """ Remove the <task> node of tid. Return True if it was present """
+        node = self._nodes.pop(tid, None)
+        if node is None:
+            return False
+        self._records.pop(tid, None)
+        self._fragments.pop(tid, None)
+        self.xmlproj.removeChild(node)
+        return True
+
+    def _compact(self, backup=False):
+        """ Save the whole XML object to file and empty the journal """
+        with self._doc_lock:
+            if self.doc is None:
+                return
+            path = self.get_path()
+            if cleanxml.savexml(path, self.doc, backup=backup):
+                self._journal.truncate()
+                self._write_snapshot(path)
+
+    def _save(self, op, tid, data=None, backup=False):
+        """ Make a change persistent.
+
+        In journal mode, the change is appended to the journal and the
+        journal is folded into the XML file in background when it becomes too
+        long. Otherwise, the XML file is marked as dirty and rewritten in
+        background, so that close changes are written only once. """
+        if not self.is_journaled():
+            interval = self._parameters.get("save-interval",
+                                            cleanxml.SAVE_INTERVAL)
+            cleanxml.schedule_savexml(self.get_path(), self.doc,
+                                      backup=backup, lock=self._doc_lock,
+                                      interval=interval,
+                                      on_saved=self._write_snapshot)
+            return
+
+        self._journal.append(op, tid, data)
+        if len(self._journal) >= JOURNAL_COMPACT_SIZE and \
+                self._compaction_thread is None:
+            def compaction():
+                self._compact()
+                self._compaction_thread = None
+            self._compaction_thread = threading.Thread(target=compaction)
+            self._compaction_thread.daemon = True
+            self._compaction_thread.start()
 
     def this_is_the_first_run(self, xml):
         """ Called upon the very first GTG startup.
@@ -133,26 +419,148 @@ class Backend(GenericBackend):
         @param xml: an xml object containing the default tasks.
         """
         self._parameters[self.KEY_DEFAULT_BACKEND] = True
+        if self.has_line_format():
+            tasklines.write_records(
+                self.get_path(),
+                [taskxml.record_from_xml(node) for node in
+                 xml.getElementsByTagName(TASK_NODE)])
+            self._lines = tasklines.TaskLineFile(self.get_path())
+            return
         cleanxml.savexml(self.get_path(), xml)
-        self.doc, self.xmlproj = cleanxml.openxmlfile(
-            self.get_path(), "project")
+        self._journal.truncate()
+        self.doc, self.xmlproj = None, None
         self._used_backup = False
 
     def start_get_tasks(self):
         """ This function starts submitting the tasks from the XML file into
         GTG core. It's run as a separate thread.
 
+        The first time, the tasks are loaded from the snapshot of the XML
+        file if it is up to date, or parsed by several processes if the file
+        is large and "parse-workers" allows it. Otherwise, the XML file is
+        read incrementally: each task is pushed as soon as it has been read,
+        so that the first tasks are shown while the rest of the file is still
+        being loaded.
+
         @return: start_get_tasks() might not return or finish
         """
-        for node in self.xmlproj.childNodes:
-            if node.nodeName != TASK_NODE:
-                continue
+        if self.has_line_format():
+            self._start_from_lines()
+            return
+
+        first_load = self.doc is None
+        if first_load:
+            records = self._load_snapshot()
+            if records is not None:
+                self._start_from_records(records)
+                return
+            records = self._parse_in_parallel()
+            if records is not None:
+                self._start_from_records(records, compact=True)
+                return
+
+        if first_load:
+            nodes = self._stream_xml()
+        else:
+            with self._doc_lock:
+                nodes = list(self._nodes.values())
+
+        lazy = self.has_lazy_content()
+        for node in nodes:
             tid = node.getAttribute("id")
             task = self.datastore.task_factory(tid)
             if task:
-                task = taskxml.task_from_xml(task, node)
+                task = taskxml.task_from_xml(task, node, lazy=lazy)
                 self.datastore.push_task(task)
 
+        if first_load:
+            # Make safety daily backup after loading. It also folds the
+            # journal into the XML file.
+            self._compact(backup=True)
+
+    def _start_from_records(self, records, compact=False):
+        """ Push the tasks of records, which match the XML file. The XML
+        object, which is needed to save changes, is loaded in background.
+
+        @param compact: if True, the XML file is saved again once loaded,
+                        which makes a backup and writes the snapshot """
+        for record in records:
+            task = self.datastore.task_factory(record["tid"])
+            if task:
+                task = taskxml.task_from_record(task, record)
+                self.datastore.push_task(task)
+
+        self._used_backup = False
+        self._backup_file_info = ""
+        if not compact:
+            # Make safety daily backup after loading. The XML file is the
+            # one we have just loaded: there is no need to write it again.
+            try:
+                cleanxml.backupxml(self.get_path())
+            except (IOError, OSError) as msg:
+                Log.warning("Could not backup %s: %s" % (self.get_path(),
+                                                         msg))
+
+        load_thread = threading.Thread(target=self._load_in_background,
+                                       args=(records, compact))
+        load_thread.daemon = True
+        load_thread.start()
+
+    def _load_in_background(self, records, compact):
+        """ Load the XML object for _start_from_records() """
+        self._ensure_loaded(records)
+        if compact:
+            self._compact(backup=True)
+
+    def _ensure_lines_loaded(self):
+        """ Read the task file if start_get_tasks() has not done it yet.
+        Return the records of the tasks if the file was read. """
+        with self._load_lock:
+            if not self._lines.is_loaded():
+                return self._lines.load()
+        return None
+
+    def _start_from_lines(self):
+        """ Push the tasks of a file in the "lines" format """
+        with self._load_lock:
+            try:
+                records = self._lines.load()
+            except (IOError, OSError) as msg:
+                Log.warning("Error while reading %s: %s" % (self.get_path(),
+                                                            msg))
+                return
+        with self._doc_lock:
+            self._fragments = {}
+
+        for record in records:
+            task = self.datastore.task_factory(record["tid"])
+            if task:
+                task = taskxml.task_from_record(task, record)
+                self.datastore.push_task(task)
+
+        # Make safety daily backup after loading. The file is modified in
+        # place, so the backups can't be links to it.
+        path = self.get_path()
+        try:
+            if os.path.exists(path):
+                cleanxml.backupxml(path, copy=True)
+        except (IOError, OSError) as msg:
+            Log.warning("Could not backup %s: %s" % (path, msg))
+
+    def _set_task_line(self, task, version):
+        """ set_task() for the "lines" format """
+        self._ensure_lines_loaded()
+        tid = task.get_id()
+        with self._doc_lock:
+            # The digest of the line is checked by self._lines
+            fragment = self._fragments.get(tid)
+            if fragment is not None and fragment[0] == version:
+                return
+            self._lines.put(taskxml.record_from_task(task))
+            self._fragments[tid] = (version, None)
+            if self._lines.needs_compaction():
+                self._lines.compact()
+
     def set_task(self, task):
         """
         This function is called from GTG core whenever a task should be
@@ -164,30 +572,40 @@ class Backend(GenericBackend):
         @param task: the task object to save
         """
         tid = task.get_id()
-        # We create an XML representation of the task
-        t_xml = taskxml.task_to_xml(self.doc, task)
-
-        # we find if the task exists in the XML treenode.
-        existing = None
-        for node in self.xmlproj.childNodes:
-            if node.nodeName == TASK_NODE and node.getAttribute("id") == tid:
-                existing = node
+        # The children are stored by liblarch, which doesn't change the
+        # version of the task
+        version = (task.get_version(), tuple(task.get_children()))
+        if self.has_line_format():
+            self._set_task_line(task, version)
+            return
+        self._ensure_loaded()
+        with self._doc_lock:
+            fragment = self._fragments.get(tid)
+            if fragment is not None and fragment[0] == version:
+                # The task has not changed since it was saved
+                return
+
+            # We create an XML representation of the task
+            t_xml = taskxml.task_to_xml(self.doc, task)
+            t_str = t_xml.toxml()
+            digest = _digest(t_str)
 
-        modified = False
-        # We then replace the existing node
-        if existing and t_xml:
             # We will write only if the task has changed
-            if t_xml.toxml() != existing.toxml():
-                self.xmlproj.replaceChild(t_xml, existing)
-                modified = True
-        # If the node doesn't exist, we create it
-        else:
-            self.xmlproj.appendChild(t_xml)
-            modified = True
-
-        # if the XML object has changed, we save it to file
-        if modified and self._parameters["path"] and self.doc:
-            cleanxml.savexml(self.get_path(), self.doc)
+            if fragment is not None:
+                modified = digest != fragment[1]
+            else:
+                existing = self._nodes.get(tid)
+                modified = existing is None or \
+                    digest != _digest(existing.toxml())
+            # We then replace the existing node or, if the node doesn't exist,
+            # we create it
+            if modified:
+                self._put_node(tid, t_xml)
+            self._fragments[tid] = (version, digest)
+
+            # if the XML object has changed, we save it to file
+            if modified and self._parameters["path"] and self.doc:
+                self._save(OP_SET, tid, t_str)
 
     def remove_task(self, tid):
         """ This function is called from GTG core whenever a task must be
@@ -195,15 +613,33 @@ class Backend(GenericBackend):
 
         @param tid: the id of the task to delete
         """
-        modified = False
-        for node in self.xmlproj.childNodes:
-            if node.nodeName == TASK_NODE and node.getAttribute("id") == tid:
-                modified = True
-                self.xmlproj.removeChild(node)
-
-        # We save the XML file only if it's necessary
-        if modified:
-            cleanxml.savexml(self.get_path(), self.doc, backup=True)
+        if self.has_line_format():
+            self._ensure_lines_loaded()
+            with self._doc_lock:
+                self._fragments.pop(tid, None)
+                if self._lines.remove(tid) and self._lines.needs_compaction():
+                    self._lines.compact()
+            return
+        self._ensure_loaded()
+        with self._doc_lock:
+            # We save the XML file only if it's necessary
+            if self._remove_node(tid):
+                self._save(OP_REMOVE, tid, backup=True)
+
+    def save_state(self):
+        """ Write the pending changes and fold the journal into the XML file
+        before quitting """
+        if self.has_line_format():
+            with self._doc_lock:
+                self._lines.close()
+            return
+        cleanxml.flush_savexml(self.get_path())
+        if self.is_journaled():
+            compaction_thread = self._compaction_thread
+            if compaction_thread is not None:
+                compaction_thread.join()
+            self._compact()
+            self._journal.close()
 
     def used_backup(self):
         """ This functions return a boolean value telling if backup files
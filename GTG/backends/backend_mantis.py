@@ -188,7 +188,8 @@ class Backend(PeriodicImportBackend):
 
             elif action == SyncEngine.UPDATE:
                 task = self.datastore.get_task(tid)
-                self._populate_task(task, issue_dic)
+                with task.batch():
+                    self._populate_task(task, issue_dic)
                 meme = self.sync_engine.get_meme_from_remote_id(
                     issue_dic['number'])
                 meme.set_local_last_modified(task.get_modified())
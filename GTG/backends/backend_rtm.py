@@ -380,7 +380,8 @@ class Backend(PeriodicImportBackend):
                 newest = meme.which_is_newest(task.get_modified(),
                                               rtm_task.get_modified())
                 if newest == "remote":
-                    self._populate_task(task, rtm_task)
+                    with task.batch():
+                        self._populate_task(task, rtm_task)
                     meme.set_remote_last_modified(rtm_task.get_modified())
                     meme.set_local_last_modified(task.get_modified())
                 else:
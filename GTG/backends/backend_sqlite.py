@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+'''
+SQLite is a read/write backend that stores your tasks in a SQLite database.
+By default, the database is in your $XDG_DATA_DIR/gtg folder.
+
+Unlike the localfile backend, saving or removing a task touches only the rows
+of that task, in a single transaction.
+'''
+
+import os
+import threading
+
+from GTG import _
+from GTG.backends.genericbackend import GenericBackend
+from GTG.core import CoreConfig
+from GTG.tools import taskxml, tasksql
+from GTG.tools.logger import Log
+
+
+class Backend(GenericBackend):
+    """
+    SQLite backend, which stores your tasks in a database file.
+    Tasks are loaded when the backend is enabled, and from that point on
+    each change is written to the database as soon as it is received.
+    """
+
+    _general_description = {
+        GenericBackend.BACKEND_NAME: "backend_sqlite",
+        GenericBackend.BACKEND_HUMAN_NAME: _("SQLite Database"),
+        GenericBackend.BACKEND_AUTHORS: ["GTG Team"],
+        GenericBackend.BACKEND_TYPE: GenericBackend.TYPE_READWRITE,
+        GenericBackend.BACKEND_DESCRIPTION:
+        _("Your tasks are saved in a SQLite database. " +
+          "Saving a task does not rewrite all your tasks, " +
+          "which makes it faster for large task lists."),
+    }
+
+    # "path" is the database file.
+    # "import-path" is an XML task file (as written by the localfile backend)
+    # which is imported once, when the database is created.
+    _static_parameters = {
+        "path": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_STRING,
+            GenericBackend.PARAM_DEFAULT_VALUE: "gtg_tasks.db"},
+        "import-path": {
+            GenericBackend.PARAM_TYPE: GenericBackend.TYPE_STRING,
+            GenericBackend.PARAM_DEFAULT_VALUE: ""}}
+
+    def __init__(self, parameters):
+        """
+        Instantiates a new backend. The database is opened in initialize().
+
+        @param parameters: A dictionary of parameters, generated from
+        _static_parameters.
+        """
+        super(Backend, self).__init__(parameters)
+        self._connection = None
+        self._db_lock = threading.Lock()
+
+    def _get_data_path(self, path):
+        """ Return the absolute path; bare names are in the data dir """
+        if os.sep not in path:
+            data_dir = CoreConfig().get_data_dir()
+            path = os.path.join(data_dir, path)
+        return os.path.abspath(path)
+
+    def get_path(self):
+        """ Return the current path to the database """
+        return self._get_data_path(self._parameters["path"])
+
+    def initialize(self):
+        """ This is called when a backend is enabled """
+        super(Backend, self).initialize()
+        with self._db_lock:
+            self._ensure_open()
+
+    def _ensure_open(self):
+        """ Open the database if needed, importing the XML file if the
+        database is new. Must be called with the lock held. """
+        if self._connection is not None:
+            return
+        path = self.get_path()
+        is_new = not os.path.exists(path)
+        self._connection = tasksql.open_database(path)
+        import_path = self._parameters.get("import-path", "")
+        if is_new and import_path:
+            self._import_xml(self._get_data_path(import_path))
+
+    def _import_xml(self, xml_path):
+        """ One-shot import of an XML task file """
+        if not os.path.exists(xml_path):
+            Log.warning("Cannot import %s: file not found" % xml_path)
+            return
+        count = tasksql.import_xml(self._connection, xml_path)
+        Log.info("Imported %d tasks from %s" % (count, xml_path))
+
+    def start_get_tasks(self):
+        """ This function starts submitting the tasks from the database into
+        GTG core. It's run as a separate thread.
+
+        @return: start_get_tasks() might not return or finish
+        """
+        with self._db_lock:
+            self._ensure_open()
+            records = list(tasksql.iter_records(self._connection))
+
+        for record in records:
+            task = self.datastore.task_factory(record["tid"])
+            if task:
+                task = taskxml.task_from_record(task, record)
+                self.datastore.push_task(task)
+
+    def set_task(self, task):
+        """
+        This function is called from GTG core whenever a task should be
+        saved, either because it's a new one or it has been modified.
+
+        @param task: the task object to save
+        """
+        record = taskxml.record_from_task(task)
+        with self._db_lock:
+            self._ensure_open()
+            with self._connection:
+                tasksql.save_record(self._connection, record)
+
+    def remove_task(self, tid):
+        """ This function is called from GTG core whenever a task must be
+        removed from the backend. Note that the task could be not present here.
+
+        @param tid: the id of the task to delete
+        """
+        with self._db_lock:
+            self._ensure_open()
+            with self._connection:
+                tasksql.remove_record(self._connection, tid)
+
+    def save_state(self):
+        """ Close the database once the pending changes are written """
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
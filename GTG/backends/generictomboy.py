@@ -226,7 +226,8 @@ class GenericTomboy(GenericBackend):
                 newest = meme.which_is_newest(task.get_modified(),
                                               self.get_modified_for_note(note))
                 if newest == "remote":
-                    self._populate_task(task, note)
+                    with task.batch():
+                        self._populate_task(task, note)
                     meme.set_local_last_modified(task.get_modified())
                     meme.set_remote_last_modified(
                         self.get_modified_for_note(note))
@@ -34,9 +34,12 @@ from GTG.backends.genericbackend import GenericBackend
 from GTG.core import CoreConfig
 from GTG.core import requester
 from GTG.core.search import parse_search_query, search_filter, InvalidQuery
+from GTG.core.search import CompiledQuery, SearchCache
 from GTG.core.tag import Tag
 from GTG.core.task import Task
+from GTG.core.dateindex import DateIndex
 from GTG.core.treefactory import TreeFactory
+from GTG.core.wordindex import WordIndex
 from GTG.tools import cleanxml
 from GTG.tools.borg import Borg
 from GTG.tools.logger import Log
@@ -59,8 +62,27 @@ class DataStore(object):
         self.backends = {}
         self.treefactory = TreeFactory()
         self._tasks = self.treefactory.get_tasks_tree()
+        # Changes whenever a task is added, modified or deleted
+        self._generation = 0
+        # Words and dates of the tasks and results of the searches
+        self._word_index = WordIndex(self.get_task)
+        self._date_index = DateIndex(self.get_task)
+        self._search_cache = SearchCache(self._get_all_task_nodes,
+                                         self.get_generation,
+                                         self._word_index, self._date_index,
+                                         self._count_tag_tasks)
+        main_view = self._tasks.get_main_view()
+        main_view.register_cllbck('node-added', self._task_changed)
+        main_view.register_cllbck('node-modified', self._task_changed)
+        main_view.register_cllbck('node-deleted', self._task_deleted)
         self.requester = requester.Requester(self, global_conf)
         self.tagfile = None
+        # The XML document of the tag file is kept, so that a change of a tag
+        # only updates the node of that tag (see save_tagtree())
+        self._tag_doc = None
+        self._tag_nodes = {}
+        self._dirty_tags = set()
+        self._tag_lock = threading.Lock()
         self._tagstore = self.treefactory.get_tags_tree(self.requester)
         self.load_tag_tree()
         self._backend_signals = BackendSignals()
@@ -103,6 +125,39 @@ class DataStore(object):
         """
         return self._tasks
 
+    def get_word_index(self):
+        """
+        Return the index of the words of the tasks, used by the search
+
+        @returns GTG.core.wordindex.WordIndex
+        """
+        return self._word_index
+
+    def get_generation(self):
+        """
+        Return a number which changes whenever a task is added, modified or
+        deleted
+        """
+        return self._generation
+
+    def get_date_index(self):
+        """
+        Return the index of the dates of the tasks, used by the search
+
+        @returns GTG.core.dateindex.DateIndex
+        """
+        return self._date_index
+
+    def _task_changed(self, tid, path=None):
+        self._generation += 1
+        self._word_index.task_changed(tid)
+        self._date_index.task_changed(tid)
+
+    def _task_deleted(self, tid, path=None):
+        self._generation += 1
+        self._word_index.task_removed(tid)
+        self._date_index.task_removed(tid)
+
     ### Tags functions ########################################################
     def _add_new_tag(self, name, tag, filter_func, parameters, parent_id=None):
         """ Add tag into a tree """
@@ -111,7 +166,7 @@ class DataStore(object):
 
         self._tasks.add_filter(name, filter_func, parameters=parameters)
         self._tagstore.add_node(tag, parent_id=parent_id)
-        tag.set_save_callback(self.save)
+        tag.set_save_callback(lambda: self._tag_changed(name))
 
     def new_tag(self, name, attributes={}):
         """
@@ -136,6 +191,10 @@ class DataStore(object):
             Log.warning("Problem with parsing query '%s' (skipping): %s" %
                        (query, e.message))
             return None
+        parameters['index'] = self._word_index
+        parameters['dates'] = self._date_index
+        parameters['tag_count'] = self._count_tag_tasks
+        parameters['cache'] = self._search_cache
 
         # Create own copy of attributes and add special attributes label, query
         init_attr = dict(attributes)
@@ -145,14 +204,14 @@ class DataStore(object):
         tag = Tag(name, req=self.requester, attributes=init_attr)
         self._add_new_tag(name, tag, search_filter, parameters,
                           parent_id=CoreConfig.SEARCH_TAG)
-        self.save_tagtree()
+        self._tag_changed(name)
         return tag
 
     def remove_tag(self, name):
         """ Removes a tag from the tagtree """
         if self._tagstore.has_node(name):
             self._tagstore.del_node(name)
-            self.save_tagtree()
+            self._tag_changed(name)
         else:
             raise IndexError("There is no tag %s" % name)
 
@@ -200,6 +259,14 @@ class DataStore(object):
         else:
             return None
 
+    def _count_tag_tasks(self, tagname):
+        """ Return the number of tasks with a tag, to plan searches. All the
+        tasks are counted, done or not, as they are all indexed. """
+        tag = self.get_tag(tagname)
+        if tag is None:
+            return 0
+        return len(tag.get_related_tasks(self._tasks.get_main_view()))
+
     def load_tag_tree(self):
         """
         Loads the tag tree from a xml file
@@ -226,41 +293,97 @@ class DataStore(object):
                 if parent:
                     tag.set_parent(parent)
 
+        # The document is made again from the tags, as they would be saved
+        with self._tag_lock:
+            self._tag_doc, xmlroot = cleanxml.emptydoc(TAG_XMLROOT)
+            self._tag_nodes = {}
+            self._dirty_tags = set()
+            for tagname in self._tagstore.get_main_view().get_all_nodes():
+                t_xml = self._tag_to_xml(tagname)
+                if t_xml is not None and tagname not in self._tag_nodes:
+                    xmlroot.appendChild(t_xml)
+                    self._tag_nodes[tagname] = t_xml
         self.tagfile = tagfile
 
-    def save_tagtree(self):
-        """ Saves the tag tree to an XML file """
-        if not self.tagfile:
-            return
-
-        doc, xmlroot = cleanxml.emptydoc(TAG_XMLROOT)
-        tags = self._tagstore.get_main_view().get_all_nodes()
-        already_saved = []
+    def _tag_to_xml(self, tagname):
+        """ Return the <tag> node of a tag, or None if the tag must not be
+        saved """
+        if not self._tagstore.has_node(tagname):
+            return None
+        tag = self._tagstore.get_node(tagname)
+        attributes = tag.get_all_attributes(butname=True, withparent=True)
+        if "special" in attributes or len(attributes) == 0:
+            return None
 
-        for tagname in tags:
-            if tagname in already_saved:
+        t_xml = self._tag_doc.createElement("tag")
+        t_xml.setAttribute("name", tagname)
+        for attr in attributes:
+            # skip labels for search tags
+            if tag.is_search_tag() and attr == 'label':
                 continue
 
-            tag = self._tagstore.get_node(tagname)
-            attributes = tag.get_all_attributes(butname=True, withparent=True)
-            if "special" in attributes or len(attributes) == 0:
-                continue
+            value = tag.get_attribute(attr)
+            if value:
+                t_xml.setAttribute(attr, value)
+        return t_xml
+
+    def _update_tag_node(self, tagname):
+        """ Update the node of a tag in the XML document. Return True if the
+        document has changed. Must be called with the lock held. """
+        new_node = self._tag_to_xml(tagname)
+        old_node = self._tag_nodes.get(tagname)
+        xmlroot = self._tag_doc.documentElement
+        if new_node is None:
+            if old_node is None:
+                return False
+            xmlroot.removeChild(old_node)
+            del self._tag_nodes[tagname]
+            return True
 
-            t_xml = doc.createElement("tag")
-            t_xml.setAttribute("name", tagname)
-            for attr in attributes:
-                # skip labels for search tags
-                if tag.is_search_tag() and attr == 'label':
-                    continue
+        if old_node is None:
+            xmlroot.appendChild(new_node)
+        elif old_node.toxml() == new_node.toxml():
+            return False
+        else:
+            xmlroot.replaceChild(new_node, old_node)
+        self._tag_nodes[tagname] = new_node
+        return True
 
-                value = tag.get_attribute(attr)
-                if value:
-                    t_xml.setAttribute(attr, value)
+    def _tag_changed(self, tagname):
+        """ Save a tag which has been added, removed or modified """
+        with self._tag_lock:
+            self._dirty_tags.add(tagname)
+        self._save_dirty_tags()
 
-            xmlroot.appendChild(t_xml)
-            already_saved.append(tagname)
+    def _save_dirty_tags(self):
+        """ Update the nodes of the changed tags. If any of them has really
+        changed, the tag file is written in background: close changes are
+        written only once. """
+        if not self.tagfile:
+            return
+        with self._tag_lock:
+            dirty, self._dirty_tags = self._dirty_tags, set()
+            changed = False
+            for tagname in dirty:
+                if self._update_tag_node(tagname):
+                    changed = True
+            if changed:
+                cleanxml.schedule_savexml(self.tagfile, self._tag_doc,
+                                          backup=True, lock=self._tag_lock)
 
-        cleanxml.savexml(self.tagfile, doc, backup=True)
+    def save_tagtree(self):
+        """ Saves the tag tree to an XML file
+
+        All the tags are checked, since the parent of a tag can change
+        without notice. The file is written only if a tag has changed. """
+        if not self.tagfile:
+            return
+        with self._tag_lock:
+            self._dirty_tags.update(
+                self._tagstore.get_main_view().get_all_nodes())
+            self._dirty_tags.update(self._tag_nodes)
+        self._save_dirty_tags()
+        cleanxml.flush_savexml(self.tagfile)
 
     ### Tasks functions #######################################################
     def get_all_tasks(self):
@@ -271,6 +394,34 @@ class DataStore(object):
         """
         return self._tasks.get_main_view().get_all_nodes()
 
+    def _get_all_task_nodes(self):
+        return [self._tasks.get_node(tid) for tid in self.get_all_tasks()]
+
+    def search_tasks(self, query):
+        """
+        Returns the ids of the tasks matching a search query. Results are
+        kept while no task changes.
+
+        @param query: a search query, see GTG.core.search
+        @return a tuple of task ids, in the order of get_all_tasks()
+        @raise InvalidQuery: if the query is malformed
+        """
+        return self._search_cache.search(parse_search_query(query)['q'])
+
+    def explain_search(self, query):
+        """
+        Searches all the tasks and describes how: the order in which the
+        commands of the query are checked, and what every check cost
+
+        @param query: a search query, see GTG.core.search
+        @return a string, see GTG.core.search.CompiledQuery.explain()
+        @raise InvalidQuery: if the query is malformed
+        """
+        compiled = CompiledQuery(parse_search_query(query)['q'],
+                                 self._word_index, self._date_index,
+                                 self._count_tag_tasks)
+        return compiled.explain(self._get_all_task_nodes())
+
     def has_task(self, tid):
         """
         Returns true if the tid is among the active or closed tasks for
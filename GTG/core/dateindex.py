@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Sorted indexes of the due, start and closed dates of the tasks.
+
+The real dates of a field are kept in a sorted list of (ordinal, tid), so a
+comparison with a date is a range of the list, found by bisection. Fuzzy
+dates (now, soon, someday and no date) are kept in one bucket per value:
+all the tasks of a bucket compare the same way to a date.
+
+Real dates are kept below fuzzy dates of the same day (see GTG.tools.dates),
+so for a fuzzy date d and a real date r: r > d iff r is after the day of d,
+and r < d iff r is not after the day of d.
+"""
+
+from bisect import bisect_left, insort
+
+from GTG.core.taskindex import TaskIndex
+
+FIELDS = {
+    'due': lambda task: task.get_due_date(),
+    'start': lambda task: task.get_start_date(),
+    'closed': lambda task: task.get_closed_date(),
+}
+
+
+class DateIndex(TaskIndex):
+    """ The tasks sorted by their dates """
+
+    def __init__(self, get_task):
+        TaskIndex.__init__(self, get_task)
+        # field -> sorted list of (ordinal, tid) for real dates
+        self._sorted = dict((field, []) for field in FIELDS)
+        # field -> {fuzzy value: (date, set of tids)}
+        self._buckets = dict((field, {}) for field in FIELDS)
+        # tid -> {field: (ordinal, tid) or the fuzzy value}
+        self._tasks = {}
+
+    def _remove(self, tid):
+        for field, entry in self._tasks.pop(tid, {}).items():
+            self._drop_entry(field, entry, tid)
+        self._generation += 1
+
+    def _drop_entry(self, field, entry, tid):
+        if isinstance(entry, tuple):
+            items = self._sorted[field]
+            del items[bisect_left(items, entry)]
+        else:
+            self._buckets[field][entry][1].discard(tid)
+
+    def _add(self, task):
+        tid = task.get_id()
+        old = self._tasks.get(tid, {})
+        entries = {}
+        for field, get_date in FIELDS.items():
+            date = get_date(task)
+            if date.is_fuzzy():
+                entry = date.xml_str()
+            else:
+                entry = (date.date().toordinal(), tid)
+            entries[field] = entry
+            if old.get(field) == entry:
+                continue
+            if field in old:
+                self._drop_entry(field, old[field], tid)
+            if isinstance(entry, tuple):
+                insort(self._sorted[field], entry)
+            else:
+                bucket = self._buckets[field].setdefault(entry, (date, set()))
+                bucket[1].add(tid)
+            self._generation += 1
+        self._tasks[tid] = entries
+
+    def _lookup(self, field, real_range, fuzzy_check):
+        """ Return the ids of the tasks whose field is in real_range, a
+        (start, end) of ordinals, or in a bucket whose date satisfies
+        fuzzy_check """
+        start, end = real_range
+        with self._lock:
+            items = self._sorted[field]
+            tids = set(tid for ordinal, tid in
+                       items[bisect_left(items, (start,)):
+                             bisect_left(items, (end,))])
+            for bucket_date, bucket in self._buckets[field].values():
+                if bucket and fuzzy_check(bucket_date):
+                    tids.update(bucket)
+        return tids
+
+    def after(self, field, date):
+        """ Return the ids of the tasks whose field is after date """
+        ordinal = date.date().toordinal()
+        return self._lookup(field, (ordinal + 1, float('inf')),
+                            lambda bucket_date: bucket_date > date)
+
+    def before(self, field, date):
+        """ Return the ids of the tasks whose field is before date """
+        ordinal = date.date().toordinal()
+        if date.is_fuzzy():
+            ordinal += 1
+        return self._lookup(field, (float('-inf'), ordinal),
+                            lambda bucket_date: bucket_date < date)
+
+    def equal(self, field, date):
+        """ Return the ids of the tasks whose field is date """
+        if date.is_fuzzy():
+            real_range = (0, 0)
+        else:
+            ordinal = date.date().toordinal()
+            real_range = (ordinal, ordinal + 1)
+        return self._lookup(field, real_range,
+                            lambda bucket_date: bucket_date == date)
@@ -21,9 +21,12 @@
 A nice general purpose interface for the datastore and tagstore
 """
 
+from contextlib import contextmanager
+
 from gi.repository import GObject
 
 from GTG.core.tag import Tag
+from GTG.core.task import batch_changes
 from GTG.tools.logger import Log
 
 
@@ -105,6 +108,20 @@ class Requester(GObject.GObject):
         task = self.ds.get_task(tid)
         return task
 
+    @contextmanager
+    def batch(self, tids):
+        """Change several tasks, which are notified only once each, at the
+        end of the with-block:
+
+            with requester.batch(tids) as tasks:
+                for task in tasks:
+                    task.set_due_date(due_date)
+
+        @param tids: the ids of the tasks to change
+        """
+        with batch_changes():
+            yield [self.get_task(tid) for tid in tids]
+
     # FIXME unused parameter newtask (maybe for compatibility?)
     def new_task(self, tags=None, newtask=True):
         """Create a new task.
@@ -136,6 +153,10 @@ class Requester(GObject.GObject):
         """
         # send the signal before actually deleting the task !
         Log.debug("deleting task %s" % tid)
+        task = self.get_task(tid)
+        if task is not None:
+            # its parents lose a subtask
+            task.subtree_changed()
         return self.__basetree.del_node(tid, recursive=recursive)
 
     def get_task_id(self, task_title):
@@ -153,6 +174,19 @@ class Requester(GObject.GObject):
 
         return None
 
+    def search_tasks(self, query):
+        """ Return the ids of the tasks matching a search query
+
+        If query is not correct, exception InvalidQuery is raised. """
+        return self.ds.search_tasks(query)
+
+    def explain_search(self, query):
+        """ Return how the tasks are searched for a query, with the time
+        taken by every command
+
+        If query is not correct, exception InvalidQuery is raised. """
+        return self.ds.explain_search(query)
+
     ############### Tags ##########################
     ###############################################
     def get_tag_tree(self):
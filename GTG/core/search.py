@@ -68,6 +68,10 @@ search_filter() expect parameter 'q' which is a list of commands in the form
 A special command is "or" which contains subcommands and returns Ture if
 at least one subcommand returns True.
 
+The list of commands is compiled once into a CompiledQuery, which checks
+tasks without interpreting the commands again. search_filter() keeps it in
+its parameters.
+
 search_filter() could be easily plugged in Liblarch and filter only suitable
 tasks.
 
@@ -77,9 +81,13 @@ For more information see unittests:
 """
 
 import re
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
 
 from GTG import _
 from GTG.tools.dates import Date
+from GTG.tools.logger import Log
 
 # Generate keywords and their possible translations
 # They must be listed because of gettext
@@ -241,56 +249,542 @@ def parse_search_query(query):
     return {'q': commands}
 
 
-def search_filter(task, parameters=None):
-    """ Check if task satisfies all search parameters """
+# Relative cost of checking a command for a task
+CLAUSE_COSTS = {'word': 20}
 
-    if parameters is None or 'q' not in parameters:
-        return False
+# Part of the tasks satisfying a command, when it can't be estimated
+DEFAULT_PASSING = {
+    'word': 0.1,
+    'tag': 0.2,
+    'today': 0.05,
+    'tomorrow': 0.05,
+    'now': 0.05,
+    'soon': 0.05,
+    'someday': 0.05,
+}
 
-    def check_commands(commands_list):
-        """ Execute search commands
+# A plan is made again when the number of indexed tasks has been multiplied
+# or divided by this since the plan was made
+REPLAN_FACTOR = 2
 
-        This method is recursive for !or and !and """
+_Step = namedtuple('_Step', 'check command cost passing')
 
-        def fulltext_search(task, word):
-            """ check if task contains the word """
-            word = word.lower()
-            text = task.get_excerpt(strip_tags=False).lower()
-            title = task.get_title().lower()
-
-            return word in text or word in title
-
-        value_checks = {
-            'after': lambda t, v: task.get_due_date() > v,
-            'before': lambda t, v: task.get_due_date() < v,
-            'tag': lambda t, v: v in task.get_tags_name(),
-            'word': fulltext_search,
-            'today': lambda task, v: task.get_due_date() == Date.today(),
-            'tomorrow': lambda task, v: task.get_due_date() == Date.tomorrow(),
-            'nodate': lambda task, v: task.get_due_date() == Date.no_date(),
-            'now': lambda task, v: task.get_due_date() == Date.now(),
-            'soon': lambda task, v: task.get_due_date() == Date.soon(),
-            'someday': lambda task, v: task.get_due_date() == Date.someday(),
-            'notag': lambda task, v: task.get_tags() == [],
-        }
-
-        for command in commands_list:
-            cmd, positive, args = command[0], command[1], command[2:]
-            result = False
-
-            if cmd == 'or':
-                for sub_cmd in args[0]:
-                    if check_commands([sub_cmd]):
-                        result = True
-                        break
-            elif value_checks.get(cmd, None):
-                if len(args) > 0:
-                    args = args[0]
-                result = value_checks[cmd](task, args)
-
-            if (positive and not result) or (not positive and result):
+
+def _describe(command):
+    """ Return a command in the query language """
+    cmd = command[0]
+    value = command[2] if len(command) > 2 else None
+    if cmd == 'or':
+        text = "(%s)" % " !or ".join(_describe(sub) for sub in value)
+    elif cmd in ('word', 'tag'):
+        text = value
+    elif value is not None:
+        text = "!%s %s" % (cmd, value)
+    else:
+        text = "!" + cmd
+    return text if command[1] else "!not " + text
+
+
+class CompiledQuery(object):
+    """ The commands of a parsed query, compiled into a list of checks
+
+    A CompiledQuery is called with a task and returns True if the task
+    satisfies all the commands. Words are lowercased once, fuzzy dates are
+    made once, and today and tomorrow once per day.
+
+    With a WordIndex (see GTG.core.wordindex), a word is first looked up in
+    the candidates given by the index: the text of the other tasks is read
+    only if they changed since they were indexed.
+
+    With the indexes, candidates() gives the tasks which might satisfy the
+    commands, so that a search over all the tasks checks only them. Dates
+    are looked up in the DateIndex (see GTG.core.dateindex) there only:
+    comparing the due date of a single task is cheaper than a lookup.
+
+    The commands are checked in the order of a plan, made when the query is
+    first used: the cheap checks which reject most tasks come first. Their
+    selectivity is estimated from the indexes and tag_count, a function
+    returning the number of tasks with a tag among all the tasks, like the
+    indexes. The plan is made again when the number of indexed tasks has
+    changed a lot, e.g. for a query compiled before the tasks were loaded.
+    The plan doesn't change the result, and explain() describes it. """
+
+    def __init__(self, commands, index=None, dates=None, tag_count=None):
+        self._uses_days = False
+        self._today = self._tomorrow = None
+        self._index = index
+        self._dates = dates
+        self._tag_count = tag_count
+        self._generation = None
+        # word -> ids of the tasks which might contain it
+        self._candidates = {}
+        # functions returning the ids of the tasks which might satisfy
+        # a command, or None
+        lookups = [self._compile_lookup(command) for command in commands]
+        self._lookups = [lookup for command, lookup in zip(commands, lookups)
+                         if command[1] and lookup is not None]
+        # the checks in the order of the query, then of the plan
+        self._plan = None
+        # number of indexed tasks when the plan was made
+        self._plan_total = 0
+        self._steps = [(self._compile(command), command, lookup)
+                       for command, lookup in zip(commands, lookups)]
+        self._checks = [(check, command[1])
+                        for check, command, lookup in self._steps]
+
+    def _refresh(self):
+        if self._uses_days:
+            today = Date.today()
+            if today is not self._today:
+                self._today, self._tomorrow = today, Date.tomorrow()
+        if self._index is not None:
+            generation = self._index.refresh()
+            if generation != self._generation:
+                self._generation = generation
+                self._candidates = {}
+                if self._plan is not None and self._plan_outdated():
+                    self._plan = None
+
+    def __call__(self, task):
+        self._refresh()
+        if self._plan is None:
+            self._make_plan()
+        # lowercase text and title of the task, computed by the first word
+        texts = []
+        for check, positive in self._checks:
+            if check(task, texts) != positive:
                 return False
+        return True
+
+    def _compile(self, command):
+        """ Return a function (task, texts) -> bool for a command, ignoring
+        whether it should be positive """
+        cmd = command[0]
+        value = command[2] if len(command) > 2 else None
+
+        if cmd == 'or':
+            return self._compile_or(value)
+        elif cmd == 'after':
+            return lambda task, texts: task.get_due_date() > value
+        elif cmd == 'before':
+            return lambda task, texts: task.get_due_date() < value
+        elif cmd == 'tag':
+            return lambda task, texts: value in task.get_tags_name()
+        elif cmd == 'word':
+            return self._compile_word(value.lower())
+        elif cmd in ('today', 'tomorrow'):
+            self._uses_days = True
+            if cmd == 'today':
+                return lambda task, texts: task.get_due_date() == self._today
+            return lambda task, texts: task.get_due_date() == self._tomorrow
+        elif cmd in ('nodate', 'now', 'soon', 'someday'):
+            date = {
+                'nodate': Date.no_date,
+                'now': Date.now,
+                'soon': Date.soon,
+                'someday': Date.someday,
+            }[cmd]()
+            return lambda task, texts: task.get_due_date() == date
+        elif cmd == 'notag':
+            return lambda task, texts: not task.get_tags_name()
+        else:
+            return lambda task, texts: False
+
+    def _compile_or(self, commands):
+        """ Compile the subcommands of !or, merging the nested ones """
+        checks = []
+        pending = list(reversed(commands))
+        while pending:
+            command = pending.pop()
+            if command[0] == 'or' and command[1]:
+                pending.extend(reversed(command[2]))
+            else:
+                checks.append((self._compile(command), command[1]))
+
+        def check_or(task, texts):
+            for check, positive in checks:
+                if check(task, texts) == positive:
+                    return True
+            return False
+        return check_or
+
+    def _word_candidates(self, word):
+        if word not in self._candidates:
+            self._candidates[word] = self._index.candidates(word)
+        return self._candidates[word]
 
+    def _compile_word(self, word):
+        index = self._index
+
+        def check_word(task, texts):
+            """ check if task contains the word """
+            if index is not None:
+                candidates = self._word_candidates(word)
+                if candidates is not None:
+                    tid = task.get_id()
+                    # a task changed since it was indexed is read anyway
+                    if tid not in candidates and \
+                            index.versions.get(tid) == task.get_version():
+                        return False
+            if not texts:
+                texts.append(task.get_excerpt(strip_tags=False).lower())
+                texts.append(task.get_title().lower())
+            return word in texts[0] or word in texts[1]
+        return check_word
+
+    def _compile_lookup(self, command):
+        """ Return a function returning the ids of the tasks which might
+        satisfy a positive command, or None if the indexes can't tell """
+        cmd = command[0]
+        value = command[2] if len(command) > 2 else None
+        dates = self._dates
+
+        if cmd == 'word' and self._index is not None:
+            word = value.lower()
+            return lambda: self._word_candidates(word)
+        elif cmd == 'or':
+            lookups = [self._compile_lookup(sub) if sub[1] else None
+                       for sub in value]
+            if None in lookups:
+                return None
+
+            def lookup_or():
+                tids = set()
+                for lookup in lookups:
+                    sub_tids = lookup()
+                    if sub_tids is None:
+                        return None
+                    tids.update(sub_tids)
+                return tids
+            return lookup_or
+        elif dates is None:
+            return None
+        elif cmd == 'after':
+            return lambda: dates.after('due', value)
+        elif cmd == 'before':
+            return lambda: dates.before('due', value)
+        elif cmd == 'today':
+            return lambda: dates.equal('due', self._today)
+        elif cmd == 'tomorrow':
+            return lambda: dates.equal('due', self._tomorrow)
+        elif cmd in ('nodate', 'now', 'soon', 'someday'):
+            date = {
+                'nodate': Date.no_date,
+                'now': Date.now,
+                'soon': Date.soon,
+                'someday': Date.someday,
+            }[cmd]()
+            return lambda: dates.equal('due', date)
+        return None
+
+    def candidates(self):
+        """ Return the ids of the tasks which might satisfy the commands,
+        or None if any task might. Tasks changed since they were indexed
+        (see is_current()) might satisfy them too. """
+        self._refresh()
+        if self._dates is not None:
+            self._dates.refresh()
+        result = None
+        for lookup in self._lookups:
+            tids = lookup()
+            if tids is not None:
+                result = set(tids) if result is None else result & tids
+        return result
+
+    def _estimate(self, command, lookup, total):
+        """ Return the cost of a command and the estimated part of the tasks
+        which satisfy it, ignoring whether it should be positive """
+        cmd = command[0]
+        if cmd == 'or':
+            cost, failing = 0, 1.0
+            for sub in command[2]:
+                sub_cost, passing = self._estimate(
+                    sub, self._compile_lookup(sub), total)
+                cost += sub_cost
+                failing *= (1 - passing) if sub[1] else passing
+            return cost, 1 - failing
+
+        passing = None
+        if total:
+            if lookup is not None:
+                tids = lookup()
+                if tids is not None:
+                    passing = len(tids) / total
+            elif cmd == 'tag' and self._tag_count is not None:
+                passing = self._tag_count(command[2]) / total
+        if passing is None:
+            passing = DEFAULT_PASSING.get(cmd, 0.5)
+        return CLAUSE_COSTS.get(cmd, 1), min(passing, 1.0)
+
+    def _total(self):
+        """ Return the number of indexed tasks """
+        return max([len(index.versions)
+                    for index in (self._index, self._dates)
+                    if index is not None] or [0])
+
+    def _plan_outdated(self):
+        """ Return True if the number of indexed tasks has changed too much
+        since the plan was made """
+        total = self._total()
+        if not self._plan_total:
+            return total > 0
+        return not (self._plan_total / REPLAN_FACTOR <= total <=
+                    self._plan_total * REPLAN_FACTOR)
+
+    def _make_plan(self):
+        """ Order the checks by cost per rejected task """
+        # the estimates must not use the tasks indexed before a change
+        for index in (self._index, self._dates):
+            if index is not None:
+                index.refresh()
+        total = self._total()
+        plan = []
+        for check, command, lookup in self._steps:
+            cost, passing = self._estimate(command, lookup, total)
+            if not command[1]:
+                passing = 1 - passing
+            plan.append(_Step(check, command, cost, passing))
+        # sort() is stable: checks as good as each other keep their order
+        plan.sort(key=lambda step: step.cost / (1 - step.passing)
+                  if step.passing < 1 else float('inf'))
+        self._plan = plan
+        self._plan_total = total
+        self._checks = [(step.check, step.command[1]) for step in plan]
+        Log.debug("Search plan: %s" %
+                  ", ".join(_describe(step.command) for step in plan))
+
+    def get_plan(self):
+        """ Return the commands in the order they are checked """
+        self._refresh()
+        if self._plan is None:
+            self._make_plan()
+        return [step.command for step in self._plan]
+
+    def explain(self, tasks):
+        """ Check tasks and return a description of the plan: for every
+        check, its cost, the estimated part of the tasks passing it, how
+        many tasks it checked and passed and how long it took """
+        self.get_plan()
+        counts = [[0, 0, 0.0] for step in self._plan]
+        total = matches = 0
+        for task in tasks:
+            total += 1
+            texts = []
+            for step, count in zip(self._plan, counts):
+                start = time.perf_counter()
+                passed = step.check(task, texts) == step.command[1]
+                count[2] += time.perf_counter() - start
+                count[0] += 1
+                if not passed:
+                    break
+                count[1] += 1
+            else:
+                matches += 1
+
+        lines = ["%d tasks, %d matching" % (total, matches)]
+        for number, (step, count) in enumerate(zip(self._plan, counts), 1):
+            lines.append("%d. %-30s cost %3g, %5.1f%% estimated, "
+                         "%d checked, %d passed, %.3f ms" % (
+                             (number, _describe(step.command), step.cost,
+                              step.passing * 100) + tuple(count[:2]) +
+                             (count[2] * 1000,)))
+        return "\n".join(lines)
+
+    def is_current(self, task):
+        """ Return True if the indexes are up to date for task """
+        tid, version = task.get_id(), task.get_version()
+        for index in (self._index, self._dates):
+            if index is not None and index.versions.get(tid) != version:
+                return False
         return True
 
-    return check_commands(parameters['q'])
+
+@lru_cache(maxsize=64)
+def compile_search_query(query):
+    """ Return the CompiledQuery of a query string. Queries are kept, so that
+    a query used for every task is parsed once.
+
+    If query is not correct, exception InvalidQuery is raised. """
+    return CompiledQuery(parse_search_query(query)['q'])
+
+
+def normalize_query(commands):
+    """ Return a hashable form of the commands of a parsed query, the same
+    for every query giving the same commands """
+    if isinstance(commands, (list, tuple)):
+        return tuple(normalize_query(command) for command in commands)
+    elif isinstance(commands, Date):
+        return ('date', commands.xml_str())
+    return commands
+
+
+# Tasks of a query checked without a result in the same generation before
+# a new result is computed: liblarch is then checking every task, not only
+# a modified one
+BULK_MISSES = 2
+
+
+class _Result(object):
+    """ The tasks matching a query in a generation of the datastore """
+
+    __slots__ = ('key', 'tids', 'matching', 'known', 'mark', 'hits',
+                 'misses')
+
+    def __init__(self, key, tids, known, mark, misses):
+        # (query, generation, day)
+        self.key = key
+        # matching ids, in the order of the tasks
+        self.tids = tids
+        self.matching = frozenset(tids)
+        # ids of all the tasks, and the highest version among them
+        self.known = known
+        self.mark = mark
+        self.hits = 0
+        self.misses = misses
+
+
+class SearchCache(object):
+    """ The results of queries over all the tasks of a datastore
+
+    A result is kept for a normalized query, the generation of the datastore,
+    which changes whenever a task is added, modified or deleted, and the day,
+    for the queries on dates. An unchanged datastore answers a repeated query
+    from its result. Only the last results are kept.
+
+    Whether a task matches a query depends on the task only, so matches()
+    also answers from an older result of the query for the tasks which have
+    not changed since. The other tasks are checked directly: liblarch checks
+    a task when it changes, which may happen before the datastore sees the
+    change. A new result is computed once several tasks were checked
+    directly in the same generation, i.e. when liblarch checks every task. """
+
+    def __init__(self, get_tasks, get_generation, index=None, dates=None,
+                 tag_count=None, size=32):
+        """
+        @param get_tasks: a function returning all the tasks, in order
+        @param get_generation: a function returning the generation
+        @param index: the WordIndex given to the queries
+        @param dates: the DateIndex given to the queries
+        @param tag_count: the tag_count function given to the queries
+        @param size: the maximum number of results kept
+        """
+        self._get_tasks = get_tasks
+        self._get_generation = get_generation
+        self._index = index
+        self._dates = dates
+        self._tag_count = tag_count
+        self._size = size
+        # (query, generation, day) -> _Result
+        self._results = OrderedDict()
+        # query -> the newest _Result of the day
+        self._newest = {}
+        self._generation = self._today = None
+        # ids of the tasks in the current generation
+        self._known = None
+        # query -> ids of the tasks checked directly in the generation
+        self._misses = {}
+
+    def _current_generation(self):
+        generation, today = self._get_generation(), Date.today()
+        if today is not self._today:
+            self._today = today
+            self._newest = {}
+        if generation != self._generation:
+            self._generation = generation
+            self._known = None
+            self._misses = {}
+        return generation
+
+    def _compute(self, key, compiled):
+        query = key[0]
+        tasks = self._get_tasks()
+        if self._known is None:
+            self._known = frozenset(task.get_id() for task in tasks)
+        mark = max((task.get_version() for task in tasks), default=None)
+        candidates = compiled.candidates()
+        if candidates is None:
+            tids = tuple(task.get_id() for task in tasks if compiled(task))
+        else:
+            # the other tasks are checked only if they changed since they
+            # were indexed
+            is_current = compiled.is_current
+            tids = tuple(task.get_id() for task in tasks
+                         if (task.get_id() in candidates or
+                             not is_current(task)) and compiled(task))
+        result = _Result(key, tids, self._known, mark,
+                         len(self._misses.pop(query, ())))
+        self._results[key] = result
+        self._newest[query] = result
+        if len(self._results) > self._size:
+            old_key, old = self._results.popitem(last=False)
+            if self._newest.get(old_key[0]) is old:
+                del self._newest[old_key[0]]
+        return result
+
+    def search(self, commands):
+        """ Return the ids of the tasks matching the commands of a parsed
+        query, in the order of the tasks """
+        generation = self._current_generation()
+        key = (normalize_query(commands), generation, self._today.date())
+        result = self._results.get(key)
+        if result is None:
+            result = self._compute(key, CompiledQuery(
+                commands, self._index, self._dates, self._tag_count))
+            result.misses += 1
+        else:
+            self._results.move_to_end(key)
+            result.hits += 1
+        return result.tids
+
+    def matches(self, task, query, compiled):
+        """ Return True if task matches a query
+
+        @param query: the normalized query
+        @param compiled: the CompiledQuery of the query """
+        generation = self._current_generation()
+        result = self._newest.get(query)
+        tid = task.get_id()
+        if result is not None and tid in result.known and \
+                task.get_version() <= result.mark:
+            result.hits += 1
+            return tid in result.matching
+
+        misses = self._misses.setdefault(query, set())
+        misses.add(tid)
+        if len(misses) >= BULK_MISSES and \
+                (result is None or result.key[1] != generation):
+            result = self._compute((query, generation, self._today.date()),
+                                   compiled)
+            if tid in result.known:
+                result.hits += 1
+                return tid in result.matching
+        if result is not None:
+            result.misses += 1
+        return compiled(task)
+
+    def get_stats(self):
+        """ Return {(query, generation, day): (hits, misses)} for the kept
+        results """
+        return dict((key, (result.hits, result.misses))
+                    for key, result in self._results.items())
+
+
+def search_filter(task, parameters=None):
+    """ Check if task satisfies all search parameters """
+
+    if parameters is None or 'q' not in parameters:
+        return False
+
+    # Liblarch gives the same parameters for every task
+    compiled = parameters.get('compiled')
+    if compiled is None or compiled[0] is not parameters['q']:
+        compiled = (parameters['q'],
+                    CompiledQuery(parameters['q'], parameters.get('index'),
+                                  parameters.get('dates'),
+                                  parameters.get('tag_count')),
+                    normalize_query(parameters['q']))
+        parameters['compiled'] = compiled
+    cache = parameters.get('cache')
+    if cache is not None:
+        return cache.matches(task, compiled[2], compiled[1])
+    return compiled[1](task)
@@ -24,6 +24,7 @@ Tagstore is to tag as datastore is to task. Of course, the tagstore is
 easier.  See the end of this file for the Tag object implementation.
 """
 
+import sys
 import xml.sax.saxutils as saxutils
 
 from GTG.core import CoreConfig
@@ -42,6 +43,8 @@ class Tag(TreeNode):
     for tags is C{name}, which always matches L{Tag.get_name()}.
     """
 
+    __slots__ = ["_name", "req", "_save", "_attributes", "viewcount"]
+
     def __init__(self, name, req, attributes={}):
         """Construct a tag.
 
@@ -51,7 +54,7 @@ class Tag(TreeNode):
             calling _save callback
         """
         TreeNode.__init__(self, name)
-        self._name = saxutils.unescape(str(name))
+        self._name = sys.intern(saxutils.unescape(str(name)))
         self.req = req
         self._save = None
         self._attributes = {'name': self._name}
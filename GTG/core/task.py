@@ -22,17 +22,256 @@ task.py contains the Task class which represents (guess what) a task
 """
 from datetime import datetime
 import cgi
+import html
+import itertools
 import re
+import sys
+import threading
 import uuid
-import xml.dom.minidom
 import xml.sax.saxutils as saxutils
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
 
 from GTG import _
 from GTG.tools.dates import Date
+from GTG.tools.lazytext import LazyText
 from GTG.tools.logger import Log
 from liblarch import TreeNode
 from GTG.tools.tags import extract_tags_from_text
 
+# Each change of a task gives it a new version, unique among all the tasks
+_versions = itertools.count()
+
+# What a task without attributes or remote ids returns, see Task.attributes
+_NO_ENTRIES = MappingProxyType({})
+
+# Markup of the content of a task: comments, CDATA sections, processing
+# instructions, doctype, or a start, end or empty element tag
+_MARKUP = re.compile(r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<![^>]*>|'
+                     r'<(/?)([^\s/>]+)[^>]*?(/?)>', re.S)
+
+
+def _drop_arrow(pieces, start):
+    """ Remove the arrow ending the text pieces[start:], if any """
+    tail, index = "", len(pieces)
+    while index > start and len(tail) < 2:
+        index -= 1
+        tail = pieces[index] + tail
+    if not tail.endswith('→ '):
+        return
+    count = 2
+    while count:
+        last = pieces.pop()
+        if len(last) > count:
+            pieces.append(last[:-count])
+            count = 0
+        else:
+            count -= len(last)
+
+
+def _content_to_text(content, strip_subtasks=False):
+    """ Return the text of the XML content of a task, without markup
+
+    The content is read in a single pass, without building a DOM. Only the
+    text inside the root element is kept, like the text nodes of a DOM.
+    When strip_subtasks is set, subtasks are removed with the arrow written
+    before them. """
+    # non empty pieces of text, and where the text of each open element
+    # starts among them
+    pieces, starts = [], []
+    skipped = 0
+    position = 0
+    for match in _MARKUP.finditer(content):
+        text = content[position:match.start()]
+        position = match.end()
+        if text and starts and not skipped:
+            pieces.append(html.unescape(text) if '&' in text else text)
+        closing, name, empty = match.groups()
+        if name is None:
+            continue
+        if skipped:
+            if not empty:
+                skipped += -1 if closing else 1
+        elif closing:
+            if starts:
+                starts.pop()
+        elif strip_subtasks and name == 'subtask':
+            _drop_arrow(pieces, starts[-1] if starts else 0)
+            if not empty:
+                skipped = 1
+        elif not empty:
+            starts.append(len(pieces))
+    return "".join(pieces)
+
+
+# What a task knows about its subtree, see Task._get_subtree(). It is valid
+# while day is Date.today(): fuzzy due dates move every day.
+_Subtree = namedtuple("_Subtree", ["day", "urgent_date", "active_children",
+                                   "active_subtasks", "most_urgent"])
+
+
+class _Batch(threading.local):
+    """ The tasks changed in the current batch of a thread """
+
+    def __init__(self):
+        self.depth = 0
+        self.changed = OrderedDict()
+
+
+_batch = _Batch()
+
+
+@contextmanager
+def batch_changes():
+    """ Defer the notifications of the tasks changed by this thread in the
+    with-block: each changed task is notified once, when the outermost batch
+    ends. """
+    _batch.depth += 1
+    try:
+        yield
+    finally:
+        _batch.depth -= 1
+        if _batch.depth == 0:
+            changed, _batch.changed = _batch.changed, OrderedDict()
+            for task in changed.values():
+                # a task can be deleted by the changes of another one
+                if task.req.has_task(task.get_id()):
+                    task.modified()
+
+
+def _to_date(value):
+    """ Return value as a Date. Dates are never modified, so Date objects
+    and empty dates are shared instead of copied. """
+    if isinstance(value, Date):
+        # a Date is false when it is empty
+        return value if value else Date.no_date()
+    if value is None or value == "":
+        return Date.no_date()
+    return Date(value)
+
+
+class _DateChanges(object):
+    """ The dates changed by setting the due or start date of a task, and
+    the tasks to sync
+
+    Setting a date applies the constraints between a task and its parents
+    and children (see the comments above Task.set_due_date): the new dates
+    are computed with a worklist over the tasks, then set and synced once
+    per task by apply().
+
+    Every date set while following the constraints is the date given by
+    the user, so a task changes at most once, and the tasks already
+    checked against it don't need to be checked again. """
+
+    def __init__(self, requester):
+        self.req = requester
+        self._due = OrderedDict()
+        self._start = OrderedDict()
+        # the tasks whose subtasks are synced as well
+        self._due_changed = []
+        self._events = deque()
+        self._seen_parents = set()
+        self._seen_children = set()
+
+    def _get_due(self, task):
+        if task.tid in self._due:
+            return self._due[task.tid][1]
+        return task.due_date
+
+    def _get_start(self, task):
+        if task.tid in self._start:
+            return self._start[task.tid][1]
+        return task.start_date
+
+    def set_due_date(self, task, date):
+        """ Set the due date of a task, and those of its relatives which no
+        longer respect the constraints """
+        self._events.append((task, date))
+        return self._propagate()
+
+    def set_start_date(self, task, date):
+        """ Set the start date of a task, and the due dates which no longer
+        respect the constraints """
+        self._set_start(task, date)
+        return self._propagate()
+
+    def _propagate(self):
+        while self._events:
+            self._set_due(*self._events.popleft())
+        return self
+
+    def _set_start(self, task, date):
+        self._start[task.tid] = (task, date)
+        due = self._get_due(task)
+        if not date.is_fuzzy() and not due.is_fuzzy() and date > due:
+            self._events.append((task, date))
+
+    def _set_due(self, task, date):
+        if self._get_due(task) != date:
+            self._due_changed.append(task)
+        self._due[task.tid] = (task, date)
+        # If the new date is fuzzy or undefined, we don't update related tasks
+        if date.is_fuzzy():
+            return
+        # the start date can't happen later than the due date
+        start = self._get_start(task)
+        if not start.is_fuzzy() and start > date:
+            self._set_start(task, date)
+        # ancestors due before the new date are postponed
+        for par in self._defined_relatives(task, "parents",
+                                           self._seen_parents):
+            if self._get_due(par) < date:
+                self._events.append((par, date))
+        # subtasks due or starting after the new date are moved to it
+        for sub in self._defined_relatives(task, "children",
+                                           self._seen_children):
+            if self._get_due(sub) > date:
+                self._events.append((sub, date))
+            start = self._get_start(sub)
+            if not start.is_fuzzy() and start > date:
+                self._set_start(sub, date)
+
+    def _defined_relatives(self, task, relation, seen):
+        """ Return the closest parents or children of task which have a
+        defined due date which is not fuzzy, skipping the ones in seen """
+        relatives = []
+        pending = list(getattr(task, relation))
+        while pending:
+            tid = pending.pop()
+            if tid in seen:
+                continue
+            seen.add(tid)
+            relative = self.req.get_task(tid)
+            if self._get_due(relative).is_fuzzy():
+                pending.extend(getattr(relative, relation))
+            else:
+                relatives.append(relative)
+        return relatives
+
+    def apply(self):
+        """ Set the new dates, then sync each changed task once
+
+        The subtasks of the tasks whose due date changed are synced as
+        well, since their constraints changed. """
+        to_sync = OrderedDict()
+        for task, date in self._due.values():
+            task.due_date = date
+        for task, date in self._start.values():
+            task.start_date = date
+            to_sync[task.tid] = task
+        walked = set()
+        pending = list(reversed(self._due_changed))
+        while pending:
+            task = pending.pop()
+            if task.tid not in walked:
+                walked.add(task.tid)
+                to_sync[task.tid] = task
+                pending.extend(self.req.get_task(tid)
+                               for tid in reversed(task.children))
+        for task in to_sync.values():
+            task.sync()
+
 
 class Task(TreeNode):
     """ This class represent a task in GTG.
@@ -43,15 +282,27 @@ class Task(TreeNode):
     STA_DISMISSED = "Dismiss"
     STA_DONE = "Done"
 
+    # There can be many tasks: they have no room for other attributes
+    __slots__ = ["tid", "uuid", "_remote_ids", "_content", "title",
+                 "status", "closed_date", "due_date", "start_date",
+                 "can_be_deleted", "tags", "req", "__main_treeview",
+                 "loaded", "_attributes", "last_modified", "_version",
+                 "_excerpts", "_subtree"]
+
     def __init__(self, ze_id, requester, newtask=False):
         TreeNode.__init__(self, ze_id)
+        self._version = next(_versions)
         # the id of this task in the project should be set
         # tid is a string ! (we have to choose a type and stick to it)
         assert(isinstance(ze_id, str) or isinstance(ze_id, str))
         self.tid = str(ze_id)
-        self.set_uuid(uuid.uuid4())
-        self.remote_ids = {}
-        self.content = ""
+        # made by get_uuid() if the backend doesn't give one
+        self.uuid = None
+        self._remote_ids = None
+        # (version, {(strip_tags, strip_subtasks): text}), see get_excerpt()
+        self._excerpts = None
+        self._subtree = None
+        self._content = ""
         self.title = _("My new task")
         # available status are: Active - Done - Dismiss - Note
         self.status = self.STA_ACTIVE
@@ -68,9 +319,54 @@ class Task(TreeNode):
         # Should not be necessary with the new backends
 #        if self.loaded:
 #            self.req._task_loaded(self.tid)
-        self.attributes = {}
+        self._attributes = None
         self._modified_update()
 
+    def fill(self, uuid, title, status, due_date, start_date, closed_date,
+             modified, tags, content, children, attributes):
+        """ Set all the fields of a task which a backend is loading.
+
+        The setters are bypassed: nothing is synced, and the tags, parents and
+        children of the task are not updated. liblarch links the task to its
+        children once they are all pushed to the tree. The task must not be
+        loaded yet.
+
+        @param due_date, start_date, closed_date: Date objects or strings
+        @param modified: a datetime, or None if unknown
+        @param tags: the names of the tags
+        @param children: the ids of the subtasks
+        @param attributes: (namespace, key, value) tuples
+        """
+        assert not self.loaded
+        self.uuid = str(uuid)
+        self.title = title.strip('\t\n') if title else "(no title task)"
+        self.can_be_deleted = False
+        if status:
+            self.status = status
+        if status in [self.STA_DONE, self.STA_DISMISSED]:
+            self.closed_date = _to_date(closed_date) or Date.today()
+        self.due_date = _to_date(due_date)
+        self.start_date = _to_date(start_date)
+        # The only constraint within the task: see set_start_date()
+        if not self.start_date.is_fuzzy() and \
+                not self.due_date.is_fuzzy() and \
+                self.start_date > self.due_date:
+            self.due_date = self.start_date
+        if modified is not None:
+            self.last_modified = modified
+        for tagname in tags:
+            tagname = sys.intern(tagname)
+            if tagname not in self.tags:
+                self.tags.append(tagname)
+        if content:
+            self.set_text(content)
+        for tid in children:
+            TreeNode.add_child(self, tid)
+        if attributes:
+            self._attributes = dict(((namespace, key), str(value))
+                                    for namespace, key, value in attributes)
+        self._changed()
+
     def is_loaded(self):
         return self.loaded
 
@@ -78,6 +374,8 @@ class Task(TreeNode):
         # avoid doing it multiple times
         if not self.loaded:
             self.loaded = True
+            # the task has been linked to its parents
+            self.subtree_changed()
 
     def set_to_keep(self):
         self.can_be_deleted = False
@@ -88,14 +386,41 @@ class Task(TreeNode):
     def get_id(self):
         return str(self.tid)
 
+    def get_version(self):
+        """ Return a number which changes whenever the task is modified.
+        Backends use it to know if a task must be saved again.
+
+        The versions of all the tasks are taken from a single counter: a
+        modified task gets a higher version than any other task. """
+        return self._version
+
+    def _changed(self):
+        self._version = next(_versions)
+        self.subtree_changed()
+
+    def subtree_changed(self):
+        """ Forget what the task and its ancestors know about their subtree.
+        To be called when the subtasks of the task change. """
+        self._subtree = None
+        ancestors = list(self.get_parents())
+        while ancestors:
+            task = self.req.get_task(ancestors.pop())
+            # the ancestors of a task without subtree data have none either
+            if task is not None and task._subtree is not None:
+                task._subtree = None
+                ancestors.extend(task.get_parents())
+
     def set_uuid(self, value):
         self.uuid = str(value)
+        self._changed()
 
     def get_uuid(self):
+        if self.uuid is None:
+            self.uuid = str(uuid.uuid4())
         # NOTE: Transitional if switch, needed to add
         #      the uuid field to tasks created before
         #      adding this field to the task description.
-        if self.uuid == "":
+        elif self.uuid == "":
             self.set_uuid(uuid.uuid4())
             self.sync()
         return str(self.uuid)
@@ -109,6 +434,14 @@ class Task(TreeNode):
         '''
         return self.remote_ids
 
+    @property
+    def remote_ids(self):
+        """ The remote ids of the task, read only. Most tasks have none, so
+        the dictionary is made by add_remote_id(). """
+        if self._remote_ids is None:
+            return _NO_ENTRIES
+        return self._remote_ids
+
     def add_remote_id(self, backend_id, task_remote_id):
         '''
         A task usually has a different id in all the different backends.
@@ -117,7 +450,10 @@ class Task(TreeNode):
         @param backend_id: string representing the backend id
         @param task_remote_id: the id for this task in the backend backend_id
         '''
-        self.remote_ids[str(backend_id)] = str(task_remote_id)
+        if self._remote_ids is None:
+            self._remote_ids = {}
+        self._remote_ids[str(backend_id)] = str(task_remote_id)
+        self._changed()
 
     def get_title(self):
         return self.title
@@ -245,6 +581,7 @@ class Task(TreeNode):
 
     def set_modified(self, modified):
         self.last_modified = modified
+        self._changed()
 
     def recursive_sync(self):
         """Recursively sync the task and all task children. Defined"""
@@ -292,66 +629,14 @@ class Task(TreeNode):
     # on this task's due date though, you can obtain it by using
     # get_due_date_constraint method.
     def set_due_date(self, new_duedate):
-        """Defines the task's due date."""
+        """Defines the task's due date.
 
-        def __get_defined_parent_list(task):
-            """Recursively fetch a list of parents that have a defined due date
-               which is not fuzzy"""
-            parent_list = []
-            for par_id in task.parents:
-                par = self.req.get_task(par_id)
-                if par.get_due_date().is_fuzzy():
-                    parent_list += __get_defined_parent_list(par)
-                else:
-                    parent_list.append(par)
-            return parent_list
-
-        def __get_defined_child_list(task):
-            """Recursively fetch a list of children that have a defined
-               due date which is not fuzzy"""
-            child_list = []
-            for child_id in task.children:
-                child = self.req.get_task(child_id)
-                if child.get_due_date().is_fuzzy():
-                    child_list += __get_defined_child_list(child)
-                else:
-                    child_list.append(child)
-            return child_list
-
-        old_due_date = self.due_date
-        new_duedate_obj = Date(new_duedate)  # caching the conversion
-        self.due_date = new_duedate_obj
-        # If the new date is fuzzy or undefined, we don't update related tasks
-        if not new_duedate_obj.is_fuzzy():
-            # if the task's start date happens later than the
-            # new due date, we update it (except for fuzzy dates)
-            if not self.get_start_date().is_fuzzy() and \
-                    self.get_start_date() > new_duedate_obj:
-                self.set_start_date(new_duedate)
-            # if some ancestors' due dates happen before the task's new
-            # due date, we update them (except for fuzzy dates)
-            for par in __get_defined_parent_list(self):
-                if par.get_due_date() < new_duedate_obj:
-                    par.set_due_date(new_duedate)
-            # we must apply the constraints to the defined & non-fuzzy children
-            # as well
-            for sub in __get_defined_child_list(self):
-                sub_duedate = sub.get_due_date()
-                # if the child's due date happens later than the task's: we
-                # update it to the task's new due date
-                if sub_duedate > new_duedate_obj:
-                    sub.set_due_date(new_duedate)
-                # if the child's start date happens later than
-                # the task's new due date, we update it
-                # (except for fuzzy start dates)
-                sub_startdate = sub.get_start_date()
-                if not sub_startdate.is_fuzzy() and \
-                        sub_startdate > new_duedate_obj:
-                    sub.set_start_date(new_duedate)
-        # If the date changed, we notify the change for the children since the
-        # constraints might have changed
-        if old_due_date != new_duedate_obj:
-            self.recursive_sync()
+        The dates of the related tasks are updated to respect the
+        constraints, then each changed task is synced once. If the date
+        changed, the subtasks are synced as well, since their constraints
+        might have changed."""
+        _DateChanges(self.req).set_due_date(self, _to_date(new_duedate)) \
+            .apply()
 
     def get_due_date(self):
         """ Returns the due date, which always respects all constraints """
@@ -360,12 +645,54 @@ class Task(TreeNode):
     def get_urgent_date(self):
         """ Returns the most urgent due date among the tasks and its subtasks
         """
-        urg_date = self.due_date
+        return self._get_subtree().urgent_date
+
+    def get_active_children_count(self):
+        """ Returns the number of direct subtasks which are active """
+        return self._get_subtree().active_children
+
+    def get_active_subtasks_count(self):
+        """ Returns the number of active subtasks, at any depth """
+        return self._get_subtree().active_subtasks
+
+    def get_most_urgent_subtask(self):
+        """ Returns the id of the active subtask, at any depth, whose due
+        date is the closest, or None if no active subtask has a due date """
+        most_urgent = self._get_subtree().most_urgent
+        return most_urgent[1] if most_urgent else None
+
+    def _get_subtree(self):
+        """ Returns the _Subtree of the task
+
+        It is kept until the task or one of its subtasks changes, so it is
+        computed again only for the changed tasks and their ancestors. """
+        today = Date.today()
+        subtree = self._subtree
+        if subtree is not None and subtree.day is today:
+            return subtree
+        urgent_date = self.due_date
+        active_children = active_subtasks = 0
+        # (days left, tid) of the most urgent active subtask, the first
+        # one found in post-order wins
+        most_urgent = None
         for sub in self.get_subtasks():
-            sub_urg_date = sub.get_urgent_date()
-            if urg_date >= sub_urg_date:
-                urg_date = sub_urg_date
-        return urg_date
+            sub_tree = sub._get_subtree()
+            if urgent_date >= sub_tree.urgent_date:
+                urgent_date = sub_tree.urgent_date
+            active_subtasks += sub_tree.active_subtasks
+            candidates = [sub_tree.most_urgent]
+            if sub.status == self.STA_ACTIVE:
+                active_children += 1
+                active_subtasks += 1
+                if sub.due_date != Date.no_date():
+                    candidates.append((sub.due_date.days_left(), sub.tid))
+            for candidate in candidates:
+                if candidate is not None and \
+                        (most_urgent is None or candidate[0] < most_urgent[0]):
+                    most_urgent = candidate
+        self._subtree = _Subtree(today, urgent_date, active_children,
+                                 active_subtasks, most_urgent)
+        return self._subtree
 
     def get_due_date_constraint(self):
         """ Returns the most urgent due date constraint, following
@@ -410,12 +737,8 @@ class Task(TreeNode):
     #
     # Undefined/fizzy start dates don't constraint the task due date.
     def set_start_date(self, fulldate):
-        self.start_date = Date(fulldate)
-        if not Date(fulldate).is_fuzzy() and \
-            not self.due_date.is_fuzzy() and \
-                Date(fulldate) > self.due_date:
-            self.set_due_date(fulldate)
-        self.sync()
+        _DateChanges(self.req).set_start_date(self, _to_date(fulldate)) \
+            .apply()
 
     def get_start_date(self):
         return self.start_date
@@ -426,7 +749,7 @@ class Task(TreeNode):
     # dismissed). Closed date is not constrained and doesn't constrain other
     # dates.
     def set_closed_date(self, fulldate):
-        self.closed_date = Date(fulldate)
+        self.closed_date = _to_date(fulldate)
         self.sync()
 
     def get_closed_date(self):
@@ -442,6 +765,20 @@ class Task(TreeNode):
         closed_date = self.get_closed_date()
         return (closed_date - due_date).days
 
+    def _get_content(self):
+        content = self._content
+        if isinstance(content, LazyText):
+            return content.get()
+        return content
+
+    def _set_content(self, content):
+        self._content = content
+        self._changed()
+
+    # The content can be a LazyText given by the backend, which is read
+    # only when the content is needed
+    content = property(_get_content, _set_content)
+
     def get_text(self):
         """ Return the content or empty string in case of None """
         if self.content:
@@ -462,16 +799,21 @@ class Task(TreeNode):
         equivalent to get_text with with all XML stripped down.
         Warning: all markup informations are stripped down. Empty lines are
         also removed
+        The text without markup is kept until the task changes.
         """
         # defensive programmation to avoid returning None
         if self.content:
-            txt = self.content
-            if strip_tags:
-                for tag in self.get_tags_name():
-                    txt = self._strip_tag(txt, tag)
-            element = xml.dom.minidom.parseString(txt)
-            txt = self.__strip_content(element, strip_subtasks=strip_subtasks)
-            txt = txt.strip()
+            excerpts = self._excerpts
+            if excerpts is None or excerpts[0] != self._version:
+                excerpts = self._excerpts = (self._version, {})
+            txt = excerpts[1].get((strip_tags, strip_subtasks))
+            if txt is None:
+                txt = self.content
+                if strip_tags:
+                    for tag in self.get_tags_name():
+                        txt = self._strip_tag(txt, tag)
+                txt = _content_to_text(txt, strip_subtasks).strip()
+                excerpts[1][(strip_tags, strip_subtasks)] = txt
             # We keep the desired number of lines
             if lines > 0:
                 liste = txt.splitlines()
@@ -487,23 +829,12 @@ class Task(TreeNode):
         else:
             return ""
 
-    def __strip_content(self, element, strip_subtasks=False):
-        txt = ""
-        if element:
-            for n in element.childNodes:
-                if n.nodeType == n.ELEMENT_NODE:
-                    if strip_subtasks and n.tagName == 'subtask':
-                        if txt[-2:] == '→ ':
-                            txt = txt[:-2]
-                    else:
-                        txt += self.__strip_content(n, strip_subtasks)
-                elif n.nodeType == n.TEXT_NODE:
-                    txt += n.nodeValue
-        return txt
-
     def set_text(self, texte):
         self.can_be_deleted = False
-        if texte != "<content/>":
+        if isinstance(texte, LazyText):
+            # Lazy contents come from a backend and are already well formed
+            self.content = texte
+        elif texte != "<content/>":
             # defensive programmation to filter bad formatted tasks
             if not texte.startswith("<content>"):
                 texte = cgi.escape(texte, quote=True)
@@ -551,6 +882,7 @@ class Task(TreeNode):
         """
         c = self.req.get_task(tid)
         c.remove_parent(self.get_id())
+        self.subtree_changed()
         if c.can_be_deleted:
             self.req.delete_task(tid)
             self.sync()
@@ -587,6 +919,8 @@ class Task(TreeNode):
 
     def set_parent(self, parent_id):
         """Update the task's parent. Refresh due date constraints."""
+        # the old parents lose a subtask
+        self.subtree_changed()
         TreeNode.set_parent(self, parent_id)
         if parent_id is not None:
             par = self.req.get_task(parent_id)
@@ -605,7 +939,9 @@ class Task(TreeNode):
             string.
         """
         val = str(att_value)
-        self.attributes[(namespace, att_name)] = val
+        if self._attributes is None:
+            self._attributes = {}
+        self._attributes[(namespace, att_name)] = val
         self.sync()
 
     def get_attribute(self, att_name, namespace=""):
@@ -615,20 +951,47 @@ class Task(TreeNode):
         """
         return self.attributes.get((namespace, att_name), None)
 
+    @property
+    def attributes(self):
+        """ The attributes of the task, read only. Most tasks have none, so
+        the dictionary is made by set_attribute(). """
+        if self._attributes is None:
+            return _NO_ENTRIES
+        return self._attributes
+
     def sync(self):
         self._modified_update()
         if self.is_loaded():
-            # This is a liblarch call to the TreeNode ancestor
-            self.modified()
+            if _batch.depth:
+                _batch.changed[self.get_id()] = self
+            else:
+                # This is a liblarch call to the TreeNode ancestor
+                self.modified()
             return True
         else:
             return False
 
+    @contextmanager
+    def batch(self):
+        """ Make several changes to the task, which is notified only once,
+        at the end:
+
+            with task.batch():
+                task.set_title(title)
+                task.set_due_date(due_date)
+
+        The other tasks changed in the block, like the parents whose due
+        date is updated, are also notified at the end (see batch_changes).
+        """
+        with batch_changes():
+            yield self
+
     def _modified_update(self):
         '''
         Updates the modified timestamp
         '''
         self.last_modified = datetime.now()
+        self._changed()
 
 ### TAG FUNCTIONS ############################################################
 #
@@ -661,9 +1024,12 @@ class Task(TreeNode):
         """
         Adds a tag. Does not add '@tag' to the contents. See add_tag
         """
+        # Tasks share the string of the name of their tags
+        tagname = sys.intern(tagname)
         # Do not add the same tag twice
         if not tagname in self.tags:
             self.tags.append(tagname)
+            self._changed()
             if self.is_loaded():
                 for child in self.get_subtasks():
                     if child.can_be_deleted:
@@ -707,6 +1073,7 @@ class Task(TreeNode):
         modified = False
         if tagname in self.tags:
             self.tags.remove(tagname)
+            self._changed()
             modified = True
             for child in self.get_subtasks():
                 if child.can_be_deleted:
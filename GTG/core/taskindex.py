@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Base class of the indexes of the tasks used by the search.
+
+The datastore tells an index which tasks were added, modified or deleted.
+Changed tasks are indexed again only when the index is used, so that
+nothing is read from the tasks at startup. The index also remembers the
+version of every indexed task: a task modified since can't be left out of
+the results of a lookup, whatever the order of the signals.
+"""
+
+import threading
+
+
+class TaskIndex(object):
+    """ An index of the tasks, updated from the signals of the datastore
+
+    Subclasses implement _add() and _remove(), which are called with the
+    lock held and bump _generation when the results of lookups change. """
+
+    def __init__(self, get_task):
+        """
+        @param get_task: a function returning the task of an id, or None
+        """
+        self._get_task = get_task
+        self._lock = threading.Lock()
+        # the tasks to index again
+        self._dirty = set()
+        # tid -> version of the indexed tasks, read by the search
+        self.versions = {}
+        # changes whenever the results of a lookup might change
+        self._generation = 0
+
+    def task_changed(self, tid, path=None):
+        """ Index the task again when the index is used. Can be registered
+        for the node-added and node-modified signals. """
+        with self._lock:
+            self._dirty.add(tid)
+
+    def task_removed(self, tid, path=None):
+        """ Forget a task. Can be registered for the node-deleted signal. """
+        with self._lock:
+            self._dirty.discard(tid)
+            if self.versions.pop(tid, None) is not None:
+                self._remove(tid)
+
+    def refresh(self):
+        """ Index the changed tasks. Return a number which changes whenever
+        the results of a lookup might have changed. """
+        if self._dirty:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                for tid in dirty:
+                    task = self._get_task(tid)
+                    if task is None:
+                        if self.versions.pop(tid, None) is not None:
+                            self._remove(tid)
+                    else:
+                        # a change while the task is read gives a newer
+                        # version
+                        self.versions[tid] = task.get_version()
+                        self._add(task)
+        return self._generation
+
+    def is_current(self, task):
+        """ Return True if the task has not changed since it was indexed """
+        return self.versions.get(task.get_id()) == task.get_version()
+
+    def _add(self, task):
+        """ Index a task, which might be indexed already """
+        raise NotImplementedError
+
+    def _remove(self, tid):
+        """ Forget an indexed task """
+        raise NotImplementedError
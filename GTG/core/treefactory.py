@@ -192,16 +192,18 @@ class TreeFactory:
 
     def workdue(self, task):
         ''' Filter for tasks due within the next day '''
-        wv = (self.workview(task) and
-              task.get_due_date() and
-              task.get_days_left() < 2)
+        # the due date is checked first: most tasks are not due, and
+        # workview() looks at the subtasks
+        wv = (task.get_due_date() and
+              task.get_days_left() < 2 and
+              self.workview(task))
         return wv
 
     def worklate(self, task):
         ''' Filter for tasks due within the next day '''
-        wv = (self.workview(task) and
-              task.get_due_date() and
-              task.get_days_late() > 0)
+        wv = (task.get_due_date() and
+              task.get_days_late() > 0 and
+              self.workview(task))
         return wv
 
     def workstarted(self, task):
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+An index of the words of the tasks, for the full-text search.
+
+The words are the lowercase titles and contents of the tasks (as searched
+by the search, see GTG.core.search) split on whitespaces. A searched word,
+even a part of a word, can only be in the tasks which have a word
+containing it, so the index gives a set of candidate tasks, which the
+search then checks one by one.
+"""
+
+from GTG.core.taskindex import TaskIndex
+
+
+def task_words(task):
+    """ Return the set of the words of a task """
+    words = set(task.get_excerpt(strip_tags=False).lower().split())
+    words.update(task.get_title().lower().split())
+    return words
+
+
+class WordIndex(TaskIndex):
+    """ An inverted index: word -> ids of the tasks containing the word """
+
+    def __init__(self, get_task):
+        TaskIndex.__init__(self, get_task)
+        # tid -> words of the indexed tasks
+        self._tasks = {}
+        self._postings = {}
+
+    def _remove(self, tid):
+        words = self._tasks.pop(tid, ())
+        for word in words:
+            tids = self._postings[word]
+            tids.discard(tid)
+            if not tids:
+                del self._postings[word]
+        if words:
+            self._generation += 1
+
+    def _add(self, task):
+        tid = task.get_id()
+        words = task_words(task)
+        old_words = self._tasks.get(tid, set())
+        if words != old_words:
+            for word in old_words - words:
+                tids = self._postings[word]
+                tids.discard(tid)
+                if not tids:
+                    del self._postings[word]
+            for word in words - old_words:
+                self._postings.setdefault(word, set()).add(tid)
+            self._generation += 1
+        self._tasks[tid] = words
+
+    def candidates(self, text):
+        """ Return the ids of the indexed tasks which might contain text, or
+        None if text has no word and any task might contain it """
+        parts = text.lower().split()
+        if not parts:
+            return None
+        result = None
+        with self._lock:
+            for part in parts:
+                tids = set()
+                for word, word_tids in self._postings.items():
+                    if part in word:
+                        tids.update(word_tids)
+                result = tids if result is None else result & tids
+                if not result:
+                    break
+        return result
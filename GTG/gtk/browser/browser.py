@@ -1046,15 +1046,14 @@ class TaskBrowser(GObject.GObject):
         self.vmanager.ask_delete_tasks(tids_todelete)
 
     def update_start_date(self, widget, new_start_date):
-        tasks = [self.req.get_task(uid)
-                 for uid in self.get_selected_tasks()
-                 if uid is not None]
+        tids = [uid for uid in self.get_selected_tasks() if uid is not None]
 
         start_date = Date.parse(new_start_date)
 
         # FIXME:If the task dialog is displayed, refresh its start_date widget
-        for task in tasks:
-            task.set_start_date(start_date)
+        with self.req.batch(tids) as tasks:
+            for task in tasks:
+                task.set_start_date(start_date)
 
     def on_mark_as_started(self, widget):
         self.update_start_date(widget, "today")
@@ -1075,15 +1074,14 @@ class TaskBrowser(GObject.GObject):
         self.update_start_date(widget, None)
 
     def update_due_date(self, widget, new_due_date):
-        tasks = [self.req.get_task(uid)
-                 for uid in self.get_selected_tasks()
-                 if uid is not None]
+        tids = [uid for uid in self.get_selected_tasks() if uid is not None]
 
         due_date = Date.parse(new_due_date)
 
         # FIXME: If the task dialog is displayed, refresh its due_date widget
-        for task in tasks:
-            task.set_due_date(due_date)
+        with self.req.batch(tids) as tasks:
+            for task in tasks:
+                task.set_due_date(due_date)
 
     def on_set_due_today(self, widget):
         self.update_due_date(widget, "today")
@@ -1139,15 +1137,14 @@ class TaskBrowser(GObject.GObject):
                                        y + rect.y)
 
     def on_date_changed(self, calendar):
-        # Get tasks' list from task names' list
-        tasks = [self.req.get_task(task) for task in self.get_selected_tasks()]
         date, date_kind = calendar.get_selected_date()
-        if date_kind == GTGCalendar.DATE_KIND_DUE:
-            for task in tasks:
-                task.set_due_date(date)
-        elif date_kind == GTGCalendar.DATE_KIND_START:
-            for task in tasks:
-                task.set_start_date(date)
+        with self.req.batch(self.get_selected_tasks()) as tasks:
+            if date_kind == GTGCalendar.DATE_KIND_DUE:
+                for task in tasks:
+                    task.set_due_date(date)
+            elif date_kind == GTGCalendar.DATE_KIND_START:
+                for task in tasks:
+                    task.set_start_date(date)
 
     def on_modify_tags(self, widget):
         """ Run Modify Tags dialog on selected tasks """
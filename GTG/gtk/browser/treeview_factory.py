@@ -24,7 +24,7 @@ import locale
 from GTG import _
 from GTG.core import CoreConfig
 from GTG.core.task import Task
-from GTG.core.search import parse_search_query, search_filter
+from GTG.core.search import compile_search_query
 from GTG.gtk.browser.CellRendererTags import CellRendererTags
 from liblarch_gtk import TreeView
 from GTG.gtk import colors
@@ -56,13 +56,7 @@ class TreeviewFactory():
     def _has_hidden_subtask(self, task):
         # not recursive
         display_count = self.mainview.node_n_children(task.get_id())
-        real_count = 0
-        if task.has_child():
-            for tid in task.get_children():
-                sub_task = self.req.get_task(tid)
-                if sub_task and sub_task.get_status() == Task.STA_ACTIVE:
-                    real_count = real_count + 1
-        return display_count < real_count
+        return display_count < task.get_active_children_count()
 
     def task_bg_color(self, node, default_color):
         if self.config.get('bg_color_enable'):
@@ -77,10 +71,7 @@ class TreeviewFactory():
         search_parent = self.req.get_tag(CoreConfig.SEARCH_TAG)
         for search_tag in search_parent.get_children():
             tag = self.req.get_tag(search_tag)
-            match = search_filter(
-                node,
-                parse_search_query(tag.get_attribute('query')),
-            )
+            match = compile_search_query(tag.get_attribute('query'))(node)
             if match and search_tag not in tags:
                 tags.append(tag)
 
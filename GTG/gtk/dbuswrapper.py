@@ -25,7 +25,6 @@ import dbus.service
 from GTG.core import CoreConfig
 from GTG.tools.dates import Date
 from GTG.core.search import InvalidQuery
-from GTG.core.search import parse_search_query
 
 BUSNAME = CoreConfig.BUSNAME
 BUSFACE = CoreConfig.BUSINTERFACE
@@ -152,12 +151,8 @@ class DBusTaskWrapper(dbus.service.Object):
         """
         Searches the task list
         """
-        tree = self.req.get_tasks_tree().get_basetree()
-        view = tree.get_viewtree()
         try:
-            search = parse_search_query(query)
-            view.apply_filter('search', parameters=search)
-            tasks = view.get_all_nodes()
+            tasks = self.req.search_tasks(query)
             if tasks:
                 return [self.GetTask(id) for id in tasks]
         except InvalidQuery:
@@ -196,13 +191,14 @@ class DBusTaskWrapper(dbus.service.Object):
         @return: A dictionary with the data of the newly created task
         """
         nt = self.req.new_task(tags=tags)
-        for sub in subtasks:
-            nt.add_child(sub)
-        nt.set_status(status, donedate=Date.parse(donedate))
-        nt.set_title(title)
-        nt.set_due_date(Date.parse(duedate))
-        nt.set_start_date(Date.parse(startdate))
-        nt.set_text(text)
+        with nt.batch():
+            for sub in subtasks:
+                nt.add_child(sub)
+            nt.set_status(status, donedate=Date.parse(donedate))
+            nt.set_title(title)
+            nt.set_due_date(Date.parse(duedate))
+            nt.set_start_date(Date.parse(startdate))
+            nt.set_text(text)
         return task_to_dict(nt)
 
     @dbus.service.method(BUSNAME)
@@ -216,17 +212,18 @@ class DBusTaskWrapper(dbus.service.Object):
         via this function.
         """
         task = self.req.get_task(tid)
-        task.set_status(task_data["status"],
-                        donedate=Date.parse(task_data["donedate"]))
-        task.set_title(task_data["title"])
-        task.set_due_date(Date.parse(task_data["duedate"]))
-        task.set_start_date(Date.parse(task_data["startdate"]))
-        task.set_text(task_data["text"])
-
-        for tag in task_data["tags"]:
-            task.add_tag(tag)
-        for sub in task_data["subtask"]:
-            task.add_child(sub)
+        with task.batch():
+            task.set_status(task_data["status"],
+                            donedate=Date.parse(task_data["donedate"]))
+            task.set_title(task_data["title"])
+            task.set_due_date(Date.parse(task_data["duedate"]))
+            task.set_start_date(Date.parse(task_data["startdate"]))
+            task.set_text(task_data["text"])
+
+            for tag in task_data["tags"]:
+                task.add_tag(tag)
+            for sub in task_data["subtask"]:
+                task.add_child(sub)
         return task_to_dict(task)
 
     @dbus.service.method(BUSNAME)
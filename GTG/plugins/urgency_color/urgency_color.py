@@ -150,36 +150,10 @@ class pluginUrgencyColor:
 
     def bgcolor(self, node, standard_color):
         color = self.get_node_bgcolor(node)
-
-        def __get_active_child_list(node):
-            """ This function recursively fetches a list
-            of all the children of a task which are active
-            (i.e - the subtasks which are not marked as 'Done' or 'Dismissed'
-            """
-            child_list = []
-            for child_id in node.children:
-                child = node.req.get_task(child_id)
-                child_list += __get_active_child_list(child)
-                if child.get_status() in [child.STA_ACTIVE]:
-                    child_list.append(child_id)
-            return child_list
-
-        child_list = __get_active_child_list(node)
-
-        daysleft = None
-        for child_id in child_list:
-            child = self.req.get_task(child_id)
-            if child.get_due_date() == Date.no_date():
-                continue
-
-            daysleft_of_child = child.get_due_date().days_left()
-            if daysleft is None:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
-            elif daysleft_of_child < daysleft:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
-
+        # The active subtask with the closest due date gives its color
+        child_id = node.get_most_urgent_subtask()
+        if child_id is not None:
+            color = self.get_node_bgcolor(self.req.get_task(child_id))
         return color
 
     def deactivate(self, plugin_api):
@@ -17,12 +17,18 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+import atexit
+import gc
 import os
+import threading
+import xml.dom.expatbuilder
 import xml.dom.minidom
 import shutil
 import sys
 import re
 import datetime
+import time
+from contextlib import contextmanager
 
 from GTG.tools.logger import Log
 
@@ -30,8 +36,19 @@ from GTG.tools.logger import Log
 tab = "\t"
 enter = "\n"
 BACKUP_NBR = 7
+# Backups are rotated at most once in this number of seconds
+BACKUP_INTERVAL = 300
+_last_backup = {}
 _USED_BACKUP = False
 _BACKUP_FILE_INFO = ""
+_WHITESPACES = tab + enter
+
+# Write-behind saving, see schedule_savexml()
+SAVE_INTERVAL = 1
+_pending_saves = {}
+_pending_lock = threading.Lock()
+_save_timer = None
+_save_stats = {"requested": 0, "written": 0}
 
 # Those two functions are there only to be able to read prettyXML
 # Source: http://yumenokaze.free.fr/?/Informatique/Snipplet/Python/cleandom
@@ -92,18 +109,134 @@ def readTextNode(node, title):
     return None
 
 
+class _CleanBuilder(xml.dom.expatbuilder.ExpatBuilderNS):
+    """ Build a document without the pretty XML whitespaces while parsing
+
+    The result is the same as cleanString(), parseString() and cleanDoc()
+    together, but the file is read only once: the "tab" and "enter"
+    characters around a text are stripped as the text is received, and
+    whitespace only texts never become nodes.
+
+    Expat may give a text in several parts. The trailing whitespaces of the
+    last part are kept aside with the text node they belong to, and put back
+    if another part of that node follows.
+
+    The handlers and the curNode and _cdata attributes are those of
+    ExpatBuilder, which are not documented: tests/tools/test_cleanxml.py
+    checks that they are still there. """
+
+    def reset(self):
+        xml.dom.expatbuilder.ExpatBuilderNS.reset(self)
+        # the last text node and its trailing whitespaces
+        self._text = None
+        self._tail = ""
+
+    def character_data_handler(self, data):
+        childNodes = self.curNode.childNodes
+        if childNodes and childNodes[-1] is self._text:
+            # Next part of the text
+            data = self._tail + data
+            value = data.rstrip(_WHITESPACES)
+            self._tail = data[len(value):]
+            self._text.data = self._text.data + value
+            return
+        data = data.lstrip(_WHITESPACES)
+        value = data.rstrip(_WHITESPACES)
+        if not value:
+            return
+        self._tail = data[len(value):]
+        self._text = self.document.createTextNode(value)
+        self.curNode.appendChild(self._text)
+
+    def character_data_handler_cdata(self, data):
+        if self._cdata:
+            # CDATA sections are kept as they are
+            xml.dom.expatbuilder.ExpatBuilderNS.character_data_handler_cdata(
+                self, data)
+        else:
+            self.character_data_handler(data)
+
+
+class _StreamBuilder(_CleanBuilder):
+    """ _CleanBuilder which takes the <stream> elements out of the document
+    as soon as they are complete, and adds them to the ready list """
+
+    def __init__(self, stream):
+        _CleanBuilder.__init__(self)
+        self.stream = stream
+        self.ready = []
+
+    def end_element_handler(self, name):
+        node = self.curNode
+        _CleanBuilder.end_element_handler(self, name)
+        if node.tagName == self.stream:
+            self.curNode.removeChild(node)
+            self.ready.append(node)
+            # The text after the node is not a part of the text before it
+            self._text = None
+
+
+@contextmanager
+def _gc_paused():
+    """ Pause the garbage collector while building a DOM
+
+    The nodes of a DOM refer to each other, so every node which is created
+    is followed by the collector. It is useless while the DOM is being
+    built, and it takes as long as building it. """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parsexmlfile(zefile):
+    """ Parse an XML file and return its document, without the pretty XML
+    whitespaces """
+    with open(zefile, "rb") as f, _gc_paused():
+        return _CleanBuilder().parseFile(f)
+
+
+def parsexmlstring(string):
+    """ Parse a string or bytes of XML and return its document, without the
+    pretty XML whitespaces """
+    with _gc_paused():
+        return _CleanBuilder().parseString(string)
+
+
 def _try_openxmlfile(zefile, root):
     """ Open an XML file and clean whitespaces in it """
-    f = open(zefile, "r")
-    stringed = f.read()
-    stringed = cleanString(stringed, tab, enter)
-    doc = xml.dom.minidom.parseString(stringed)
-    cleanDoc(doc, tab, enter)
+    doc = parsexmlfile(zefile)
     xmlproject = doc.getElementsByTagName(root)[0]
-    f.close()
     return doc, xmlproject
 
 
+def iterxmlfile(zefile, name):
+    """ Parse an XML file incrementally and yield its <name> elements
+
+    Each element is yielded as soon as it has been read, cleaned of the
+    pretty XML whitespaces. Only the elements being yielded are kept in
+    memory: the whole file is never loaded at once.
+
+    Errors are not handled here: IOError and ExpatError are raised to the
+    caller, which might have already received a part of the elements. Use
+    openxmlfile() to recover from backups. """
+    builder = _StreamBuilder(name)
+    parser = builder.getParser()
+    with open(zefile, "rb") as f:
+        while True:
+            data = f.read(64 * 1024)
+            with _gc_paused():
+                parser.Parse(data, not data)
+            ready, builder.ready = builder.ready, []
+            for node in ready:
+                yield node
+            if not data:
+                break
+
+
 def _get_backup_name(zefile):
     """ Get name of backups which are in backup/ directory """
     dirname, filename = os.path.split(zefile)
@@ -222,8 +355,9 @@ def savexml(zefile, doc, backup=False):
         f = open(zefile, mode='w+')
         pretty = doc.toprettyxml(tab, enter)
         if f and pretty:
-            bwritten = os.write(f.fileno(), bytes(pretty, 'utf8'))
-            if bwritten != len(pretty):
+            encoded = bytes(pretty, 'utf8')
+            bwritten = os.write(f.fileno(), encoded)
+            if bwritten != len(encoded):
                 print("error writing file %s" % zefile)
                 f.close()
                 return False
@@ -233,25 +367,7 @@ def savexml(zefile, doc, backup=False):
                 os.unlink(tmpfile)
 
             if backup:
-                # We will now backup the file
-                backup_nbr = BACKUP_NBR
-                # We keep BACKUP_NBR versions of the file
-                # The 0 is the youngest one
-                while backup_nbr > 0:
-                    older = "%s.bak.%s" % (backup_name, backup_nbr)
-                    backup_nbr -= 1
-                    newer = "%s.bak.%s" % (backup_name, backup_nbr)
-                    if os.path.exists(newer):
-                        shutil.move(newer, older)
-                # The bak.0 is always a fresh copy of the closed file
-                # So that it's not touched in case of bad opening next time
-                current = "%s.bak.0" % backup_name
-                shutil.copy(zefile, current)
-
-                daily_backup = "%s.%s.bak" % (
-                    backup_name, datetime.date.today().strftime("%Y-%m-%d"))
-                if not os.path.exists(daily_backup):
-                    shutil.copy(zefile, daily_backup)
+                backupxml(zefile)
             return True
         else:
             print("no file %s or no pretty xml" % zefile)
@@ -261,6 +377,129 @@ def savexml(zefile, doc, backup=False):
         return False
 
 
+def _link_or_copy(source, destination):
+    """ Make destination a hardlink to source, or a copy of it if the
+    filesystem doesn't support hardlinks.
+
+    savexml() always writes a new file instead of modifying the old one, so
+    the linked backup won't change afterwards. """
+    if os.path.exists(destination):
+        os.unlink(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy(source, destination)
+
+
+def backupxml(zefile, copy=False):
+    """ Backup zefile, which has just been saved
+
+    We keep BACKUP_NBR versions of the file, rotated at most once every
+    BACKUP_INTERVAL seconds, plus a backup for every day. Backups are
+    hardlinks to the saved file, so no data is copied, unless copy is True:
+    a file which is modified in place must be copied. """
+    backup_name = _get_backup_name(zefile)
+    if copy:
+        save_backup = shutil.copy
+    else:
+        save_backup = _link_or_copy
+    if not os.path.exists(os.path.dirname(backup_name)):
+        os.makedirs(os.path.dirname(backup_name))
+
+    now = time.time()
+    if now - _last_backup.get(zefile, 0) >= BACKUP_INTERVAL:
+        _last_backup[zefile] = now
+        # The 0 is the youngest one
+        backup_nbr = BACKUP_NBR
+        while backup_nbr > 0:
+            older = "%s.bak.%s" % (backup_name, backup_nbr)
+            backup_nbr -= 1
+            newer = "%s.bak.%s" % (backup_name, backup_nbr)
+            if os.path.exists(newer):
+                os.rename(newer, older)
+        # The bak.0 is always the last closed file
+        # So that it's not touched in case of bad opening next time
+        save_backup(zefile, "%s.bak.0" % backup_name)
+
+    daily_backup = "%s.%s.bak" % (
+        backup_name, datetime.date.today().strftime("%Y-%m-%d"))
+    if not os.path.exists(daily_backup):
+        save_backup(zefile, daily_backup)
+
+
+def schedule_savexml(zefile, doc, backup=False, lock=None,
+                     interval=SAVE_INTERVAL, on_saved=None):
+    """ Mark doc as dirty. It will be saved to zefile by a background writer
+
+    All the requests issued for the same file before the writer runs are
+    coalesced into a single write: a file is written at most once per
+    interval (in seconds). If any of them asked for a backup, the backup is
+    made.
+
+    @param lock: if given, it is held while doc is serialized, so that the
+                 caller can protect doc from concurrent modifications
+    @param on_saved: if given, it is called with zefile once the file has
+                     been written, while the lock is still held """
+    global _save_timer
+    with _pending_lock:
+        _save_stats["requested"] += 1
+        if zefile in _pending_saves:
+            backup = backup or _pending_saves[zefile][1]
+        _pending_saves[zefile] = (doc, backup, lock, on_saved)
+        if _save_timer is None:
+            _save_timer = threading.Timer(interval, flush_savexml)
+            _save_timer.daemon = True
+            _save_timer.start()
+
+
+def _write_pending(zefile, doc, backup, on_saved):
+    """ Write a document for the background writer """
+    if savexml(zefile, doc, backup=backup) and on_saved is not None:
+        on_saved(zefile)
+
+
+def flush_savexml(zefile=None):
+    """ Write now the documents waiting for the background writer
+
+    @param zefile: if given, only this file is written """
+    global _save_timer
+    with _pending_lock:
+        if zefile is None:
+            to_save = list(_pending_saves.items())
+            _pending_saves.clear()
+            if _save_timer is not None:
+                _save_timer.cancel()
+                _save_timer = None
+        elif zefile in _pending_saves:
+            to_save = [(zefile, _pending_saves.pop(zefile))]
+        else:
+            to_save = []
+
+    for path, (doc, backup, lock, on_saved) in to_save:
+        if lock is not None:
+            with lock:
+                _write_pending(path, doc, backup, on_saved)
+        else:
+            _write_pending(path, doc, backup, on_saved)
+        with _pending_lock:
+            _save_stats["written"] += 1
+
+
+def savexml_stats():
+    """ Return the counters of the background writer: how many saves were
+    requested, how many were actually written and how many were coalesced
+    into another write """
+    with _pending_lock:
+        stats = dict(_save_stats)
+        stats["coalesced"] = stats["requested"] - stats["written"] - \
+            len(_pending_saves)
+    return stats
+
+
+# Don't lose pending saves if GTG exits without flushing them
+atexit.register(flush_savexml)
+
+
 def used_backup():
     """ This function returns true if a call to openxml used saved backup file
     """
@@ -27,6 +27,8 @@ Date.parse() parses all possible representations of a date. """
 import calendar
 import datetime
 import locale
+import time
+from functools import lru_cache
 
 from GTG import _, ngettext
 
@@ -59,7 +61,8 @@ LOOKUP = {
     _('someday').lower(): SOMEDAY,
     '': NODATE,
 }
-# functions giving absolute dates for fuzzy dates + no date
+# absolute dates for fuzzy dates + no date, NOW and SOON are updated every
+# day by _today()
 FUNCS = {
     NOW: datetime.date.today(),
     SOON: datetime.date.today() + datetime.timedelta(15),
@@ -79,6 +82,55 @@ def convert_datetime_to_date(aday):
     return datetime.date(aday.year, aday.month, aday.day)
 
 
+# (start, end, today, Date of today, Date of tomorrow) of the current day,
+# start and end are timestamps
+_DAY = (0, 0, None, None, None)
+
+
+def _current_day():
+    """ Return the _DAY tuple of the current day, computing it again when
+    the day has changed """
+    global _DAY
+    now = time.time()
+    if not _DAY[0] <= now < _DAY[1]:
+        today = datetime.date.today()
+        tomorrow = today + datetime.timedelta(1)
+        start = time.mktime(today.timetuple())
+        end = time.mktime(tomorrow.timetuple())
+        FUNCS[NOW] = today
+        FUNCS[SOON] = today + datetime.timedelta(15)
+        _DAY = (start, end, today, Date(today), Date(tomorrow))
+    return _DAY
+
+
+def _today():
+    """ Return datetime.date.today(), computed once per day """
+    return _current_day()[2]
+
+
+@lru_cache(maxsize=4096)
+def _parse_string(value):
+    """ Return (real date, fuzzy date) of a string given to Date() """
+    # Fast path for ISO dates, the format of the task files
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return datetime.date(int(value[:4]), int(value[5:7]),
+                                 int(value[8:])), None
+        except ValueError:
+            pass
+    fuzzy = LOOKUP.get(value.lower())
+    if fuzzy is not None:
+        return None, fuzzy
+    # allow both locale format and ISO format
+    for fmt in locale_format, ISODATE:
+        try:
+            da_ti = datetime.datetime.strptime(value, fmt)
+            return convert_datetime_to_date(da_ti), None
+        except ValueError:
+            pass
+    raise ValueError("Unknown value for date: '%s'" % value)
+
+
 class Date(object):
     """A date class that supports fuzzy dates.
 
@@ -105,23 +157,8 @@ class Date(object):
             # Copy internal values from other Date object
             self._real_date = value._real_date
             self._fuzzy = value._fuzzy
-        elif isinstance(value, str) or isinstance(value, str):
-            try:
-                da_ti = datetime.datetime.strptime(value, locale_format).date()
-                self._real_date = convert_datetime_to_date(da_ti)
-            except ValueError:
-                try:
-                    # allow both locale format and ISO format
-                    da_ti = datetime.datetime.strptime(value, ISODATE).date()
-                    self._real_date = convert_datetime_to_date(da_ti)
-                except ValueError:
-                    # it must be a fuzzy date
-                    try:
-                        value = str(value.lower())
-                        self._parse_init_value(LOOKUP[value])
-                    except KeyError:
-                        raise ValueError("Unknown value for date: '%s'"
-                                         % value)
+        elif isinstance(value, str):
+            self._real_date, self._fuzzy = _parse_string(value)
         elif isinstance(value, int):
             self._fuzzy = value
         else:
@@ -129,7 +166,9 @@ class Date(object):
 
     def date(self):
         """ Map date into real date, i.e. convert fuzzy dates """
-        if self.is_fuzzy():
+        if self._fuzzy is not None:
+            if self._fuzzy in (NOW, SOON):
+                _current_day()
             return FUNCS[self._fuzzy]
         else:
             return self._real_date
@@ -153,16 +192,19 @@ class Date(object):
         else:
             return other - self.date()
 
+    def _key(self):
+        """ Key for comparing dates: fuzzy dates are kept below normal dates
+        of the same day """
+        if self._fuzzy is None:
+            return self._real_date, 0
+        return self.date(), 1
+
     def __lt__(self, other):
         """ Judge whehter less than other Date instance """
         if isinstance(other, Date):
-            # Keep fuzzy dates below normal dates
-            if self.date() == other.date():
-                if not self.is_fuzzy() and other.is_fuzzy():
-                    return True
-                else:
-                    return False
-            return self.date() < other.date()
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date < other._real_date
+            return self._key() < other._key()
         elif isinstance(other, datetime.date):
             return self.date() < other
         else:
@@ -171,13 +213,9 @@ class Date(object):
     def __le__(self, other):
         """ Judge whehter less than or equal to other Date instance """
         if isinstance(other, Date):
-            # Keep fuzzy dates below normal dates
-            if self.date() == other.date():
-                if self.is_fuzzy() and not other.is_fuzzy():
-                    return False
-                else:
-                    return True
-            return self.date() <= other.date()
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date <= other._real_date
+            return self._key() <= other._key()
         elif isinstance(other, datetime.date):
             return self.date() <= other
         else:
@@ -186,11 +224,10 @@ class Date(object):
     def __eq__(self, other):
         """ Judge whehter equal to other Date instance """
         if isinstance(other, Date):
-            # Handle fuzzy dates situations
-            if self.date() == other.date():
-                return self.is_fuzzy() == other.is_fuzzy()
-            else:
-                return False
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date == other._real_date
+            # a fuzzy date only equals the same fuzzy date
+            return self._fuzzy == other._fuzzy
         elif isinstance(other, datetime.date):
             return self.date() == other
         else:
@@ -199,11 +236,10 @@ class Date(object):
     def __ne__(self, other):
         """ Judge whehter not equal to other Date instance """
         if isinstance(other, Date):
-            # Handle fuzzy dates situations
-            if self.date() == other.date():
-                return self.is_fuzzy() != other.is_fuzzy()
-            else:
-                return True
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date != other._real_date
+            # a fuzzy date only equals the same fuzzy date
+            return self._fuzzy != other._fuzzy
         elif isinstance(other, datetime.date):
             return self.date() != other
         else:
@@ -212,13 +248,9 @@ class Date(object):
     def __gt__(self, other):
         """ Judge whehter greater than other Date instance """
         if isinstance(other, Date):
-            # Keep fuzzy dates below normal dates
-            if self.date() == other.date():
-                if self.is_fuzzy() and not other.is_fuzzy():
-                    return True
-                else:
-                    return False
-            return self.date() > other.date()
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date > other._real_date
+            return self._key() > other._key()
         elif isinstance(other, datetime.date):
             return self.date() > other
         else:
@@ -227,13 +259,9 @@ class Date(object):
     def __ge__(self, other):
         """ Judge whehter greater than or equal to other Date instance """
         if isinstance(other, Date):
-            # Keep fuzzy dates below normal dates
-            if self.date() == other.date():
-                if not self.is_fuzzy() and other.is_fuzzy():
-                    return False
-                else:
-                    return True
-            return self.date() >= other.date()
+            if self._fuzzy is None and other._fuzzy is None:
+                return self._real_date >= other._real_date
+            return self._key() >= other._key()
         elif isinstance(other, datetime.date):
             return self.date() >= other
         else:
@@ -277,17 +305,17 @@ class Date(object):
         if self._fuzzy == NODATE:
             return None
         else:
-            return (self.date() - datetime.date.today()).days
+            return (self.date() - _today()).days
 
     @classmethod
     def today(cls):
-        """ Return date for today """
-        return Date(datetime.date.today())
+        """ Return date for today. It is computed once per day. """
+        return _current_day()[3]
 
     @classmethod
     def tomorrow(cls):
-        """ Return date for tomorrow """
-        return Date(datetime.date.today() + datetime.timedelta(1))
+        """ Return date for tomorrow. It is computed once per day. """
+        return _current_day()[4]
 
     @classmethod
     def now(cls):
@@ -296,8 +324,9 @@ class Date(object):
 
     @classmethod
     def no_date(cls):
-        """ Return date representing no (set) date """
-        return Date(NODATE)
+        """ Return date representing no (set) date. Dates are never
+        modified, so it is always the same object. """
+        return _NO_DATE
 
     @classmethod
     def soon(cls):
@@ -319,7 +348,7 @@ class Date(object):
         except ValueError:
             return None
 
-        today = datetime.date.today()
+        today = _today()
         try:
             result = today.replace(day=mday)
         except ValueError:
@@ -344,7 +373,7 @@ class Date(object):
     def _parse_numerical_format(cls, string):
         """ Parse numerical formats like %Y/%m/%d, %Y%m%d or %m%d """
         result = None
-        today = datetime.date.today()
+        today = _today()
         for fmt in ['%Y/%m/%d', '%Y%m%d', '%m%d']:
             try:
                 da_ti = datetime.datetime.strptime(string, fmt)
@@ -365,7 +394,7 @@ class Date(object):
     @classmethod
     def _parse_text_representation(cls, string):
         """ Match common text representation for date """
-        today = datetime.date.today()
+        today = _today()
 
         # accepted date formats
         formats = {
@@ -416,7 +445,12 @@ class Date(object):
             string = ''
         else:
             string = string.lower()
+        # the result of relative dates changes every day
+        return _parse_cached(string, _today())
 
+    @classmethod
+    def _parse(cls, string):
+        """ Parse a lowercase string, see parse() """
         # try the default formats
         try:
             return Date(string)
@@ -458,7 +492,7 @@ class Date(object):
                 {'days': days_left}
         else:
             locale_format = locale.nl_langinfo(locale.D_FMT)
-            if calendar.isleap(datetime.date.today().year):
+            if calendar.isleap(_today().year):
                 year_len = 366
             else:
                 year_len = 365
@@ -467,3 +501,12 @@ class Date(object):
                 locale_format = locale_format.replace('/%Y', '')
                 locale_format = locale_format.replace('.%Y', '.')
             return self._real_date.strftime(locale_format)
+
+
+_NO_DATE = Date(NODATE)
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(string, today):
+    """ Date.parse() of string on the day today """
+    return Date._parse(string)
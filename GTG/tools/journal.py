@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+An append-only journal of task changes.
+
+Instead of rewriting the whole XML file on every change, a backend can append
+a small record describing the change to a sidecar file. On the next startup
+the records are replayed on top of the last XML snapshot. From time to time,
+the journal is folded into the snapshot (compaction) and truncated.
+
+Every record is a JSON object on its own line::
+
+    {"op": "set", "tid": "...", "data": "<task ...>...</task>"}
+    {"op": "remove", "tid": "..."}
+
+Records are idempotent: replaying a journal that has already been folded into
+the snapshot gives the same result. A truncated last line (for instance after
+a crash) is ignored.
+"""
+
+import json
+import os
+import threading
+
+from GTG.tools.logger import Log
+
+OP_SET = "set"
+OP_REMOVE = "remove"
+
+
+class Journal(object):
+    '''
+    Sidecar log of changes for a file-based store
+    '''
+
+    def __init__(self, path):
+        '''
+        @param path: the path of the journal file
+        '''
+        self.path = path
+        self._file = None
+        self._records = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        ''' Number of records appended since the last truncate() '''
+        return self._records
+
+    def append(self, op, tid, data=None):
+        '''
+        Appends a record to the journal. The cost of this operation depends
+        only on the size of the record.
+
+        @param op: OP_SET or OP_REMOVE
+        @param tid: the id of the task
+        @param data: the serialized task for OP_SET
+        '''
+        record = {"op": op, "tid": tid}
+        if data is not None:
+            record["data"] = data
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            self._records += 1
+
+    def replay(self):
+        '''
+        Yields the records stored in the journal, in order, as tuples
+        (op, tid, data). Damaged lines are skipped.
+        '''
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                    op, tid = record["op"], record["tid"]
+                except (ValueError, KeyError, TypeError):
+                    Log.warning("Skipping damaged record in %s" % self.path)
+                    continue
+                yield op, tid, record.get("data")
+
+    def truncate(self):
+        '''
+        Empties the journal. To be called once its content has been saved in
+        the snapshot.
+        '''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self._records = 0
+
+    def close(self):
+        ''' Closes the journal file, keeping its content '''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Texts which are read only when they are needed.
+
+Most task bodies are never displayed nor searched. A backend can give a task
+a LazyText instead of its content: the content is read on the first access.
+Only the MAX_RESIDENT most recently used texts are kept in memory, the other
+ones are read again when needed.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Number of texts kept in memory
+MAX_RESIDENT = 500
+
+_resident = OrderedDict()
+_resident_lock = threading.Lock()
+
+
+class LazyText(object):
+    '''
+    Reference to a text which is read by a function when it is needed
+    '''
+
+    __slots__ = ["_load"]
+
+    def __init__(self, load):
+        '''
+        @param load: a function without arguments returning the text
+        '''
+        self._load = load
+
+    def get(self):
+        ''' Return the text, reading it if it is not in memory '''
+        with _resident_lock:
+            text = _resident.get(self)
+            if text is not None:
+                _resident.move_to_end(self)
+                return text
+
+        text = self._load()
+        with _resident_lock:
+            _resident[self] = text
+            while len(_resident) > MAX_RESIDENT:
+                _resident.popitem(last=False)
+        return text
+
+    def peek(self):
+        ''' Return the text without keeping it in memory '''
+        with _resident_lock:
+            text = _resident.get(self)
+        if text is None:
+            text = self._load()
+        return text
+
+    def __str__(self):
+        return self.get()
+
+
+def resident_count():
+    ''' Return the number of texts currently in memory '''
+    with _resident_lock:
+        return len(_resident)
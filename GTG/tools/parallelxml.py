@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Parse a large XML task file on several cores.
+
+The file is split into byte ranges which start on a <task> element. Each
+range is parsed by a worker process into task records (see taskxml), which
+are sent back to the caller in the order of the file.
+
+Workers are started with the "spawn" method: forking GTG, which runs
+several threads, is not safe.
+"""
+
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from GTG.tools import cleanxml
+from GTG.tools.taskxml import record_from_xml
+
+# Text nodes and attribute values can't contain "<", so this is always the
+# beginning of a task element
+_TASK_START = re.compile(rb"<task[\s/>]")
+_PROJECT_END = b"</project>"
+
+
+def split_xml_file(zefile, count):
+    """ Split the tasks of zefile into at most count byte ranges
+
+    @return: a list of (start, end) offsets. Each range holds whole <task>
+             elements only. """
+    if os.path.getsize(zefile) == 0:
+        return []
+    with open(zefile, "rb") as xml_file, \
+            mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        first = _TASK_START.search(data)
+        end = data.rfind(_PROJECT_END)
+        if first is None or end < first.start():
+            return []
+        bounds = [first.start()]
+        for index in range(1, count):
+            position = first.start() + (end - first.start()) * index // count
+            match = _TASK_START.search(data, max(position, bounds[-1] + 1),
+                                       end)
+            if match is None:
+                break
+            bounds.append(match.start())
+        bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_xml_range(zefile, start, end):
+    """ Return the records of the tasks stored between start and end """
+    with open(zefile, "rb") as xml_file:
+        xml_file.seek(start)
+        data = xml_file.read(end - start)
+    doc = cleanxml.parsexmlstring(b"<project>" + data + b"</project>")
+    return [record_from_xml(node)
+            for node in doc.documentElement.childNodes
+            if node.nodeName == "task"]
+
+
+def parse_xml_file(zefile, workers):
+    """ Return the records of all the tasks of zefile, parsed by workers
+    processes
+
+    Errors are not handled here: ExpatError, IOError or an error of the
+    process pool are raised to the caller. """
+    ranges = split_xml_file(zefile, workers)
+    if len(ranges) <= 1:
+        return [record for start, end in ranges
+                for record in parse_xml_range(zefile, start, end)]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(ranges),
+                             mp_context=context) as executor:
+        chunks = executor.map(parse_xml_range, [zefile] * len(ranges),
+                              *zip(*ranges))
+        return [record for chunk in chunks for record in chunk]
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+A task file with one task per line.
+
+Every line is the record of a task (see taskxml), encoded as a compact JSON
+object. The file is never rewritten when a single task changes:
+  - a saved task is appended at the end of the file, then its previous line
+    is blanked, i.e. overwritten with spaces at its offset
+  - a removed task has its line blanked
+
+A line is never modified in place, so a crash can't damage a task which was
+already saved: at worst, the task is found twice and the last line wins.
+Blank and damaged lines are skipped when the file is read.
+
+Once blank lines take more room than the tasks, the file is compacted: the
+live lines are written to a new file, which replaces the old one.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from GTG.tools.logger import Log
+
+# Blank lines are not compacted away while they are smaller than this
+COMPACT_MIN_SIZE = 64 * 1024
+
+
+def encode_record(record):
+    """ Return the line of a record, as bytes """
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    return line.encode("utf-8") + b"\n"
+
+
+def decode_record(line):
+    """ Return the record of a line, or None if the line is damaged """
+    try:
+        record = json.loads(line.decode("utf-8"))
+        record["tid"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return record
+
+
+def write_records(path, records):
+    """ Write a whole task file, replacing path if it exists """
+    tmpfile = path + "__"
+    with open(tmpfile, "wb") as lines_file:
+        lines_file.writelines(encode_record(record) for record in records)
+    os.replace(tmpfile, path)
+
+
+def read_records(path):
+    """ Return the records of the tasks of a task file, without repairing
+    it like TaskLineFile.load() """
+    records = {}
+    with open(path, "rb") as lines_file:
+        for line in lines_file:
+            record = decode_record(line) if line.strip() else None
+            if record is not None:
+                records.pop(record["tid"], None)
+                records[record["tid"]] = record
+    return list(records.values())
+
+
+class TaskLineFile(object):
+    '''
+    Task file with one task per line, updated by appending lines
+    '''
+
+    def __init__(self, path):
+        '''
+        @param path: the path of the task file
+        '''
+        self.path = path
+        self._fd = None
+        # tid -> (offset, length, digest) of the live line of the task
+        self._index = {}
+        self._size = 0
+        # bytes taken by blank and damaged lines
+        self._dead = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def is_loaded(self):
+        ''' Return True once the file has been read by load() '''
+        return self._loaded
+
+    def _open(self):
+        ''' Return the descriptor of the file, opening it if needed '''
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _blank(self, offset, length):
+        ''' Overwrite a line with spaces, keeping its end of line '''
+        os.pwrite(self._open(), b" " * (length - 1), offset)
+        self._dead += length
+
+    def load(self):
+        '''
+        Read the file and return the records of its tasks, in the order of
+        the file. A missing file is an empty one.
+        '''
+        with self._lock:
+            self._index, self._size, self._dead = {}, 0, 0
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, "rb") as lines_file:
+                data = lines_file.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                # The last line was cut by a crash while it was appended:
+                # the previous line of its task has not been blanked yet
+                Log.warning("Dropping incomplete task in %s" % self.path)
+                os.truncate(self.path, end)
+                data = data[:end]
+            self._size = end
+
+            records = {}
+            superseded = []
+            offset = 0
+            for line in data.splitlines(True):
+                length = len(line)
+                record = decode_record(line) if line.strip() else None
+                if record is None:
+                    if line.strip():
+                        Log.warning("Skipping damaged task in %s" %
+                                    self.path)
+                    self._dead += length
+                else:
+                    tid = record["tid"]
+                    if tid in self._index:
+                        superseded.append(self._index[tid])
+                        del records[tid]
+                    self._index[tid] = (offset, length,
+                                        hashlib.sha1(line).digest())
+                    records[tid] = record
+                offset += length
+
+            # A task found twice because of a crash: the older line would
+            # come back if the task was removed
+            for old_offset, old_length, digest in superseded:
+                self._blank(old_offset, old_length)
+            return list(records.values())
+
+    def put(self, record):
+        '''
+        Save a task. Return True if it was written, False if the stored line
+        is the same.
+        '''
+        line = encode_record(record)
+        digest = hashlib.sha1(line).digest()
+        tid = record["tid"]
+        with self._lock:
+            old = self._index.get(tid)
+            if old is not None and old[2] == digest:
+                return False
+            os.pwrite(self._open(), line, self._size)
+            self._index[tid] = (self._size, len(line), digest)
+            self._size += len(line)
+            if old is not None:
+                self._blank(old[0], old[1])
+            return True
+
+    def remove(self, tid):
+        ''' Remove a task. Return True if it was stored. '''
+        with self._lock:
+            old = self._index.pop(tid, None)
+            if old is None:
+                return False
+            self._blank(old[0], old[1])
+            return True
+
+    def needs_compaction(self):
+        ''' Return True if blank lines take more room than the tasks '''
+        with self._lock:
+            return self._dead >= COMPACT_MIN_SIZE and \
+                self._dead > self._size - self._dead
+
+    def compact(self):
+        '''
+        Rewrite the file without its blank lines. The new file replaces the
+        old one, which is left untouched until then.
+        '''
+        with self._lock:
+            if not self._loaded:
+                return
+            fd = self._open()
+            tmpfile = self.path + "__"
+            index, offset = {}, 0
+            with open(tmpfile, "wb") as lines_file:
+                for tid, (old_offset, length, digest) in sorted(
+                        self._index.items(), key=lambda item: item[1][0]):
+                    lines_file.write(os.pread(fd, length, old_offset))
+                    index[tid] = (offset, length, digest)
+                    offset += length
+            os.replace(tmpfile, self.path)
+            self._close()
+            self._index, self._size, self._dead = index, offset, 0
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self):
+        ''' Close the file. It is opened again by the next change. '''
+        with self._lock:
+            self._close()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+A binary cache of an XML task file.
+
+Parsing a large XML file with minidom is slow. Whenever the XML file is
+saved, the records of its tasks (see taskxml) are pickled next to it. On the
+next startup they can be loaded instead of parsing the XML file.
+
+The snapshot stores the modification time, the size and a hash of the XML
+file it was made from. It is used only if they all match the current file,
+so a snapshot never hides a change made to the XML file by hand or by an
+older version of GTG.
+
+The contents of the tasks are stored after the pickled records, so that
+they can be read one by one when they are needed (see LazyText). The file
+is made of:
+  - the size of the pickled header, on 8 bytes
+  - the pickled header: version, signature of the XML file and records,
+    whose content is replaced by its (offset, length) in the bodies
+  - the bodies, encoded in UTF-8
+"""
+
+import hashlib
+import os
+import pickle
+import struct
+from functools import partial
+
+from GTG.tools.lazytext import LazyText
+from GTG.tools.logger import Log
+
+# Bump it whenever the format of the records changes
+SNAPSHOT_VERSION = 2
+
+_HEADER_SIZE = struct.Struct(">Q")
+
+
+def snapshot_path(xml_path):
+    """ Return the path of the snapshot of xml_path """
+    return xml_path + ".snapshot"
+
+
+def _file_signature(xml_path):
+    """ Return (mtime, size, hash) of a file """
+    stat = os.stat(xml_path)
+    digest = hashlib.sha1()
+    with open(xml_path, "rb") as xml_file:
+        for chunk in iter(lambda: xml_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return stat.st_mtime_ns, stat.st_size, digest.hexdigest()
+
+
+class _Bodies(object):
+    """ The bodies of a snapshot, read on demand
+
+    The file stays open, so that the bodies can still be read after the
+    snapshot has been replaced by a new one. """
+
+    def __init__(self, snapshot_file, base):
+        self._file = snapshot_file
+        self._base = base
+
+    def read(self, offset, length):
+        data = os.pread(self._file.fileno(), length, self._base + offset)
+        return data.decode("utf-8")
+
+    def __del__(self):
+        self._file.close()
+
+
+def write_snapshot(xml_path, records):
+    """ Write the snapshot of xml_path, which has just been saved
+
+    @param records: the records of the tasks stored in xml_path, in order
+    @return: True if the snapshot was written """
+    path = snapshot_path(xml_path)
+    tmpfile = path + "__"
+    try:
+        mtime, size, digest = _file_signature(xml_path)
+        stored, bodies, offset = [], [], 0
+        for record in records:
+            content = record["content"]
+            if content:
+                if isinstance(content, LazyText):
+                    content = content.peek()
+                body = content.encode("utf-8")
+                record = dict(record, content=(offset, len(body)))
+                bodies.append(body)
+                offset += len(body)
+            stored.append(record)
+        header = pickle.dumps((SNAPSHOT_VERSION, mtime, size, digest, stored),
+                              pickle.HIGHEST_PROTOCOL)
+        with open(tmpfile, "wb") as snapshot_file:
+            snapshot_file.write(_HEADER_SIZE.pack(len(header)))
+            snapshot_file.write(header)
+            snapshot_file.writelines(bodies)
+        os.replace(tmpfile, path)
+        return True
+    except (IOError, OSError, pickle.PicklingError) as msg:
+        Log.warning("Could not write snapshot %s: %s" % (path, msg))
+        return False
+
+
+def load_snapshot(xml_path, lazy=False):
+    """ Return the records stored in the snapshot of xml_path, or None if
+    there is no snapshot or it doesn't match the XML file
+
+    @param lazy: if True, the contents of the records are LazyText
+                 objects, read from the snapshot when needed """
+    path = snapshot_path(xml_path)
+    if not os.path.exists(path) or not os.path.exists(xml_path):
+        return None
+    snapshot_file = open(path, "rb")
+    try:
+        header_size, = _HEADER_SIZE.unpack(
+            snapshot_file.read(_HEADER_SIZE.size))
+        version, mtime, size, digest, records = pickle.loads(
+            snapshot_file.read(header_size))
+    except Exception as msg:
+        # A damaged pickle can raise almost anything
+        Log.warning("Ignoring damaged snapshot %s: %s" % (path, msg))
+        snapshot_file.close()
+        return None
+
+    stat = os.stat(xml_path)
+    if version != SNAPSHOT_VERSION or \
+            stat.st_mtime_ns != mtime or stat.st_size != size or \
+            _file_signature(xml_path)[2] != digest:
+        snapshot_file.close()
+        return None
+
+    if lazy:
+        bodies = _Bodies(snapshot_file, _HEADER_SIZE.size + header_size)
+        for record in records:
+            if record["content"]:
+                record["content"] = LazyText(
+                    partial(bodies.read, *record["content"]))
+    else:
+        with snapshot_file:
+            data = snapshot_file.read()
+        for record in records:
+            if record["content"]:
+                offset, length = record["content"]
+                record["content"] = data[offset:offset + length].decode(
+                    "utf-8")
+    return records
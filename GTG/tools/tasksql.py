@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Functions to store Task objects in a SQLite database and back.
+
+This is the SQLite counterpart of taskxml. A task is stored as one row of the
+"tasks" table; its tags, subtasks and attributes live in their own tables.
+Tasks travel between the database and GTG as plain records (see taskxml),
+so that they can be imported from an XML file without creating Task objects.
+"""
+
+import sqlite3
+
+from GTG.tools import cleanxml
+from GTG.tools.taskxml import record_from_xml
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS tasks (
+        tid TEXT PRIMARY KEY,
+        uuid TEXT,
+        status TEXT,
+        title TEXT,
+        due_date TEXT,
+        start_date TEXT,
+        closed_date TEXT,
+        modified TEXT,
+        content TEXT)""",
+    """CREATE TABLE IF NOT EXISTS task_tags (
+        tid TEXT,
+        tag TEXT,
+        PRIMARY KEY (tid, tag))""",
+    """CREATE TABLE IF NOT EXISTS subtasks (
+        tid TEXT,
+        position INTEGER,
+        child TEXT,
+        PRIMARY KEY (tid, position))""",
+    """CREATE TABLE IF NOT EXISTS attributes (
+        tid TEXT,
+        namespace TEXT,
+        key TEXT,
+        value TEXT,
+        PRIMARY KEY (tid, namespace, key))""",
+    "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)",
+    "CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date)",
+    "CREATE INDEX IF NOT EXISTS tasks_start_date ON tasks (start_date)",
+    "CREATE INDEX IF NOT EXISTS tasks_modified ON tasks (modified)",
+    "CREATE INDEX IF NOT EXISTS task_tags_tag ON task_tags (tag)",
+]
+
+
+def open_database(path):
+    """ Open (and create, if needed) a task database """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    return connection
+
+
+def save_record(connection, record):
+    """ Insert or replace a task. Call it inside a transaction. """
+    tid = record["tid"]
+    connection.execute(
+        "INSERT OR REPLACE INTO tasks (tid, uuid, status, title, due_date, "
+        "start_date, closed_date, modified, content) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (tid, record["uuid"], record["status"], record["title"],
+         record["due_date"], record["start_date"], record["closed_date"],
+         record["modified"], record["content"]))
+    for table in ["task_tags", "subtasks", "attributes"]:
+        connection.execute("DELETE FROM %s WHERE tid = ?" % table, (tid,))
+    connection.executemany(
+        "INSERT OR IGNORE INTO task_tags (tid, tag) VALUES (?, ?)",
+        [(tid, tag) for tag in record["tags"]])
+    connection.executemany(
+        "INSERT INTO subtasks (tid, position, child) VALUES (?, ?, ?)",
+        [(tid, position, child)
+         for position, child in enumerate(record["subtasks"])])
+    connection.executemany(
+        "INSERT OR REPLACE INTO attributes (tid, namespace, key, value) "
+        "VALUES (?, ?, ?, ?)",
+        [(tid, namespace, key, value)
+         for namespace, key, value in record["attributes"]])
+
+
+def remove_record(connection, tid):
+    """ Remove a task. Return True if it was stored.
+    Call it inside a transaction. """
+    cursor = connection.execute("DELETE FROM tasks WHERE tid = ?", (tid,))
+    for table in ["task_tags", "subtasks", "attributes"]:
+        connection.execute("DELETE FROM %s WHERE tid = ?" % table, (tid,))
+    return cursor.rowcount > 0
+
+
+def iter_records(connection):
+    """ Yield the records of all the stored tasks """
+    tags, subtasks, attributes = {}, {}, {}
+    for tid, tag in connection.execute("SELECT tid, tag FROM task_tags"):
+        tags.setdefault(tid, []).append(tag)
+    for tid, child in connection.execute(
+            "SELECT tid, child FROM subtasks ORDER BY tid, position"):
+        subtasks.setdefault(tid, []).append(child)
+    for tid, namespace, key, value in connection.execute(
+            "SELECT tid, namespace, key, value FROM attributes"):
+        attributes.setdefault(tid, []).append((namespace, key, value))
+
+    for row in connection.execute(
+            "SELECT tid, uuid, status, title, due_date, start_date, "
+            "closed_date, modified, content FROM tasks"):
+        tid = row[0]
+        yield {
+            "tid": tid,
+            "uuid": row[1],
+            "status": row[2],
+            "title": row[3],
+            "due_date": row[4],
+            "start_date": row[5],
+            "closed_date": row[6],
+            "modified": row[7],
+            "content": row[8],
+            "tags": tags.get(tid, []),
+            "subtasks": subtasks.get(tid, []),
+            "attributes": attributes.get(tid, []),
+        }
+
+
+def import_xml(connection, xml_path):
+    """ Copy all the tasks of an XML task file into the database, in a single
+    transaction. Return the number of imported tasks. """
+    count = 0
+    with connection:
+        for node in cleanxml.iterxmlfile(xml_path, "task"):
+            save_record(connection, record_from_xml(node))
+            count += 1
+    return count
@@ -17,13 +17,14 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
-# Functions to convert a Task object to an XML string and back
+# Functions to convert a Task object to an XML string or a record and back
+import functools
 import xml.dom.minidom as minidom
 import xml.sax.saxutils as saxutils
 from datetime import datetime
 
 from GTG.tools import cleanxml
-from GTG.tools.dates import Date
+from GTG.tools.lazytext import LazyText
 
 
 def get_text(node):
@@ -41,70 +42,44 @@ def read_node(xmlnode, name):
         return ""
 
 
-# Take an empty task, an XML node and return a Task.
-
-def task_from_xml(task, xmlnode):
-    # print "********************************"
-    # print xmlnode.toprettyxml()
-
-    task.set_uuid(xmlnode.getAttribute("uuid"))
-    task.set_title(read_node(xmlnode, "title"))
-
-    status = xmlnode.getAttribute("status")
-    donedate = Date.parse(read_node(xmlnode, "donedate"))
-    task.set_status(status, donedate=donedate)
-
-    duedate = Date(read_node(xmlnode, "duedate"))
-    task.set_due_date(duedate)
-
-    startdate = Date(read_node(xmlnode, "startdate"))
-    task.set_start_date(startdate)
-
-    modified = read_node(xmlnode, "modified")
-    if modified != "":
-        modified = datetime.strptime(modified, "%Y-%m-%dT%H:%M:%S")
-        task.set_modified(modified)
-
-    tags = xmlnode.getAttribute("tags").replace(' ', '')
-    tags = (tag for tag in tags.split(',') if tag.strip() != "")
-    for tag in tags:
-        # FIXME why unescape????
-        task.tag_added(saxutils.unescape(tag))
-
-    # FIXME why we need to convert that through an XML?
+def read_content(xmlnode):
     content = read_node(xmlnode, "content")
     if content != "":
+        # FIXME why we need to convert that through an XML?
         content = "<content>%s</content>" % content
         content = minidom.parseString(content).firstChild.toxml()
-        task.set_text(content)
+    return content
 
-    for subtask in xmlnode.getElementsByTagName("subtask"):
-        task.add_child(get_text(subtask))
 
-    for attr in xmlnode.getElementsByTagName("attribute"):
-        if len(attr.childNodes) > 0:
-            value = get_text(attr)
-        else:
-            value = ""
-        key = attr.getAttribute("key")
-        namespace = attr.getAttribute("namespace")
-        task.set_attribute(key, value, namespace=namespace)
+def lazy_content(xmlnode):
+    """ Return a LazyText reading the content of xmlnode, or "" if there is
+    no content """
+    if read_node(xmlnode, "content") == "":
+        return ""
+    return LazyText(lambda: read_content(xmlnode))
+
+
+# Take an empty task, an XML node and return a Task.
+# If lazy is True, the content is read from the node only when the task needs
+# it.
 
+def task_from_xml(task, xmlnode, lazy=False):
     # FIXME do we need remote task ids? I don't think so
     # FIXME if so => rework them into a more usable structure!!!
     #                (like attributes)
-    # REMOTE TASK IDS
-    '''
-    remote_ids_list = xmlnode.getElementsByTagName("task-remote-ids")
-    for remote_id in remote_ids_list:
-        if remote_id.childNodes:
-            node = remote_id.childNodes[0]
-            backend_id = node.firstChild.nodeValue
-            remote_task_id = node.childNodes[1].firstChild.nodeValue
-            task.add_remote_id(backend_id, remote_task_id)
-            '''
+    return task_from_record(task, record_from_xml(xmlnode, lazy=lazy))
+
+
+# The content of a task is parsed again when it is saved. Most of the saves
+# don't change the content, so the last results are kept.
+@functools.lru_cache(maxsize=128)
+def content_description(tex):
+    # We take the xml text and convert it to a string
+    # but without the "<content />"
+    element = minidom.parseString(tex)
+    temp = element.firstChild.toxml().partition("<content>")[2]
+    return temp.partition("</content>")[0]
 
-    return task
 
 # FIXME maybe pretty XML should be enough for this...
 # Task as parameter the doc where to put the XML node
@@ -139,12 +114,7 @@ def task_to_xml(doc, task):
         t_xml.appendChild(element)
     tex = task.get_text()
     if tex:
-        # We take the xml text and convert it to a string
-        # but without the "<content />"
-        element = minidom.parseString(tex)
-        temp = element.firstChild.toxml().partition("<content>")[2]
-
-        desc = temp.partition("</content>")[0]
+        desc = content_description(tex)
         # t_xml.appendChild(element.firstChild)
         cleanxml.addTextNode(doc, t_xml, "content", desc)
     # self.__write_textnode(doc,t_xml,"content",t.get_text())
@@ -162,3 +132,112 @@ def task_to_xml(doc, task):
         task_element.appendChild(doc.createTextNode(task_id))
 
     return t_xml
+
+
+# A record is the plain representation of a task: a dictionary of strings
+# and lists, which can be stored without minidom (see tasksql and
+# tasksnapshot) and turned into a Task by task_from_record(). The content
+# of a record can be a LazyText.
+
+def record_from_task(task):
+    """ Return the record of a Task object """
+    return {
+        "tid": task.get_id(),
+        "uuid": task.get_uuid(),
+        "status": task.get_status(),
+        "title": task.get_title(),
+        "due_date": task.get_due_date().xml_str(),
+        "start_date": task.get_start_date().xml_str(),
+        "closed_date": task.get_closed_date().xml_str(),
+        "modified": task.get_modified_string(),
+        "content": task.get_text(),
+        "tags": [str(tag) for tag in task.get_tags_name()],
+        "subtasks": task.get_children(),
+        "attributes": [(namespace, key, value) for (namespace, key), value
+                       in task.attributes.items()],
+    }
+
+
+def record_from_xml(xmlnode, lazy=False):
+    """ Return the record of a <task> node, as written by taskxml
+
+    If lazy is True, the content is a LazyText reading the node """
+    tags = xmlnode.getAttribute("tags").replace(' ', '')
+    tags = [saxutils.unescape(tag) for tag in tags.split(',')
+            if tag.strip() != ""]
+
+    if lazy:
+        content = lazy_content(xmlnode)
+    else:
+        content = read_content(xmlnode)
+
+    attributes = []
+    for attr in xmlnode.getElementsByTagName("attribute"):
+        attributes.append((attr.getAttribute("namespace"),
+                           attr.getAttribute("key"), get_text(attr)))
+
+    return {
+        "tid": xmlnode.getAttribute("id"),
+        "uuid": xmlnode.getAttribute("uuid"),
+        "status": xmlnode.getAttribute("status"),
+        "title": read_node(xmlnode, "title"),
+        "due_date": read_node(xmlnode, "duedate"),
+        "start_date": read_node(xmlnode, "startdate"),
+        "closed_date": read_node(xmlnode, "donedate"),
+        "modified": read_node(xmlnode, "modified"),
+        "content": content,
+        "tags": tags,
+        "subtasks": [get_text(subtask) for subtask
+                     in xmlnode.getElementsByTagName("subtask")],
+        "attributes": attributes,
+    }
+
+
+def task_from_record(task, record):
+    """ Fill an empty task with a record and return it """
+    if record["modified"]:
+        modified = datetime.strptime(record["modified"], "%Y-%m-%dT%H:%M:%S")
+    else:
+        modified = None
+    task.fill(uuid=record["uuid"],
+              title=record["title"],
+              status=record["status"],
+              due_date=record["due_date"],
+              start_date=record["start_date"],
+              closed_date=record["closed_date"],
+              modified=modified,
+              tags=record["tags"],
+              content=record["content"],
+              children=record["subtasks"],
+              attributes=record["attributes"])
+    return task
+
+
+def record_to_xml(doc, record):
+    """ Return the <task> node of a record, as task_to_xml() would write it
+    for the task """
+    t_xml = doc.createElement("task")
+    t_xml.setAttribute("id", record["tid"])
+    t_xml.setAttribute("status", record["status"])
+    t_xml.setAttribute("uuid", record["uuid"])
+    t_xml.setAttribute("tags", ",".join(saxutils.escape(tag)
+                                        for tag in record["tags"]))
+    cleanxml.addTextNode(doc, t_xml, "title", record["title"])
+    cleanxml.addTextNode(doc, t_xml, "duedate", record["due_date"])
+    cleanxml.addTextNode(doc, t_xml, "modified", record["modified"])
+    cleanxml.addTextNode(doc, t_xml, "startdate", record["start_date"])
+    cleanxml.addTextNode(doc, t_xml, "donedate", record["closed_date"])
+    for child in record["subtasks"]:
+        cleanxml.addTextNode(doc, t_xml, "subtask", child)
+    for namespace, key, value in record["attributes"]:
+        element = doc.createElement('attribute')
+        element.setAttribute("namespace", namespace)
+        element.setAttribute("key", key)
+        element.appendChild(doc.createTextNode(value))
+        t_xml.appendChild(element)
+    content = str(record["content"])
+    if content:
+        cleanxml.addTextNode(doc, t_xml, "content",
+                             content_description(content))
+    t_xml.appendChild(doc.createElement("task-remote-ids"))
+    return t_xml
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Helpers shared by the GTG benchmarks.
+
+The benchmarks are meant to be run from a source checkout, e.g.::
+
+    python3 scripts/benchmarks/localfile_save.py 10000
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..'))
+
+from GTG.tools.dates import Date
+
+
+@contextmanager
+def timed(label, results=None):
+    """ Print the time spent in the with-block
+
+    If results is a dictionary, the elapsed time is stored there under
+    label as well. """
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if results is not None:
+        results[label] = elapsed
+    print("%-40s %10.3f s" % (label, elapsed))
+
+
+class FakeTask(object):
+    """ The part of the Task interface used when serializing a task """
+
+    def __init__(self, tid, title="", text="", tags=None, children=None):
+        self.tid = tid
+        self.uuid = str(uuid.uuid4())
+        self.title = title
+        self.text = text
+        self.tags = tags or []
+        self.children = children or []
+        self.attributes = {}
+        self.modified = datetime.now()
+        # to be increased whenever a field is changed
+        self.version = 0
+
+    def get_id(self):
+        return self.tid
+
+    def get_version(self):
+        return self.version
+
+    def get_status(self):
+        return "Active"
+
+    def get_uuid(self):
+        return self.uuid
+
+    def get_tags_name(self):
+        return list(self.tags)
+
+    def get_title(self):
+        return self.title
+
+    def get_due_date(self):
+        return Date.no_date()
+
+    def get_start_date(self):
+        return Date.no_date()
+
+    def get_closed_date(self):
+        return Date.no_date()
+
+    def get_modified_string(self):
+        return self.modified.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def get_children(self):
+        return list(self.children)
+
+    def get_text(self):
+        return self.text
+
+    def get_remote_ids(self):
+        return {}
+
+
+class LoadedTask(object):
+    """ The part of the Task interface used when loading a task """
+
+    def __init__(self, tid):
+        self.tid = tid
+
+    def fill(self, uuid, title, status, due_date, start_date, closed_date,
+             modified, tags, content, children, attributes):
+        self.uuid = uuid
+        self.title = title
+        self.status = status
+        self.due_date = due_date
+        self.start_date = start_date
+        self.closed_date = closed_date
+        self.modified = modified
+        self.tags = list(tags)
+        self.text = content
+        self.children = list(children)
+        self.attributes = dict(((namespace, key), value)
+                               for namespace, key, value in attributes)
+
+
+class FakeDatastore(object):
+    """ The part of the DataStore interface used by the backends to push
+    the tasks they have loaded """
+
+    def __init__(self):
+        self.tasks = []
+
+    def task_factory(self, tid, newtask=False):
+        return LoadedTask(tid)
+
+    def push_task(self, task):
+        self.tasks.append(task)
+
+
+class FakeRequester(object):
+    """ The part of the Requester used by real Task objects which are not in
+    a datastore """
+
+    def get_main_view(self):
+        return None
+
+    def get_task(self, tid):
+        return None
+
+
+def task_xml(index, body_words=10):
+    """ Return the XML of a synthetic task, as written by the localfile
+    backend """
+    tags = "@tag%d" % (index % 50)
+    body = " ".join("word%d" % ((index + i) % 1000) for i in range(body_words))
+    return ('\t<task id="%(tid)s" status="Active" tags="%(tags)s" '
+            'uuid="%(uuid)s">\n'
+            '\t\t<title>\n\t\t\tTask number %(index)d\n\t\t</title>\n'
+            '\t\t<duedate>\n\t\t\t2014-%(month)02d-%(day)02d\n\t\t</duedate>\n'
+            '\t\t<modified>\n\t\t\t2014-01-01T10:00:00\n\t\t</modified>\n'
+            '\t\t<content>\n\t\t\t&lt;tag&gt;%(tags)s&lt;/tag&gt;\n\n'
+            '%(body)s\n\t\t</content>\n'
+            '\t\t<task-remote-ids/>\n'
+            '\t</task>\n') % {
+                'tid': "task-%d" % index,
+                'uuid': uuid.uuid4(),
+                'tags': tags,
+                'index': index,
+                'month': index % 12 + 1,
+                'day': index % 28 + 1,
+                'body': body,
+            }
+
+
+def generate_task_file(path, count, body_words=10):
+    """ Write a synthetic gtg_tasks.xml file with count tasks """
+    with open(path, "w") as task_file:
+        task_file.write('<?xml version="1.0" ?>\n<project>\n')
+        for index in range(count):
+            task_file.write(task_xml(index, body_words))
+        task_file.write('</project>\n')
+
+
+def scale_task_file(source, path, count):
+    """ Write a task file with count tasks, made of copies of the tasks of
+    the task file source. The ids of the copies are made unique. """
+    with open(source, encoding="utf-8") as source_file:
+        text = source_file.read()
+    start = re.search(r"<task[\s/>]", text).start()
+    end = text.rfind("</project>")
+    tasks = re.findall(r"<task[\s/>].*?</task>\s*", text[start:end], re.S)
+
+    def rename(match, copy):
+        return "%s%s-%d" % (match.group(1), match.group(2), copy)
+
+    with open(path, "w", encoding="utf-8") as task_file:
+        task_file.write(text[:start])
+        for index in range(count):
+            copy, task = divmod(index, len(tasks))
+            task_file.write(re.sub(r'(\sid="|<subtask>\s*)([^"<\s]+)',
+                                   lambda match: rename(match, copy),
+                                   tasks[task]))
+        task_file.write(text[end:])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the date constraints between tasks and their subtasks.
+
+It changes the due date of a task in:
+  - a chain of 50 tasks, whose leaf postpones all its ancestors
+  - a task with N subtasks (10000 by default), which are all moved earlier
+  - a project of N tasks made of chains of 50 levels, with 4 subtasks per
+    level, whose root is moved earlier
+and reports the time and the number of times the tasks were synced.
+"""
+
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.task import Task
+from GTG.tools.dates import Date
+from liblarch import Tree
+
+
+class TreeRequester(FakeRequester):
+
+    def __init__(self):
+        self.tree = Tree()
+        self.syncs = 0
+
+    def get_task(self, tid):
+        return self.tree.get_node(tid)
+
+    def has_task(self, tid):
+        return self.tree.has_node(tid)
+
+
+class CountedTask(Task):
+
+    def sync(self):
+        self.req.syncs += 1
+        Task.sync(self)
+
+
+def make_tasks(count, parent_of):
+    """ Return count tasks due on 2014-05-01, task i being a subtask of
+    parent_of(i) """
+    requester = TreeRequester()
+    tasks = []
+    for index in range(count):
+        task = CountedTask("task-%d" % index, requester)
+        task.due_date = Date("2014-05-01")
+        task.start_date = Date("2014-04-01")
+        requester.tree.add_node(task)
+        task.set_loaded()
+        parent = parent_of(index)
+        if parent is not None:
+            tasks[parent].add_child(task.get_id())
+        tasks.append(task)
+    requester.syncs = 0
+    return tasks
+
+
+def project_parent(index):
+    offset = index % 200
+    if offset:
+        return index - offset + (offset - 1) // 4 * 4
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cases = [
+        ("chain of 50, leaf postponed",
+         make_tasks(50, lambda index: index - 1 if index else None), -1,
+         "2014-06-01"),
+        ("%d subtasks, parent moved earlier" % count,
+         make_tasks(count + 1, lambda index: 0 if index else None), 0,
+         "2014-03-01"),
+        ("project of %d, roots moved earlier" % count,
+         make_tasks(count, project_parent), None, "2014-03-01"),
+    ]
+    for label, tasks, changed, date in cases:
+        if changed is None:
+            changed_tasks = tasks[::200]
+        else:
+            changed_tasks = [tasks[changed]]
+        with timed(label):
+            for task in changed_tasks:
+                task.set_due_date(Date(date))
+        print("%-40s %10d" % ("syncs", tasks[0].req.syncs))
+
+
+if __name__ == '__main__':
+    main()
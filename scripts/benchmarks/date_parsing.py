@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of Date: construction from the strings of the task files, parsing
+of the strings typed by the user, today() and sorting a mix of fuzzy and
+real dates.
+"""
+
+import random
+import sys
+from datetime import date, timedelta
+
+from benchutils import timed
+
+from GTG.tools.dates import Date
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    random.seed(0)
+    days = [(date(2010, 1, 1) + timedelta(day)).isoformat()
+            for day in range(2000)]
+    stored = [random.choice(days + ["", "", "someday", "now"])
+              for index in range(count)]
+    typed = ["tomorrow", "next week", "friday", "0315", "2014/05/01", "soon"]
+    typed = [random.choice(typed) for index in range(count)]
+
+    with timed("Date() of %d stored dates" % count):
+        dates = [Date(value) for value in stored]
+    with timed("Date.parse() of %d typed dates" % count):
+        for value in typed:
+            Date.parse(value)
+    with timed("%d calls to Date.today()" % count):
+        for index in range(count):
+            Date.today()
+    with timed("sorting %d dates" % count):
+        sorted(dates)
+
+
+if __name__ == '__main__':
+    main()
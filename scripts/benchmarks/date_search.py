@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the date indexes: Q date queries (200 by default) are searched
+over N tasks (20000 by default) after a change of the datastore, so that
+every query is computed, first by checking every task, then by checking the
+candidates given by the date index.
+"""
+
+import datetime
+import random
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.dateindex import DateIndex
+from GTG.core.search import SearchCache, parse_search_query
+from GTG.core.task import Task
+from GTG.tools.dates import Date
+
+QUERIES = ["!today", "!tomorrow", "!nodate @tag%d", "!soon", "!someday",
+           "!before %s", "!after %s @tag%d", "!today !or !tomorrow"]
+
+
+def make_tasks(count):
+    requester = FakeRequester()
+    today = datetime.date.today()
+    tasks = {}
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_title("Task number %d" % index)
+        task.tag_added("@tag%d" % (index % 50))
+        if index % 10 == 0:
+            task.due_date = random.choice([Date.now(), Date.soon(),
+                                           Date.someday()])
+        elif index % 10 < 8:
+            task.due_date = Date(today + datetime.timedelta(
+                days=random.randint(-365, 365)))
+        tasks[task.get_id()] = task
+    return tasks
+
+
+def make_queries(count):
+    today = datetime.date.today()
+    queries = []
+    for index in range(count):
+        query = random.choice(QUERIES)
+        day = today + datetime.timedelta(days=random.randint(-400, 400))
+        if query.startswith("!before"):
+            query = query % day.isoformat()
+        elif query.startswith("!after"):
+            query = query % (day.isoformat(), random.randrange(50))
+        elif "%" in query:
+            query = query % random.randrange(50)
+        queries.append(parse_search_query(query)['q'])
+    return queries
+
+
+def main():
+    query_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    random.seed(0)
+    tasks = make_tasks(count)
+    queries = make_queries(query_count)
+
+    index = DateIndex(tasks.get)
+    with timed("indexing %d tasks" % count):
+        for tid in tasks:
+            index.task_changed(tid)
+        index.refresh()
+
+    results = {}
+    for label, dates in [("without index", None), ("with index", index)]:
+        generation = [0]
+        cache = SearchCache(lambda: list(tasks.values()),
+                            lambda: generation[0], dates=dates)
+        matches = 0
+        with timed("%d queries, %s" % (query_count, label), results):
+            for commands in queries:
+                generation[0] += 1
+                matches += len(cache.search(commands))
+        print("%-40s %10d" % ("matches", matches))
+    print("speedup: %.1fx" % (
+        results["%d queries, without index" % query_count] /
+        results["%d queries, with index" % query_count]))
+
+
+if __name__ == '__main__':
+    main()
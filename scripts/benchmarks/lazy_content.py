@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the memory used by the contents of the tasks.
+
+It generates a task file with N tasks (5000 by default) with long notes,
+writes its snapshot and loads the snapshot with and without lazy contents.
+It reports the memory held by the loaded records, and the time needed to
+load them.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from benchutils import generate_task_file, timed
+
+from GTG.tools import cleanxml, tasksnapshot
+from GTG.tools.taskxml import record_from_xml
+
+
+def loaded_size(path, lazy):
+    """ Return the memory allocated by loading the snapshot of path """
+    tracemalloc.start()
+    with timed("load snapshot, lazy=%s" % lazy):
+        records = tasksnapshot.load_snapshot(path, lazy=lazy)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert records is not None
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "gtg_tasks.xml")
+        generate_task_file(path, count, body_words=300)
+        records = [record_from_xml(node)
+                   for node in cleanxml.iterxmlfile(path, "task")]
+        tasksnapshot.write_snapshot(path, records)
+        del records
+
+        eager = loaded_size(path, False)
+        lazy = loaded_size(path, True)
+        print("resident records, eager contents %10.1f MB" % (eager / 1e6))
+        print("resident records, lazy contents  %10.1f MB" % (lazy / 1e6))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the localfile backend when saving many tasks.
+
+It saves N tasks (10000 by default) into an empty store, modifies them all
+and saves them again, as flush_all_tasks() would do. The backend runs in
+journal mode so that the numbers reflect the work done on the XML object
+rather than the full file rewrites.
+
+For comparison, it also reports the cost of finding every task node by
+walking the <project> children, as set_task() and remove_task() used to do.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from benchutils import FakeTask, timed
+
+from GTG.backends.backend_localfile import Backend, TASK_NODE
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        backend = Backend({
+            "path": os.path.join(tmpdir, "gtg_tasks.xml"),
+            "pid": "benchmark",
+            "journal": True,
+        })
+        tasks = [FakeTask("task-%d" % i, "Task %d" % i) for i in range(count)]
+
+        with timed("set_task, %d new tasks" % count):
+            for task in tasks:
+                backend.set_task(task)
+
+        for task in tasks:
+            task.title += " (modified)"
+            task.version += 1
+        with timed("set_task, %d modified tasks" % count):
+            for task in tasks:
+                backend.set_task(task)
+
+        with timed("set_task, %d unchanged tasks" % count):
+            for task in tasks:
+                backend.set_task(task)
+
+        with timed("linear lookup of %d tasks" % count):
+            for task in tasks:
+                tid = task.get_id()
+                for node in backend.xmlproj.childNodes:
+                    if node.nodeName == TASK_NODE and \
+                            node.getAttribute("id") == tid:
+                        break
+
+        backend.save_state()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
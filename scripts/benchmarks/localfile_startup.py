@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the localfile backend at startup.
+
+It generates a task file with N tasks (10000 by default) and loads it twice
+with a fresh backend, as GTG does when it starts: first from the XML file,
+then from the snapshot written when the XML file was saved.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from benchutils import FakeDatastore, generate_task_file, timed
+
+from GTG.backends.backend_localfile import Backend
+from GTG.tools import tasksnapshot
+
+
+def cold_start(path):
+    """ Load all the tasks of path with a new backend """
+    backend = Backend({"path": path, "pid": "benchmark"})
+    backend.register_datastore(FakeDatastore())
+    backend.start_get_tasks()
+    backend.save_state()
+    return len(backend.datastore.tasks)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "gtg_tasks.xml")
+        generate_task_file(path, count)
+        results = {}
+
+        # The first load writes the snapshot
+        with timed("startup from XML, %d tasks" % count, results):
+            cold_start(path)
+        assert os.path.exists(tasksnapshot.snapshot_path(path))
+
+        with timed("startup from snapshot, %d tasks" % count, results):
+            loaded = cold_start(path)
+        assert loaded == count
+
+        print("speedup: %.1fx" % (results["startup from XML, %d tasks" % count]
+                                  / results["startup from snapshot, %d tasks"
+                                            % count]))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the parallel parsing of a large task file.
+
+It generates a task file with N tasks (100000 by default) and turns it into
+task records, first with the incremental reader used by the localfile
+backend, then with parallelxml and an increasing number of workers.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from benchutils import generate_task_file, timed
+
+from GTG.tools import cleanxml, parallelxml
+from GTG.tools.taskxml import record_from_xml
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "gtg_tasks.xml")
+        generate_task_file(path, count)
+        print("%d tasks, %.1f MB, %d CPUs" % (
+            count, os.path.getsize(path) / 1e6, os.cpu_count()))
+
+        with timed("incremental reader"):
+            expected = [record_from_xml(node)
+                        for node in cleanxml.iterxmlfile(path, "task")]
+
+        workers = 1
+        while workers <= max(os.cpu_count(), 2):
+            with timed("parallelxml, %d workers" % workers):
+                records = parallelxml.parse_xml_file(path, workers)
+            assert records == expected
+            workers *= 2
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the search results cache: S saved searches (10 by default) are
+selected in turn R times (200 by default) over N tasks (20000 by default).
+Every selection makes liblarch check every task against the query, and one
+task is modified between two selections. The same queries are then asked
+again and again, as D-Bus clients do, on an unchanged datastore.
+"""
+
+import random
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.search import SearchCache, parse_search_query, search_filter
+from GTG.core.task import Task
+
+QUERIES = ["@tag%d", "word%d", "@tag%d !or word1", "!not @tag%d word2",
+           "!notag word%d"]
+
+
+def make_tasks(count):
+    requester = FakeRequester()
+    tasks = []
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_title("Task number %d" % index)
+        words = " ".join("word%d" % ((index + i) % 1000) for i in range(30))
+        task.set_text("<content>%s</content>" % words)
+        if index % 7:
+            task.tag_added("@tag%d" % (index % 50))
+        tasks.append(task)
+    return tasks
+
+
+def main():
+    search_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    random.seed(0)
+    tasks = make_tasks(count)
+    queries = [random.choice(QUERIES) % random.randint(1, 49)
+               for i in range(search_count)]
+    selections = [random.randrange(search_count) for i in range(rounds)]
+
+    # the datastore bumps its generation from the liblarch signals
+    generation = [0]
+    cache = SearchCache(lambda: tasks, lambda: generation[0])
+
+    results = {}
+    for label, extra in [("without cache", {}),
+                         ("with cache", {'cache': cache})]:
+        searches = [dict(parse_search_query(query), **extra)
+                    for query in queries]
+        matches = 0
+        with timed("%d selections, %s" % (rounds, label), results):
+            for number, selection in enumerate(selections):
+                parameters = searches[selection]
+                for task in tasks:
+                    if search_filter(task, parameters):
+                        matches += 1
+                task = tasks[number % count]
+                task.set_title("Task number %d, changed" % number)
+                generation[0] += 1
+                search_filter(task, parameters)
+        print("%-40s %10d" % ("matches", matches))
+    print("speedup: %.1fx" % (
+        results["%d selections, without cache" % rounds] /
+        results["%d selections, with cache" % rounds]))
+
+    commands = [parse_search_query(query)['q'] for query in queries]
+    with timed("%d first searches" % search_count):
+        for command in commands:
+            cache.search(command)
+    with timed("%d searches on an unchanged datastore" % (rounds * 100)):
+        for number in range(rounds * 100):
+            cache.search(commands[number % search_count])
+    stats = cache.get_stats().values()
+    print("%-40s %10d" % ("hits", sum(hits for hits, misses in stats)))
+    print("%-40s %10d" % ("misses", sum(misses for hits, misses in stats)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the search plans: Q queries (200 by default) written with the
+words first are checked against N tasks (20000 by default), in the order of
+the query, then in the order of the plan. The plan of the first query is
+explained.
+"""
+
+import datetime
+import random
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.dateindex import DateIndex
+from GTG.core.search import CompiledQuery, parse_search_query
+from GTG.core.task import Task
+from GTG.core.wordindex import WordIndex
+from GTG.tools.dates import Date
+
+QUERIES = ["word%d @tag%d", "word%d @tag%d !before %s",
+           "\"word%d word\" !today", "word%d !not @tag%d",
+           "word%d @tag%d !or @tag%d"]
+
+
+class UnplannedQuery(CompiledQuery):
+    """ What CompiledQuery did before plans: commands are checked in the
+    order of the query """
+
+    def _make_plan(self):
+        self._plan = []
+
+
+def make_tasks(count):
+    requester = FakeRequester()
+    today = datetime.date.today()
+    tasks = {}
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_title("Task number %d" % index)
+        words = " ".join("word%d" % random.randrange(5000)
+                         for i in range(100))
+        task.set_text("<content>%s</content>" % words)
+        task.tag_added("@tag%d" % (index % 50))
+        task.due_date = Date(today + datetime.timedelta(
+            days=random.randint(-365, 365)))
+        tasks[task.get_id()] = task
+    return tasks
+
+
+def make_queries(count):
+    today = datetime.date.today()
+    queries = []
+    for index in range(count):
+        query = random.choice(QUERIES)
+        values = [random.randrange(50) for i in range(query.count("%d"))]
+        if "%s" in query:
+            day = today + datetime.timedelta(days=random.randint(-400, 400))
+            values.append(day.isoformat())
+        queries.append(parse_search_query(query % tuple(values))['q'])
+    return queries
+
+
+def main():
+    query_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    random.seed(0)
+    tasks = make_tasks(count)
+    queries = make_queries(query_count)
+
+    index, dates = WordIndex(tasks.get), DateIndex(tasks.get)
+    for tid in tasks:
+        index.task_changed(tid)
+        dates.task_changed(tid)
+    index.refresh()
+    dates.refresh()
+    tag_counts = {}
+    for task in tasks.values():
+        for tag in task.get_tags_name():
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+    results = {}
+    for label, query_class in [("query order", UnplannedQuery),
+                               ("planned", CompiledQuery)]:
+        matches = 0
+        with timed("%d queries, %s" % (query_count, label), results):
+            for commands in queries:
+                compiled = query_class(commands, index, dates,
+                                       lambda tag: tag_counts.get(tag, 0))
+                for task in tasks.values():
+                    if compiled(task):
+                        matches += 1
+        print("%-40s %10d" % ("matches", matches))
+    print("speedup: %.1fx" % (
+        results["%d queries, query order" % query_count] /
+        results["%d queries, planned" % query_count]))
+
+    print()
+    compiled = CompiledQuery(queries[0], index, dates,
+                             lambda tag: tag_counts.get(tag, 0))
+    print(compiled.explain(tasks.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the search: Q queries (1000 by default) are checked against N
+tasks (20000 by default), first by interpreting the parsed commands for
+every task as search_filter() used to do, then with the compiled queries.
+"""
+
+import random
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.search import parse_search_query, search_filter
+from GTG.core.task import Task
+from GTG.tools.dates import Date
+
+QUERY_PARTS = ["@tag%d", "word%d", '"word%d word"', "!today", "!tomorrow",
+               "!nodate", "!soon", "!notag", "!before 2014-06-%02d",
+               "!after 2014-03-%02d"]
+
+
+def interpreted_filter(task, parameters=None):
+    """ What search_filter() used to do """
+
+    if parameters is None or 'q' not in parameters:
+        return False
+
+    def check_commands(commands_list):
+
+        def fulltext_search(task, word):
+            word = word.lower()
+            text = task.get_excerpt(strip_tags=False).lower()
+            title = task.get_title().lower()
+
+            return word in text or word in title
+
+        value_checks = {
+            'after': lambda t, v: task.get_due_date() > v,
+            'before': lambda t, v: task.get_due_date() < v,
+            'tag': lambda t, v: v in task.get_tags_name(),
+            'word': fulltext_search,
+            'today': lambda task, v: task.get_due_date() == Date.today(),
+            'tomorrow': lambda task, v: task.get_due_date() == Date.tomorrow(),
+            'nodate': lambda task, v: task.get_due_date() == Date.no_date(),
+            'now': lambda task, v: task.get_due_date() == Date.now(),
+            'soon': lambda task, v: task.get_due_date() == Date.soon(),
+            'someday': lambda task, v: task.get_due_date() == Date.someday(),
+            # get_tags() == [], without a datastore to make Tag objects
+            'notag': lambda task, v: task.get_tags_name() == [],
+        }
+
+        for command in commands_list:
+            cmd, positive, args = command[0], command[1], command[2:]
+            result = False
+
+            if cmd == 'or':
+                for sub_cmd in args[0]:
+                    if check_commands([sub_cmd]):
+                        result = True
+                        break
+            elif value_checks.get(cmd, None):
+                if len(args) > 0:
+                    args = args[0]
+                result = value_checks[cmd](task, args)
+
+            if (positive and not result) or (not positive and result):
+                return False
+
+        return True
+
+    return check_commands(parameters['q'])
+
+
+def make_tasks(count):
+    requester = FakeRequester()
+    tasks = []
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_title("Task number %d" % index)
+        words = " ".join("word%d" % ((index + i) % 1000) for i in range(30))
+        task.set_text("<content><tag>@tag%d</tag>\n%s</content>" %
+                      (index % 50, words))
+        if index % 7:
+            task.tag_added("@tag%d" % (index % 50))
+        if index % 3:
+            task.set_due_date(Date("2014-%02d-%02d" % (index % 12 + 1,
+                                                       index % 28 + 1)))
+        tasks.append(task)
+    return tasks
+
+
+def make_queries(count):
+    queries = []
+    for index in range(count):
+        parts = []
+        for part in random.sample(QUERY_PARTS, random.randint(1, 3)):
+            if "%" in part:
+                part = part % random.randint(1, 28)
+            if parts and random.random() < 0.3:
+                parts.append("!or")
+            if random.random() < 0.2:
+                parts.append("!not")
+            parts.append(part)
+        queries.append(" ".join(parts))
+    return queries
+
+
+def main():
+    query_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    random.seed(0)
+    tasks = make_tasks(count)
+    queries = make_queries(query_count)
+
+    results = {}
+    for label, filter_func in [("interpreted", interpreted_filter),
+                               ("compiled", search_filter)]:
+        matches = 0
+        with timed("%d queries, %s" % (query_count, label), results):
+            for query in queries:
+                parameters = parse_search_query(query)
+                for task in tasks:
+                    if filter_func(task, parameters):
+                        matches += 1
+        print("%-40s %10d" % ("matches", matches))
+    print("speedup: %.1fx" % (
+        results["%d queries, interpreted" % query_count] /
+        results["%d queries, compiled" % query_count]))
+
+
+if __name__ == '__main__':
+    main()
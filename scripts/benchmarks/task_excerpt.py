@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of Task.get_excerpt(), which the search and the browser call for
+every task.
+
+The text of N tasks (10000 by default) is extracted with minidom, as
+get_excerpt() used to do, then with get_excerpt() the first time, then again
+with get_excerpt(), as a second search does.
+"""
+
+import sys
+import xml.dom.minidom
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.task import Task
+
+
+def minidom_text(element):
+    """ What get_excerpt() used to do """
+    txt = ""
+    for node in element.childNodes:
+        if node.nodeType == node.ELEMENT_NODE:
+            if node.tagName == 'subtask':
+                if txt[-2:] == '→ ':
+                    txt = txt[:-2]
+            else:
+                txt += minidom_text(node)
+        elif node.nodeType == node.TEXT_NODE:
+            txt += node.nodeValue
+    return txt
+
+
+def make_content(index):
+    words = " ".join("word%d" % ((index + i) % 1000) for i in range(100))
+    return ("<content><tag>@tag%d</tag>\n\n%s &amp; more\n"
+            "→ <subtask>task-%d</subtask>\n%s</content>" %
+            (index % 50, words, index + 1, words))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    requester = FakeRequester()
+    tasks = []
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_text(make_content(index))
+        tasks.append(task)
+
+    with timed("%d excerpts, minidom" % count):
+        for task in tasks:
+            minidom_text(xml.dom.minidom.parseString(task.content)).strip()
+    with timed("%d excerpts, first call" % count):
+        for task in tasks:
+            task.get_excerpt()
+    with timed("%d excerpts, cached" % count):
+        for task in tasks:
+            task.get_excerpt()
+
+
+if __name__ == '__main__':
+    main()
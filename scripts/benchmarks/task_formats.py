@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the two formats of the localfile backend: XML and "lines".
+
+It generates an XML task file with N tasks (10000 by default), converts it to
+the lines format and compares the size of the files, the time to load all
+the records, and the time to save C changes of a single task (100 by
+default). An XML file is rewritten by every save, while a line is appended to
+the lines file.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from benchutils import generate_task_file, timed
+
+from GTG.tools import cleanxml, tasklines
+from GTG.tools.taskxml import record_from_xml, record_to_xml
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    tmpdir = tempfile.mkdtemp()
+    try:
+        xml_path = os.path.join(tmpdir, "gtg_tasks.xml")
+        lines_path = os.path.join(tmpdir, "gtg_tasks.lines")
+        generate_task_file(xml_path, count)
+        tasklines.write_records(
+            lines_path,
+            [record_from_xml(node)
+             for node in cleanxml.iterxmlfile(xml_path, "task")])
+        print("%d tasks: XML %.1f MB, lines %.1f MB" % (
+            count, os.path.getsize(xml_path) / 1e6,
+            os.path.getsize(lines_path) / 1e6))
+
+        with timed("load XML"):
+            doc, xmlproj = cleanxml.openxmlfile(xml_path, "project")
+            records = [record_from_xml(node)
+                       for node in xmlproj.childNodes
+                       if node.nodeName == "task"]
+        with timed("load lines"):
+            lines = tasklines.TaskLineFile(lines_path)
+            assert lines.load() == records
+
+        record = records[count // 2]
+        node = xmlproj.childNodes[count // 2]
+        with timed("save %d changes, XML" % changes):
+            for index in range(changes):
+                record["title"] = "Task changed %d times" % index
+                new_node = record_to_xml(doc, record)
+                xmlproj.replaceChild(new_node, node)
+                node = new_node
+                cleanxml.savexml(xml_path, doc)
+        with timed("save %d changes, lines" % changes):
+            for index in range(changes):
+                record["title"] = "Task changed %d times" % index
+                lines.put(record)
+        lines.close()
+        print("after the changes: XML %.1f MB, lines %.1f MB" % (
+            os.path.getsize(xml_path) / 1e6,
+            os.path.getsize(lines_path) / 1e6))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
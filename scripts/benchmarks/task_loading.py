@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the creation of Task objects by the backends.
+
+It turns N task records (50000 by default) into Task objects, first through
+the public setters, as taskxml used to do, then through Task.fill(), which
+taskxml uses now. One task out of ten has two subtasks and an attribute.
+"""
+
+import sys
+from datetime import datetime
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.task import Task
+from GTG.tools import taskxml
+from GTG.tools.dates import Date
+
+
+def make_record(index, count):
+    if index % 10 == 0 and index + 2 < count:
+        subtasks = ["task-%d" % (index + 1), "task-%d" % (index + 2)]
+        attributes = [("", "key", "value %d" % index)]
+    else:
+        subtasks, attributes = [], []
+    return {
+        "tid": "task-%d" % index,
+        "uuid": "6b0c24b0-1e55-4cb5-9d11-%012d" % index,
+        "status": "Done" if index % 4 == 0 else "Active",
+        "title": "Task number %d" % index,
+        "due_date": "2014-05-%02d" % (index % 28 + 1) if index % 3 == 0
+        else "",
+        "start_date": "2014-04-01" if index % 5 == 0 else "",
+        "closed_date": "2014-03-01" if index % 4 == 0 else "",
+        "modified": "2014-01-01T10:00:00",
+        "content": "<content>Body of task %d</content>" % index,
+        "tags": ["@tag%d" % (index % 50)],
+        "subtasks": subtasks,
+        "attributes": attributes,
+    }
+
+
+def fill_with_setters(task, record):
+    """ What taskxml.task_from_record() used to do """
+    task.set_uuid(record["uuid"])
+    task.set_title(record["title"])
+    task.set_status(record["status"],
+                    donedate=Date.parse(record["closed_date"]))
+    task.set_due_date(Date(record["due_date"]))
+    task.set_start_date(Date(record["start_date"]))
+    if record["modified"]:
+        task.set_modified(datetime.strptime(record["modified"],
+                                            "%Y-%m-%dT%H:%M:%S"))
+    for tag in record["tags"]:
+        task.tag_added(tag)
+    if record["content"]:
+        task.set_text(record["content"])
+    for child in record["subtasks"]:
+        task.add_child(child)
+    for namespace, key, value in record["attributes"]:
+        task.set_attribute(key, value, namespace=namespace)
+    return task
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    requester = FakeRequester()
+    records = [make_record(index, count) for index in range(count)]
+
+    results = {}
+    for label, fill in [("setters", fill_with_setters),
+                        ("Task.fill()", taskxml.task_from_record)]:
+        with timed("%d tasks, %s" % (count, label), results):
+            for record in records:
+                fill(Task(record["tid"], requester), record)
+    print("speedup: %.1fx" % (results["%d tasks, setters" % count] /
+                              results["%d tasks, Task.fill()" % count]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the memory used by Task objects.
+
+It loads N tasks (100000 by default) from records, as a backend does, and
+reports the memory they take per task. Most tasks have no dates, a few tags
+shared with other tasks and no attributes. Run it on two revisions to
+compare them.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from benchutils import timed
+
+from GTG.core.task import Task
+from GTG.tools import taskxml
+
+
+class FakeRequester(object):
+    """ The part of the Requester used by tasks which are being loaded """
+
+    def get_main_view(self):
+        return None
+
+
+def make_record(index):
+    return {
+        "tid": "task-%d" % index,
+        "uuid": "6b0c24b0-1e55-4cb5-9d11-%012d" % index,
+        "status": "Active",
+        "title": "Task number %d" % index,
+        "due_date": "2014-05-%02d" % (index % 28 + 1) if index % 10 == 0
+        else "",
+        "start_date": "",
+        "closed_date": "",
+        "modified": "2014-01-01T10:00:00",
+        "content": "",
+        "tags": ["@tag%d" % (index % 50), "@tag%d" % (index % 7)],
+        "subtasks": [],
+        "attributes": [],
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    requester = FakeRequester()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = []
+    with timed("load %d tasks (traced)" % count):
+        for index in range(count):
+            task = Task("task-%d" % index, requester)
+            tasks.append(taskxml.task_from_record(task, make_record(index)))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print("%d tasks: %.1f MB, %d bytes per task" % (
+        count, used / 1e6, used / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""
+Benchmark of the subtree data shown for every row of the task browser: the
+most urgent due date and the active subtasks of a task.
+
+A project tree of N tasks (10000 by default), made of chains of 50 levels
+with 4 subtasks per level, is rendered: every task asks for its urgent date,
+first by walking its subtasks as get_urgent_date() used to do, then through
+the cached subtree data, then again after a change of a leaf task.
+"""
+
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.task import Task
+from GTG.tools.dates import Date
+from liblarch import Tree
+
+
+class TreeRequester(FakeRequester):
+
+    def __init__(self):
+        self.tree = Tree()
+
+    def get_task(self, tid):
+        return self.tree.get_node(tid)
+
+
+def walk_urgent_date(task):
+    """ What get_urgent_date() used to do """
+    urg_date = task.due_date
+    for sub in task.get_subtasks():
+        sub_urg_date = walk_urgent_date(sub)
+        if urg_date >= sub_urg_date:
+            urg_date = sub_urg_date
+    return urg_date
+
+
+def make_tree(count):
+    requester = TreeRequester()
+    tasks = []
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_due_date(Date("2014-%02d-%02d" % (index % 12 + 1,
+                                                   index % 28 + 1)))
+        requester.tree.add_node(task)
+        task.set_loaded()
+        offset = index % 200
+        if offset:
+            # blocks of 200 tasks: a chain of 50 levels, with 3 more leaves
+            # on each level
+            parent = tasks[index - offset + (offset - 1) // 4 * 4]
+            parent.add_child(task.get_id())
+        tasks.append(task)
+    return tasks
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tasks = make_tree(count)
+
+    with timed("%d rows, walking subtasks" % count):
+        for task in tasks:
+            walk_urgent_date(task)
+    with timed("%d rows, first rendering" % count):
+        for task in tasks:
+            task.get_urgent_date()
+    with timed("%d rows, rendered again" % count):
+        for task in tasks:
+            task.get_urgent_date()
+    tasks[-1].set_due_date(Date("2013-01-01"))
+    with timed("%d rows, after a change" % count):
+        for task in tasks:
+            task.get_urgent_date()
+
+
+if __name__ == '__main__':
+    main()
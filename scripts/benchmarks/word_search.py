@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the full-text search: Q word queries (200 by default) are
+checked against N tasks (20000 by default), by reading the text of every
+task, then with the candidates given by the word index.
+"""
+
+import random
+import sys
+
+from benchutils import FakeRequester, timed
+
+from GTG.core.search import parse_search_query, search_filter
+from GTG.core.task import Task
+from GTG.core.wordindex import WordIndex
+
+VOCABULARY = 5000
+
+
+def make_tasks(count):
+    requester = FakeRequester()
+    tasks = {}
+    for index in range(count):
+        task = Task("task-%d" % index, requester)
+        task.set_title("Task number %d" % index)
+        words = " ".join("word%d" % random.randrange(VOCABULARY)
+                         for i in range(30))
+        task.set_text("<content>%s</content>" % words)
+        tasks[task.get_id()] = task
+    return tasks
+
+
+def make_queries(count):
+    queries = []
+    for index in range(count):
+        words = ["word%d" % random.randrange(VOCABULARY)
+                 for i in range(random.randint(1, 2))]
+        if random.random() < 0.2:
+            words[0] = words[0][:-1]
+        queries.append(" ".join(words))
+    return queries
+
+
+def main():
+    query_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    random.seed(0)
+    tasks = make_tasks(count)
+    queries = make_queries(query_count)
+
+    index = WordIndex(tasks.get)
+    with timed("indexing %d tasks" % count):
+        for tid in tasks:
+            index.task_changed(tid)
+        index.refresh()
+
+    results = {}
+    for label, extra in [("without index", {}),
+                         ("with index", {'index': index})]:
+        matches = 0
+        with timed("%d queries, %s" % (query_count, label), results):
+            for query in queries:
+                parameters = parse_search_query(query)
+                parameters.update(extra)
+                for task in tasks.values():
+                    if search_filter(task, parameters):
+                        matches += 1
+        print("%-40s %10d" % ("matches", matches))
+    print("speedup: %.1fx" % (
+        results["%d queries, without index" % query_count] /
+        results["%d queries, with index" % query_count]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the XML readers of cleanxml.
+
+It scales the stores of data/test-data up to N tasks (50000 by default)
+and reads them with:
+  - the former openxmlfile(): cleanString(), parseString() and cleanDoc()
+  - the former iterxmlfile(), based on pulldom
+  - the current openxmlfile() and iterxmlfile(), which clean the
+    whitespaces while parsing
+All the readers must give the same tasks.
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import xml.dom.minidom
+import xml.dom.pulldom
+
+from benchutils import scale_task_file, timed
+
+from GTG.tools import cleanxml
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', '..', 'data', 'test-data')
+
+
+def three_passes(path):
+    """ openxmlfile() before the single pass reader """
+    with open(path, "r") as xml_file:
+        text = xml_file.read()
+    text = cleanxml.cleanString(text, cleanxml.tab, cleanxml.enter)
+    doc = xml.dom.minidom.parseString(text)
+    cleanxml.cleanDoc(doc, cleanxml.tab, cleanxml.enter)
+    return doc.getElementsByTagName("task")
+
+
+def pulldom(path):
+    """ iterxmlfile() before the single pass reader """
+    events = xml.dom.pulldom.parse(path)
+    for event, node in events:
+        if event == xml.dom.pulldom.START_ELEMENT and node.tagName == "task":
+            events.expandNode(node)
+            node.normalize()
+            cleanxml.cleanNode(node, cleanxml.tab, cleanxml.enter)
+            yield node
+
+
+def single_pass(path):
+    doc, project = cleanxml.openxmlfile(path, "project")
+    return doc.getElementsByTagName("task")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        sources = glob.glob(os.path.join(TEST_DATA, "*", "xdg", "data",
+                                         "gtg", "*-*.xml"))
+        for source in sorted(sources):
+            path = os.path.join(tmpdir, "gtg_tasks.xml")
+            scale_task_file(source, path, count)
+            print("%s scaled to %d tasks, %.1f MB" % (
+                os.path.relpath(source, TEST_DATA), count,
+                os.path.getsize(path) / 1e6))
+            results = []
+            for label, reader in [
+                    ("cleanString + parseString + cleanDoc", three_passes),
+                    ("pulldom + cleanNode", pulldom),
+                    ("openxmlfile, single pass", single_pass),
+                    ("iterxmlfile, single pass",
+                     lambda path: cleanxml.iterxmlfile(path, "task"))]:
+                with timed(label):
+                    tasks = list(reader(path))
+                results.append([node.toxml() for node in tasks])
+            assert all(tasks == results[0] for tasks in results)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - A personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Convert a task file between the XML format and the "lines" format (one task
+per line) of the localfile backend. The direction is guessed from the content
+of the input file.
+"""
+
+import os
+import sys
+import xml.parsers.expat
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+from GTG.tools import cleanxml, tasklines, taskxml
+
+
+def is_xml_file(filename):
+    """ Return True if filename looks like an XML task file """
+    with open(filename, "rb") as task_file:
+        return task_file.read(1024).lstrip().startswith(b"<")
+
+
+def xml_to_lines(filename, outputfile):
+    records = [taskxml.record_from_xml(node)
+               for node in cleanxml.iterxmlfile(filename, "task")]
+    tasklines.write_records(outputfile, records)
+    return len(records)
+
+
+def lines_to_xml(filename, outputfile):
+    records = tasklines.read_records(filename)
+    doc, xmlproj = cleanxml.emptydoc("project")
+    for record in records:
+        xmlproj.appendChild(taskxml.record_to_xml(doc, record))
+    with open(outputfile, "w", encoding="utf-8") as xml_file:
+        xml_file.write(doc.toprettyxml(cleanxml.tab, cleanxml.enter))
+    return len(records)
+
+
+def usage():
+    print("Usage: %s taskfile outputfile" % sys.argv[0])
+    print()
+    print("Converts an XML task file to the \"lines\" format, where")
+    print("every task is on its own line, or a file in the \"lines\"")
+    print("format back to XML.")
+    sys.exit(1)
+
+
+def main():
+    if len(sys.argv) != 3:
+        usage()
+    filename, outputfile = sys.argv[1:]
+
+    try:
+        if is_xml_file(filename):
+            count = xml_to_lines(filename, outputfile)
+            print("Converted %d tasks to the lines format" % count)
+        else:
+            count = lines_to_xml(filename, outputfile)
+            print("Converted %d tasks to XML" % count)
+    except (IOError, OSError, xml.parsers.expat.ExpatError) as err:
+        print("error while converting %s: %s" % (filename, err))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from GTG.backends.backend_localfile import Backend
+from GTG.tools import cleanxml
+
+
+def tasks_xml(titles, complete=True):
+    """ Return a task file with a task of every title """
+    tasks = "".join('<task id="task-%d" status="Active"><title>%s</title>'
+                    '</task>\n' % (number, title)
+                    for number, title in enumerate(titles))
+    return '<?xml version="1.0" ?>\n<project>\n%s%s' % (
+        tasks, "</project>\n" if complete else "")
+
+
+class TestBackendLocalFile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "gtg_tasks.xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, path, content):
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as xml_file:
+            xml_file.write(content)
+
+    def titles(self, nodes):
+        return dict((node.getAttribute("id"),
+                     node.getElementsByTagName("title")[0].firstChild.data)
+                    for node in nodes)
+
+    def test_damaged_file_keeps_the_tasks_read(self):
+        backup = os.path.join(self.tmpdir, "backup", "gtg_tasks.xml.bak.0")
+        self.write(backup, tasks_xml(["old %d" % i for i in range(3)]))
+        newer = ["new %d" % i for i in range(5)]
+        self.write(self.path, tasks_xml(newer, complete=False))
+
+        backend = Backend({"path": self.path})
+        nodes = list(backend._stream_xml())
+        ids = [node.getAttribute("id") for node in nodes]
+        self.assertEqual(sorted(ids), ["task-%d" % i for i in range(5)])
+        expected = dict(("task-%d" % i, title)
+                        for i, title in enumerate(newer))
+        self.assertEqual(self.titles(nodes), expected)
+        self.assertEqual(self.titles(backend._nodes.values()), expected)
+
+        backend._compact(backup=True)
+        self.assertEqual(
+            self.titles(cleanxml.iterxmlfile(self.path, "task")), expected)
+
+    def test_damaged_file_adds_the_other_tasks_of_the_backup(self):
+        backup = os.path.join(self.tmpdir, "backup", "gtg_tasks.xml.bak.0")
+        self.write(backup, tasks_xml(["old %d" % i for i in range(3)]))
+        # the file is cut in the middle of its third task
+        content = tasks_xml(["new 0", "new 1", "new 2"])
+        self.write(self.path, content[:content.index("new 2")])
+
+        backend = Backend({"path": self.path})
+        nodes = list(backend._stream_xml())
+        self.assertEqual(self.titles(nodes), {"task-0": "new 0",
+                                              "task-1": "new 1",
+                                              "task-2": "old 2"})
+        self.assertEqual(len(backend.xmlproj.childNodes), 3)
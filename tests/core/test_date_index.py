@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.dateindex import DateIndex
+from GTG.core.search import CompiledQuery, parse_search_query
+from GTG.tools.dates import Date
+
+d = Date.parse
+
+
+class DatedTask(object):
+
+    def __init__(self, tid, due, closed=""):
+        self.tid = tid
+        self.version = 0
+        self.due = d(due)
+        self.closed = d(closed)
+
+    def set_due_date(self, due):
+        self.due = d(due)
+        self.version += 1
+
+    def get_id(self):
+        return self.tid
+
+    def get_version(self):
+        return self.version
+
+    def get_due_date(self):
+        return self.due
+
+    def get_start_date(self):
+        return Date.no_date()
+
+    def get_closed_date(self):
+        return self.closed
+
+
+class TestDateIndex(TestCase):
+
+    def setUp(self):
+        self.tasks = {}
+        self.index = DateIndex(self.tasks.get)
+        for tid, due in [('a', "2014-03-01"), ('b', "2014-03-05"),
+                         ('c', "2014-03-05"), ('d', "someday"), ('e', "")]:
+            self.add(DatedTask(tid, due))
+        self.index.refresh()
+
+    def add(self, task):
+        self.tasks[task.tid] = task
+        self.index.task_changed(task.tid)
+
+    def test_ranges(self):
+        self.assertEqual(self.index.after('due', d("2014-03-01")),
+                         {'b', 'c', 'd', 'e'})
+        self.assertEqual(self.index.before('due', d("2014-03-05")), {'a'})
+        self.assertEqual(self.index.equal('due', d("2014-03-05")),
+                         {'b', 'c'})
+        self.assertEqual(self.index.equal('due', Date.no_date()), {'e'})
+        # as for Date, no date is before someday
+        self.assertEqual(self.index.before('due', Date.someday()),
+                         {'a', 'b', 'c', 'e'})
+        self.assertEqual(self.index.after('closed', d("2014-03-01")),
+                         {'a', 'b', 'c', 'd', 'e'})
+
+    def test_changes(self):
+        self.tasks['b'].set_due_date("2014-02-01")
+        self.index.task_changed('b')
+        self.index.task_removed('c')
+        self.index.refresh()
+        self.assertEqual(self.index.before('due', d("2014-03-05")),
+                         {'a', 'b'})
+        self.assertEqual(self.index.equal('due', d("2014-03-05")), set())
+
+    def test_query_candidates(self):
+        query = CompiledQuery(
+            parse_search_query("!after 2014-03-02 !or !nodate")['q'],
+            dates=self.index)
+        self.assertEqual(query.candidates(), {'b', 'c', 'd', 'e'})
+        query = CompiledQuery(
+            parse_search_query("!before 2014-03-02 !not !nodate")['q'],
+            dates=self.index)
+        self.assertEqual(query.candidates(), {'a'})
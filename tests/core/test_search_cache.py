@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import itertools
+from unittest import TestCase
+
+from GTG.core.search import SearchCache, parse_search_query, search_filter
+
+_versions = itertools.count()
+
+
+class VersionedTask(object):
+
+    def __init__(self, tid, title):
+        self.tid = tid
+        self.set_title(title)
+        self.reads = 0
+
+    def set_title(self, title):
+        self.title = title
+        self.version = next(_versions)
+
+    def get_id(self):
+        return self.tid
+
+    def get_version(self):
+        return self.version
+
+    def get_title(self):
+        self.reads += 1
+        return self.title
+
+    def get_excerpt(self, strip_tags=False):
+        return ""
+
+
+class TestSearchCache(TestCase):
+
+    def setUp(self):
+        self.tasks = [VersionedTask(str(i), "task %d" % i)
+                      for i in range(10)]
+        self.generation = 0
+        self.cache = SearchCache(lambda: self.tasks,
+                                 lambda: self.generation, size=2)
+
+    def reads(self):
+        return sum(task.reads for task in self.tasks)
+
+    def search(self, query):
+        return self.cache.search(parse_search_query(query)['q'])
+
+    def test_repeated_query_is_answered_from_result(self):
+        self.assertEqual(self.search("task 1"), ('1',))
+        reads = self.reads()
+        self.assertEqual(self.search("  task   1 "), ('1',))
+        self.assertEqual(self.reads(), reads)
+        stats = list(self.cache.get_stats().values())
+        self.assertEqual(stats, [(1, 1)])
+
+        self.tasks[3].set_title("task 1 too")
+        self.generation += 1
+        self.assertEqual(self.search("task 1"), ('1', '3'))
+        self.assertGreater(self.reads(), reads)
+
+    def test_results_are_bounded(self):
+        for query in ["task 1", "task 2", "task 3"]:
+            self.search(query)
+        self.assertEqual(len(self.cache.get_stats()), 2)
+
+    def test_filter_uses_result(self):
+        p = parse_search_query("task 2")
+        p['cache'] = self.cache
+        self.assertEqual([search_filter(task, p) for task in self.tasks],
+                         [task.tid == '2' for task in self.tasks])
+        reads = self.reads()
+        self.assertEqual([search_filter(task, p) for task in self.tasks],
+                         [task.tid == '2' for task in self.tasks])
+        self.assertEqual(self.reads(), reads)
+
+    def test_filter_checks_changed_and_new_tasks(self):
+        p = parse_search_query("task 2")
+        p['cache'] = self.cache
+        for task in self.tasks:
+            search_filter(task, p)
+
+        # liblarch may check a task before the generation changes
+        self.tasks[5].set_title("task 2 again")
+        self.assertTrue(search_filter(self.tasks[5], p))
+        self.assertTrue(search_filter(VersionedTask('new', "task 2"), p))
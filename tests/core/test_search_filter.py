@@ -19,7 +19,7 @@
 
 from unittest import TestCase
 
-from GTG.core.search import search_filter
+from GTG.core.search import compile_search_query, search_filter
 from GTG.tools.dates import Date
 
 d = Date.parse
@@ -206,3 +206,27 @@ class TestSearchFilter(TestCase):
                                       {'q': [("soon", True)]}))
         self.assertTrue(search_filter(FakeTask(due_date="someday"),
                                       {'q': [("someday", True)]}))
+
+    def test_no_tag(self):
+        self.assertTrue(search_filter(FakeTask(), {'q': [("notag", True)]}))
+        self.assertFalse(search_filter(FakeTask(tags=['@a']),
+                                       {'q': [("notag", True)]}))
+
+    def test_nested_or(self):
+        p = {'q': [('or', True, [("tag", True, "@n"),
+                                 ('or', True, [("tag", True, "@m"),
+                                               ("tag", True, "@a")])])]}
+        self.assertTrue(search_filter(FakeTask(tags=['@a']), p))
+        self.assertFalse(search_filter(FakeTask(tags=['@b']), p))
+
+    def test_query_is_compiled_once(self):
+        p = {'q': [("word", True, 'GTG')]}
+        self.assertTrue(search_filter(FakeTask(title="gtg"), p))
+        compiled = p['compiled']
+        self.assertFalse(search_filter(FakeTask(title="other"), p))
+        self.assertIs(compiled, p['compiled'])
+
+        self.assertIs(compile_search_query("@a !or gtg"),
+                      compile_search_query("@a !or gtg"))
+        self.assertTrue(compile_search_query("@a !or gtg")(
+            FakeTask(tags=['@a'])))
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.dateindex import DateIndex
+from GTG.core.search import CompiledQuery, parse_search_query
+from GTG.core.wordindex import WordIndex
+from GTG.tools.dates import Date
+
+
+class PlannedTask(object):
+
+    def __init__(self, tid, title, tags, due_date=""):
+        self.tid = tid
+        self.title = title
+        self.tags = tags
+        self.due_date = Date.parse(due_date)
+
+    def get_id(self):
+        return self.tid
+
+    def get_version(self):
+        return 0
+
+    def get_title(self):
+        return self.title
+
+    def get_excerpt(self, strip_tags=False):
+        return ""
+
+    def get_tags_name(self):
+        return self.tags
+
+    def get_due_date(self):
+        return self.due_date
+
+    def get_start_date(self):
+        return Date.no_date()
+
+    def get_closed_date(self):
+        return Date.no_date()
+
+
+def plan(query, **indexes):
+    """ Return the commands of a query in the order of its plan """
+    compiled = CompiledQuery(parse_search_query(query)['q'], **indexes)
+    return [command[2] if len(command) > 2 else command[0]
+            for command in compiled.get_plan()]
+
+
+class TestSearchPlan(TestCase):
+
+    def test_cheap_checks_come_first(self):
+        self.assertEqual(plan("buy @errands !before 2014-03-01"),
+                         ["@errands", Date.parse("2014-03-01"), "buy"])
+        self.assertEqual(plan("buy !not @errands"), ["@errands", "buy"])
+
+    def test_estimates_from_indexes(self):
+        tasks = dict((str(i), PlannedTask(str(i), "task %d" % i, ['@all']))
+                     for i in range(20))
+        tasks['0'].title = "rare"
+        index = WordIndex(tasks.get)
+        for tid in tasks:
+            index.task_changed(tid)
+
+        # every task has @all, only one has the word
+        self.assertEqual(plan("@all rare", index=index,
+                              tag_count=lambda tag: 20),
+                         ["rare", "@all"])
+        self.assertEqual(plan("@all rare", index=index,
+                              tag_count=lambda tag: 1),
+                         ["@all", "rare"])
+
+    def test_plan_keeps_result(self):
+        tasks = [PlannedTask('1', "buy milk", ['@errands'], "2014-02-01"),
+                 PlannedTask('2', "buy bread", ['@errands'], "2014-04-01"),
+                 PlannedTask('3', "buy tea", [], "2014-02-01")]
+        query = parse_search_query("buy @errands !before 2014-03-01")['q']
+        compiled = CompiledQuery(query)
+        self.assertEqual([compiled(task) for task in tasks],
+                         [True, False, False])
+
+        report = compiled.explain(tasks).splitlines()
+        self.assertEqual(report[0], "3 tasks, 1 matching")
+        self.assertIn("3 checked, 2 passed", report[1])
+
+    def test_plan_made_again_once_tasks_are_indexed(self):
+        tasks = {}
+        index = WordIndex(tasks.get)
+        query = parse_search_query("@all rare")['q']
+        compiled = CompiledQuery(query, index=index,
+                                 tag_count=lambda tag: len(tasks))
+        # without tasks, the plan is made from the default estimates
+        self.assertEqual([command[2] for command in compiled.get_plan()],
+                         ["@all", "rare"])
+
+        for i in range(20):
+            tasks[str(i)] = PlannedTask(str(i), "task %d" % i, ['@all'])
+            index.task_changed(str(i))
+        tasks['0'].title = "rare"
+        self.assertEqual([command[2] for command in compiled.get_plan()],
+                         ["rare", "@all"])
+
+    def test_dates_indexed_before_estimating(self):
+        tasks = dict((str(i), PlannedTask(str(i), "task", ['@all'],
+                                          "2014-04-01"))
+                     for i in range(20))
+        tasks['0'].due_date = Date.parse("2014-02-01")
+        dates = DateIndex(tasks.get)
+        for tid in tasks:
+            dates.task_changed(tid)
+
+        self.assertEqual(plan("@all !before 2014-03-01", dates=dates,
+                              tag_count=lambda tag: 20),
+                         [Date.parse("2014-03-01"), "@all"])
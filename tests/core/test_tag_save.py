@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import threading
+
+from GTG.core.datastore import DataStore, TAG_XMLROOT
+from GTG.core.tag import Tag
+from GTG.tools import cleanxml
+
+
+class TagTree(object):
+    """ The part of the tag tree used to save the tags """
+
+    def __init__(self):
+        self.tags = {}
+
+    def get_main_view(self):
+        return self
+
+    def get_all_nodes(self):
+        return list(self.tags)
+
+    def has_node(self, name):
+        return name in self.tags
+
+    def get_node(self, name):
+        return self.tags[name]
+
+    def del_node(self, name):
+        del self.tags[name]
+
+
+class TestTagSave(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "tags.xml")
+        # Only the tag part of a datastore, without tasks nor backends
+        self.datastore = DataStore.__new__(DataStore)
+        self.datastore._tagstore = TagTree()
+        self.datastore._tag_doc, root = cleanxml.emptydoc(TAG_XMLROOT)
+        self.datastore._tag_nodes = {}
+        self.datastore._dirty_tags = set()
+        self.datastore._tag_lock = threading.Lock()
+        self.datastore.tagfile = self.path
+        for name in ("@home", "@work"):
+            self.add_tag(name, {"color": "#000000"})
+        self.datastore.save_tagtree()
+
+    def tearDown(self):
+        cleanxml.flush_savexml()
+        shutil.rmtree(self.tmpdir)
+
+    def add_tag(self, name, attributes):
+        tag = Tag(name, None)
+        # Do not allow notifying related tasks
+        tag.notify_related_tasks = lambda: None
+        for key, value in attributes.items():
+            tag.set_attribute(key, value)
+        self.datastore._tagstore.tags[name] = tag
+        tag.set_save_callback(lambda: self.datastore._tag_changed(name))
+        self.datastore._tag_changed(name)
+        return tag
+
+    def saved_tags(self):
+        doc, root = cleanxml.openxmlfile(self.path, TAG_XMLROOT)
+        return dict((node.getAttribute("name"), node.getAttribute("color"))
+                    for node in root.childNodes)
+
+    def test_recolors_are_written_once(self):
+        tag = self.datastore.get_tag("@home")
+        before = cleanxml.savexml_stats()
+        for i in range(10):
+            tag.set_attribute("color", "#00000%d" % i)
+        cleanxml.flush_savexml(self.path)
+        after = cleanxml.savexml_stats()
+        self.assertEqual(1, after["written"] - before["written"])
+        self.assertEqual({"@home": "#000009", "@work": "#000000"},
+                         self.saved_tags())
+
+    def test_removed_tag_loses_its_node(self):
+        self.datastore.remove_tag("@work")
+        cleanxml.flush_savexml(self.path)
+        self.assertEqual({"@home": "#000000"}, self.saved_tags())
+        self.assertNotIn("@work", self.datastore._tag_nodes)
+
+    def test_unchanged_tags_are_not_written(self):
+        before = cleanxml.savexml_stats()
+        self.datastore.save_tagtree()
+        after = cleanxml.savexml_stats()
+        self.assertEqual(before["requested"], after["requested"])
+        self.assertEqual(before["written"], after["written"])
+
+    def test_save_tagtree_writes_pending_changes(self):
+        self.add_tag("@shop", {"color": "#ffffff"})
+        self.assertNotIn("@shop", self.saved_tags())
+
+        self.datastore.save_tagtree()
+        self.assertEqual({"@home": "#000000", "@shop": "#ffffff",
+                          "@work": "#000000"}, self.saved_tags())
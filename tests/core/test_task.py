@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+from datetime import datetime
+from unittest import TestCase
+
+from GTG.core.task import Task
+from GTG.tools.dates import Date
+from liblarch import Tree
+
+
+class FakeRequester(object):
+    def __init__(self):
+        self.tids = set()
+
+    def get_main_view(self):
+        return None
+
+    def has_task(self, tid):
+        return tid in self.tids
+
+
+class CountingTask(Task):
+    """ A loaded task counting its notifications """
+
+    def __init__(self, tid, requester):
+        Task.__init__(self, tid, requester, newtask=True)
+        requester.tids.add(tid)
+        self.notified = 0
+
+    def modified(self):
+        self.notified += 1
+
+
+class TestTaskBatch(TestCase):
+    def setUp(self):
+        self.req = FakeRequester()
+        self.task = CountingTask('1', self.req)
+
+    def test_each_change_is_notified(self):
+        self.task.set_title('title')
+        self.task.set_attribute('key', 'value')
+        self.assertEqual(2, self.task.notified)
+
+    def test_batch_notifies_once_at_the_end(self):
+        with self.task.batch():
+            self.task.set_title('title')
+            self.task.set_attribute('key', 'value')
+            self.assertEqual(0, self.task.notified)
+        self.assertEqual(1, self.task.notified)
+
+    def test_nested_batches_notify_each_task_once(self):
+        other = CountingTask('2', self.req)
+        with self.task.batch():
+            with other.batch():
+                other.set_title('title')
+                self.task.set_title('title')
+            self.assertEqual(0, other.notified)
+            other.set_attribute('key', 'value')
+        self.assertEqual(1, self.task.notified)
+        self.assertEqual(1, other.notified)
+
+    def test_deleted_task_is_not_notified(self):
+        with self.task.batch():
+            self.task.set_title('title')
+            self.req.tids.clear()
+        self.assertEqual(0, self.task.notified)
+
+
+class TestTaskFill(TestCase):
+    def fill(self, **fields):
+        values = {"uuid": "uuid", "title": "Title", "status": "Active",
+                  "due_date": "", "start_date": "", "closed_date": "",
+                  "modified": datetime(2014, 1, 1, 10, 0), "tags": [],
+                  "content": "", "children": [], "attributes": []}
+        values.update(fields)
+        task = Task('1', FakeRequester())
+        task.fill(**values)
+        return task
+
+    def test_fields_are_set(self):
+        task = self.fill(tags=["@a", "@b", "@a"], children=["2"],
+                         attributes=[("ns", "key", "value")])
+        self.assertEqual("Title", task.get_title())
+        self.assertEqual(["@a", "@b"], task.get_tags_name())
+        self.assertEqual(["2"], task.get_children())
+        self.assertEqual("value", task.get_attribute("key", namespace="ns"))
+        self.assertEqual(datetime(2014, 1, 1, 10, 0), task.get_modified())
+        self.assertFalse(task.is_new())
+
+    def test_due_date_is_not_before_start_date(self):
+        task = self.fill(due_date="2014-01-01", start_date="2014-02-01")
+        self.assertEqual(Date("2014-02-01"), task.get_due_date())
+
+    def test_closed_task_has_closed_date(self):
+        task = self.fill(status="Done")
+        self.assertEqual(Date.today(), task.get_closed_date())
+        task = self.fill(status="Done", closed_date="2014-03-01")
+        self.assertEqual(Date("2014-03-01"), task.get_closed_date())
+
+
+class TestTaskExcerpt(TestCase):
+    def setUp(self):
+        self.task = Task('1', FakeRequester())
+        self.task.set_text("<content>Buy <tag>@food</tag> &amp; drinks\n"
+                           "→ <subtask>2</subtask>\nthen cook</content>")
+
+    def test_markup_is_stripped(self):
+        self.assertEqual("Buy @food & drinks\n→ 2\nthen cook",
+                         self.task.get_excerpt(strip_subtasks=False))
+        self.assertEqual("Buy @food & drinks\n\nthen cook",
+                         self.task.get_excerpt())
+        self.assertEqual("Buy @food & drinks",
+                         self.task.get_excerpt(lines=1))
+
+    def test_excerpt_follows_the_content(self):
+        self.assertEqual("Buy", self.task.get_excerpt(char=3))
+        self.task.set_text("<content>Sell</content>")
+        self.assertEqual("Sell", self.task.get_excerpt())
+
+
+class TreeRequester(FakeRequester):
+    """ Tasks in a real tree """
+
+    def __init__(self):
+        FakeRequester.__init__(self)
+        self.tree = Tree()
+
+    def get_task(self, tid):
+        if self.tree.has_node(tid):
+            return self.tree.get_node(tid)
+        return None
+
+    def new_task(self, tid, parent=None):
+        task = CountingTask(tid, self)
+        self.tree.add_node(task)
+        task.set_loaded()
+        if parent is not None:
+            parent.add_child(tid)
+        return task
+
+
+class TestTaskSubtree(TestCase):
+    def setUp(self):
+        self.req = TreeRequester()
+        self.root = self.req.new_task('root')
+        self.child = self.req.new_task('child', self.root)
+        self.grandchild = self.req.new_task('grandchild', self.child)
+        self.other = self.req.new_task('other', self.root)
+
+    def test_urgent_date_follows_subtasks(self):
+        self.assertEqual(Date.no_date(), self.root.get_urgent_date())
+        self.grandchild.set_due_date(Date("2014-05-01"))
+        self.assertEqual(Date("2014-05-01"), self.root.get_urgent_date())
+        self.other.set_due_date(Date("2014-04-01"))
+        self.assertEqual(Date("2014-04-01"), self.root.get_urgent_date())
+        self.assertEqual(Date("2014-05-01"), self.child.get_urgent_date())
+
+    def test_active_subtasks_are_counted(self):
+        self.assertEqual(2, self.root.get_active_children_count())
+        self.assertEqual(3, self.root.get_active_subtasks_count())
+        self.grandchild.set_status(Task.STA_DONE)
+        self.assertEqual(2, self.root.get_active_subtasks_count())
+        self.assertEqual(0, self.child.get_active_children_count())
+
+    def test_most_urgent_subtask(self):
+        self.assertEqual(None, self.root.get_most_urgent_subtask())
+        self.grandchild.set_due_date(Date("2014-05-01"))
+        self.other.set_due_date(Date("2014-06-01"))
+        self.assertEqual('grandchild', self.root.get_most_urgent_subtask())
+        self.grandchild.set_status(Task.STA_DONE)
+        self.assertEqual('other', self.root.get_most_urgent_subtask())
+
+
+class TestTaskDateConstraints(TestCase):
+    def setUp(self):
+        self.req = TreeRequester()
+
+    def make_tasks(self, tasks, due, start=""):
+        for task in tasks:
+            task.due_date = Date(due)
+            task.start_date = Date(start)
+            task.notified = 0
+
+    def test_deep_hierarchy(self):
+        tasks = [self.req.new_task('0')]
+        for index in range(1, 50):
+            tasks.append(self.req.new_task(str(index), tasks[-1]))
+        self.make_tasks(tasks, "2014-05-01", "2014-04-01")
+
+        tasks[-1].set_due_date(Date("2014-06-01"))
+        for task in tasks:
+            self.assertEqual(Date("2014-06-01"), task.get_due_date())
+            self.assertEqual(1, task.notified)
+
+        tasks[0].set_due_date(Date("2014-03-01"))
+        for task in tasks:
+            self.assertEqual(Date("2014-03-01"), task.get_due_date())
+            self.assertEqual(Date("2014-03-01"), task.get_start_date())
+            self.assertEqual(2, task.notified)
+
+    def test_wide_hierarchy(self):
+        parent = self.req.new_task('parent')
+        children = [self.req.new_task(str(index), parent)
+                    for index in range(10000)]
+        self.make_tasks([parent] + children, "2014-05-01", "2014-04-01")
+        children[0].due_date = Date.someday()
+
+        parent.set_due_date(Date("2014-03-01"))
+        self.assertEqual(Date.someday(), children[0].get_due_date())
+        for child in children[1:]:
+            self.assertEqual(Date("2014-03-01"), child.get_due_date())
+            self.assertEqual(Date("2014-03-01"), child.get_start_date())
+        self.assertEqual(1, parent.notified)
+        self.assertTrue(all(child.notified == 1 for child in children))
+
+    def test_start_date_postpones_due_dates(self):
+        parent = self.req.new_task('parent')
+        child = self.req.new_task('child', parent)
+        self.make_tasks([parent, child], "2014-05-01")
+        child.set_start_date(Date("2014-06-01"))
+        self.assertEqual(Date("2014-06-01"), child.get_due_date())
+        self.assertEqual(Date("2014-06-01"), parent.get_due_date())
+        self.assertEqual(Date.no_date(), parent.get_start_date())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.search import search_filter
+from GTG.core.wordindex import WordIndex
+
+
+class IndexedTask(object):
+
+    def __init__(self, tid, title="", body=""):
+        self.tid = tid
+        self.version = 0
+        self.title = title
+        self.body = body
+        self.reads = 0
+
+    def set_text(self, title, body=""):
+        self.title, self.body = title, body
+        self.version += 1
+
+    def get_id(self):
+        return self.tid
+
+    def get_version(self):
+        return self.version
+
+    def get_title(self):
+        return self.title
+
+    def get_excerpt(self, strip_tags=False):
+        self.reads += 1
+        return self.body
+
+
+class TestWordIndex(TestCase):
+
+    def setUp(self):
+        self.tasks = {}
+        self.index = WordIndex(self.tasks.get)
+
+    def add(self, tid, title, body=""):
+        task = IndexedTask(tid, title, body)
+        self.tasks[tid] = task
+        self.index.task_changed(tid)
+        return task
+
+    def test_candidates_contain_substrings(self):
+        self.add('1', "Buy milk", "at the Grocery")
+        self.add('2', "Write report")
+        self.add('3', "Call the grocer", "about milk")
+        self.index.refresh()
+
+        self.assertEqual(self.index.candidates("grocer"), {'1', '3'})
+        self.assertEqual(self.index.candidates("ILK"), {'1', '3'})
+        self.assertEqual(self.index.candidates("milk grocery"), {'1'})
+        self.assertEqual(self.index.candidates("bread"), set())
+        self.assertIsNone(self.index.candidates(" "))
+
+    def test_changes_are_indexed_on_refresh(self):
+        task = self.add('1', "Buy milk")
+        generation = self.index.refresh()
+        self.assertEqual(self.index.refresh(), generation)
+
+        task.set_text("Buy bread")
+        self.assertFalse(self.index.is_current(task))
+        self.index.task_changed('1')
+        self.assertNotEqual(self.index.refresh(), generation)
+        self.assertTrue(self.index.is_current(task))
+        self.assertEqual(self.index.candidates("milk"), set())
+        self.assertEqual(self.index.candidates("bread"), {'1'})
+
+        self.index.task_removed('1')
+        self.assertEqual(self.index.candidates("bread"), set())
+
+    def test_search_reads_candidates_only(self):
+        milk = self.add('1', "Buy milk")
+        report = self.add('2', "Write report")
+        p = {'q': [("word", True, "milk")], 'index': self.index}
+        self.index.refresh()
+        milk.reads = report.reads = 0
+
+        self.assertTrue(search_filter(milk, p))
+        self.assertFalse(search_filter(report, p))
+        self.assertEqual((milk.reads, report.reads), (1, 0))
+
+    def test_search_checks_tasks_changed_since_indexed(self):
+        task = self.add('1', "Write report")
+        p = {'q': [("word", True, "milk")], 'index': self.index}
+        self.assertFalse(search_filter(task, p))
+
+        # the filter may run before the index is told about the change
+        task.set_text("Buy milk")
+        self.assertTrue(search_filter(task, p))
+        self.index.task_changed('1')
+        self.assertTrue(search_filter(task, p))
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import time
+import xml.dom.expatbuilder
+import xml.dom.minidom
+import xml.parsers.expat
+
+from GTG.tools import cleanxml
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data',
+                         'test-data', 'standard', 'xdg', 'data', 'gtg',
+                         '866eace6-7482-41e9-b450-e9664a5d1602.xml')
+
+
+class TestIterXMLFile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_same_nodes_as_openxmlfile(self):
+        doc, project = cleanxml.openxmlfile(TEST_DATA, "project")
+        expected = [node.toxml() for node in project.childNodes
+                    if node.nodeName == "task"]
+        streamed = [node.toxml()
+                    for node in cleanxml.iterxmlfile(TEST_DATA, "task")]
+        self.assertEqual(expected, streamed)
+
+    def test_damaged_file_raises_expat_error(self):
+        path = os.path.join(self.tmpdir, "damaged.xml")
+        with open(path, "w") as damaged:
+            damaged.write('<project><task id="1"><title>a</title></task>'
+                          '<task id="2">')
+
+        nodes = cleanxml.iterxmlfile(path, "task")
+        self.assertEqual("1", next(nodes).getAttribute("id"))
+        with self.assertRaises(xml.parsers.expat.ExpatError):
+            next(nodes)
+
+
+class TestParseXMLFile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def three_passes(self, path):
+        with open(path, "r", encoding="utf-8") as xml_file:
+            text = cleanxml.cleanString(xml_file.read(), cleanxml.tab,
+                                        cleanxml.enter)
+        doc = xml.dom.minidom.parseString(text)
+        cleanxml.cleanDoc(doc, cleanxml.tab, cleanxml.enter)
+        return doc
+
+    def test_same_document_as_three_passes(self):
+        self.assertEqual(self.three_passes(TEST_DATA).toxml(),
+                         cleanxml.parsexmlfile(TEST_DATA).toxml())
+
+    def test_long_text_in_several_parts(self):
+        path = os.path.join(self.tmpdir, "long.xml")
+        text = "\n\t\tword &amp; word\t\n" * 20000
+        with open(path, "w") as long_file:
+            long_file.write("<project>\n\t<task>\n\t\t%s\n\t</task>\n"
+                            "\t<task>\n\t\t\n\t</task>\n</project>" % text)
+        self.assertEqual(self.three_passes(path).toxml(),
+                         cleanxml.parsexmlfile(path).toxml())
+
+    def test_cdata_is_kept(self):
+        doc = cleanxml.parsexmlstring(
+            "<project>\n\t<task><![CDATA[\n\t<a>\n]]></task>\n</project>")
+        self.assertEqual("\n\t<a>\n",
+                         doc.getElementsByTagName("task")[0].firstChild.data)
+
+    def test_expatbuilder_internals(self):
+        # The cleaning overrides undocumented parts of ExpatBuilder
+        builder = xml.dom.expatbuilder.ExpatBuilderNS()
+        for name in ("character_data_handler",
+                     "character_data_handler_cdata", "end_element_handler",
+                     "curNode", "_cdata"):
+            self.assertTrue(hasattr(builder, name), name)
+
+    def test_texts_around_streamed_elements(self):
+        builder = cleanxml._StreamBuilder("task")
+        doc = builder.parseString("<project>\n\tbefore\n\t<task>a</task>"
+                                  "\n\tbetween\n\t<task/>\n\tafter\n"
+                                  "</project>")
+        self.assertEqual(["a", None],
+                         [task.firstChild and task.firstChild.data
+                          for task in builder.ready])
+        self.assertEqual(["before", "between", "after"],
+                         [node.data
+                          for node in doc.documentElement.childNodes])
+
+
+class TestScheduleSaveXML(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "tasks.xml")
+        self.doc, self.root = cleanxml.emptydoc("project")
+
+    def tearDown(self):
+        cleanxml.flush_savexml()
+        shutil.rmtree(self.tmpdir)
+
+    def test_saves_are_coalesced(self):
+        before = cleanxml.savexml_stats()
+        for i in range(10):
+            cleanxml.addTextNode(self.doc, self.root, "task", str(i))
+            cleanxml.schedule_savexml(self.path, self.doc, interval=60)
+        self.assertFalse(os.path.exists(self.path))
+
+        cleanxml.flush_savexml(self.path)
+        after = cleanxml.savexml_stats()
+        self.assertEqual(10, after["requested"] - before["requested"])
+        self.assertEqual(1, after["written"] - before["written"])
+        self.assertEqual(9, after["coalesced"] - before["coalesced"])
+
+        doc, root = cleanxml.openxmlfile(self.path, "project")
+        self.assertEqual(10, len(root.childNodes))
+
+    def test_background_writer_saves_the_document(self):
+        cleanxml.schedule_savexml(self.path, self.doc, interval=0.01)
+        for i in range(100):
+            if os.path.exists(self.path):
+                break
+            time.sleep(0.01)
+        self.assertTrue(os.path.exists(self.path))
+
+
+class TestBackupXML(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "tasks.xml")
+        self.backup_name = os.path.join(self.tmpdir, "backup", "tasks.xml")
+        self.doc, self.root = cleanxml.emptydoc("project")
+
+    def tearDown(self):
+        cleanxml._last_backup.pop(self.path, None)
+        shutil.rmtree(self.tmpdir)
+
+    def save(self, text):
+        cleanxml.addTextNode(self.doc, self.root, "task", text)
+        cleanxml.savexml(self.path, self.doc, backup=True)
+
+    def read(self, path):
+        with open(path) as xml_file:
+            return xml_file.read()
+
+    def test_backups_are_hardlinks(self):
+        self.save("first")
+        bak0 = self.backup_name + ".bak.0"
+        self.assertEqual(os.stat(self.path).st_ino, os.stat(bak0).st_ino)
+        daily = [name for name in os.listdir(os.path.dirname(bak0))
+                 if name.endswith(".bak") and ".bak." not in name]
+        self.assertEqual(1, len(daily))
+
+        # A new save doesn't modify the backup in place
+        cleanxml._last_backup.pop(self.path)
+        self.save("second")
+        self.assertNotIn("second", self.read(self.backup_name + ".bak.1"))
+        self.assertIn("second", self.read(bak0))
+
+    def test_rotation_happens_once_per_interval(self):
+        self.save("first")
+        self.save("second")
+        self.assertFalse(os.path.exists(self.backup_name + ".bak.1"))
+        self.assertNotIn("second", self.read(self.backup_name + ".bak.0"))
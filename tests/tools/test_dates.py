@@ -62,6 +62,34 @@ class TestDates(TestCase):
         self.assertEqual(Date.parse("someday"), Date.someday())
         self.assertEqual(Date.parse(""), Date.no_date())
 
+    def test_no_date_is_shared(self):
+        """ There is a single empty date, which copies are equal to """
+        self.assertIs(Date.no_date(), Date.no_date())
+        self.assertEqual(Date(Date.no_date()), Date.no_date())
+        self.assertFalse(Date(""))
+
+    def test_parses_iso_dates(self):
+        self.assertEqual(Date("2014-03-09"), date(2014, 3, 9))
+        self.assertEqual(Date("2014-3-9"), date(2014, 3, 9))
+        self.assertRaises(ValueError, Date, "2014-02-30")
+        self.assertRaises(ValueError, Date, "2014-aa-01")
+
+    def test_fuzzy_dates_are_after_real_dates(self):
+        today = Date(date.today())
+        self.assertTrue(today < Date.now())
+        self.assertTrue(today <= Date.now())
+        self.assertFalse(today == Date.now())
+        self.assertTrue(Date.now() > today)
+        self.assertTrue(Date.now() == date.today())
+        self.assertTrue(Date.soon() < Date.no_date() < Date.someday())
+        self.assertEqual(sorted([Date.someday(), Date.now(), today]),
+                         [today, Date.now(), Date.someday()])
+
+    def test_today_is_shared(self):
+        self.assertIs(Date.today(), Date.today())
+        self.assertEqual(Date.today(), date.today())
+        self.assertEqual(Date.tomorrow(), date.today() + timedelta(1))
+
     def test_parse_local_fuzzy_dates(self):
         """ Parse fuzzy dates in their localized version """
         self.assertEqual(Date.parse(_("now")), Date.now())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from GTG.tools.journal import Journal, OP_SET, OP_REMOVE
+
+
+class TestJournal(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "tasks.xml.journal")
+        self.journal = Journal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_empty_journal_replays_nothing(self):
+        self.assertEqual([], list(self.journal.replay()))
+
+    def test_records_are_replayed_in_order(self):
+        self.journal.append(OP_SET, "1", "<task id=\"1\"/>")
+        self.journal.append(OP_REMOVE, "2")
+        self.assertEqual(2, len(self.journal))
+        self.assertEqual([(OP_SET, "1", "<task id=\"1\"/>"),
+                          (OP_REMOVE, "2", None)],
+                         list(Journal(self.path).replay()))
+
+    def test_data_with_newlines_survives(self):
+        self.journal.append(OP_SET, "1", "<task>\nline\n</task>")
+        self.assertEqual([(OP_SET, "1", "<task>\nline\n</task>")],
+                         list(self.journal.replay()))
+
+    def test_truncate_empties_journal(self):
+        self.journal.append(OP_SET, "1", "<task/>")
+        self.journal.truncate()
+        self.assertEqual(0, len(self.journal))
+        self.assertEqual([], list(self.journal.replay()))
+
+    def test_damaged_last_line_is_skipped(self):
+        self.journal.append(OP_SET, "1", "<task/>")
+        self.journal.close()
+        with open(self.path, "a") as journal_file:
+            journal_file.write('{"op": "set", "ti')
+        self.assertEqual([(OP_SET, "1", "<task/>")],
+                         list(self.journal.replay()))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.tools import lazytext
+from GTG.tools.lazytext import LazyText
+
+
+class TestLazyText(TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.max_resident = lazytext.MAX_RESIDENT
+        lazytext.MAX_RESIDENT = 2
+
+    def tearDown(self):
+        lazytext.MAX_RESIDENT = self.max_resident
+
+    def lazy(self, text):
+        def load():
+            self.loads.append(text)
+            return text
+        return LazyText(load)
+
+    def test_text_is_read_once(self):
+        text = self.lazy("body")
+        self.assertEqual([], self.loads)
+        self.assertEqual("body", text.get())
+        self.assertEqual("body", str(text))
+        self.assertEqual(["body"], self.loads)
+
+    def test_least_recently_used_texts_are_dropped(self):
+        first, second, third = [self.lazy(str(i)) for i in range(3)]
+        first.get()
+        second.get()
+        first.get()
+        third.get()
+        self.assertTrue(lazytext.resident_count() <= 2)
+        # second was the least recently used one
+        first.get()
+        second.get()
+        self.assertEqual(["0", "1", "2", "1"], self.loads)
+
+    def test_peek_does_not_keep_text(self):
+        text = self.lazy("body")
+        text.peek()
+        text.peek()
+        self.assertEqual(["body", "body"], self.loads)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+
+from GTG.tools import cleanxml
+from GTG.tools.parallelxml import parse_xml_file, parse_xml_range, \
+    split_xml_file
+from GTG.tools.taskxml import record_from_xml
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data',
+                         'test-data', 'standard', 'xdg', 'data', 'gtg',
+                         '866eace6-7482-41e9-b450-e9664a5d1602.xml')
+
+
+class TestParallelXML(TestCase):
+
+    def setUp(self):
+        self.records = [record_from_xml(node) for node
+                        in cleanxml.iterxmlfile(TEST_DATA, "task")]
+
+    def test_ranges_start_on_tasks(self):
+        ranges = split_xml_file(TEST_DATA, 5)
+        self.assertEqual(5, len(ranges))
+        with open(TEST_DATA, "rb") as xml_file:
+            data = xml_file.read()
+        for start, end in ranges:
+            self.assertTrue(data[start:].startswith(b"<task "))
+        for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+            self.assertEqual(end, start)
+
+    def test_ranges_hold_all_tasks(self):
+        for count in [1, 2, 7, 1000]:
+            records = []
+            for start, end in split_xml_file(TEST_DATA, count):
+                records.extend(parse_xml_range(TEST_DATA, start, end))
+            self.assertEqual(self.records, records)
+
+    def test_parse_with_workers(self):
+        self.assertEqual(self.records, parse_xml_file(TEST_DATA, 2))
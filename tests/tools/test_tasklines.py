@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from GTG.tools import tasklines
+from GTG.tools.tasklines import TaskLineFile
+
+
+def make_record(tid, title="Title"):
+    return {"tid": tid, "uuid": "uuid-" + tid, "status": "Active",
+            "title": title, "due_date": "", "start_date": "",
+            "closed_date": "", "modified": "2014-01-01T10:00:00",
+            "content": "<content>Line\nnext line</content>",
+            "tags": ["@tag"], "subtasks": [],
+            "attributes": [["ns", "key", "value"]]}
+
+
+class TestTaskLineFile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "gtg_tasks.lines")
+        self.lines = TaskLineFile(self.path)
+        self.lines.load()
+
+    def tearDown(self):
+        self.lines.close()
+        shutil.rmtree(self.tmpdir)
+
+    def reload(self):
+        self.lines.close()
+        self.lines = TaskLineFile(self.path)
+        return self.lines.load()
+
+    def test_tasks_are_read_back_in_order(self):
+        records = [make_record("1"), make_record("2")]
+        for record in records:
+            self.assertTrue(self.lines.put(record))
+        self.assertEqual(records, self.reload())
+        self.assertEqual(records, tasklines.read_records(self.path))
+
+    def test_unchanged_task_is_not_written(self):
+        self.lines.put(make_record("1"))
+        size = os.path.getsize(self.path)
+        self.assertFalse(self.lines.put(make_record("1")))
+        self.assertEqual(size, os.path.getsize(self.path))
+
+    def test_changed_and_removed_tasks(self):
+        self.lines.put(make_record("1"))
+        self.lines.put(make_record("2"))
+        self.lines.put(make_record("1", "New title"))
+        self.assertTrue(self.lines.remove("2"))
+        self.assertFalse(self.lines.remove("2"))
+        self.assertEqual([make_record("1", "New title")], self.reload())
+
+    def test_compaction_drops_blank_lines(self):
+        self.lines.put(make_record("1"))
+        self.lines.put(make_record("2"))
+        self.lines.remove("1")
+        self.lines.compact()
+        with open(self.path, "rb") as lines_file:
+            self.assertEqual(1, len(lines_file.readlines()))
+        self.lines.put(make_record("2", "New title"))
+        self.assertEqual([make_record("2", "New title")], self.reload())
+
+    def test_crash_leftovers_are_repaired(self):
+        self.lines.put(make_record("1"))
+        self.lines.close()
+        with open(self.path, "ab") as lines_file:
+            # the task saved again without blanking the old line, then a
+            # cut line
+            lines_file.write(tasklines.encode_record(make_record("1", "New")))
+            lines_file.write(b'{"tid": "2", "ti')
+        self.assertEqual([make_record("1", "New")], self.reload())
+        self.lines.remove("1")
+        self.assertEqual([], self.reload())
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from GTG.tools import cleanxml
+from GTG.tools.lazytext import LazyText
+from GTG.tools.taskxml import record_from_xml
+from GTG.tools.tasksnapshot import load_snapshot, snapshot_path, \
+    write_snapshot
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data',
+                         'test-data', 'standard', 'xdg', 'data', 'gtg',
+                         '866eace6-7482-41e9-b450-e9664a5d1602.xml')
+
+
+class TestTaskSnapshot(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "gtg_tasks.xml")
+        shutil.copy(TEST_DATA, self.path)
+        self.records = [record_from_xml(node) for node
+                        in cleanxml.iterxmlfile(self.path, "task")]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_snapshot_round_trip(self):
+        self.assertTrue(write_snapshot(self.path, self.records))
+        self.assertEqual(self.records, load_snapshot(self.path))
+
+    def test_lazy_contents(self):
+        write_snapshot(self.path, self.records)
+        records = load_snapshot(self.path, lazy=True)
+        with_content = [record for record in records if record["content"]]
+        self.assertTrue(with_content)
+        for record in with_content:
+            self.assertTrue(isinstance(record["content"], LazyText))
+        for record in records:
+            record["content"] = str(record["content"])
+        self.assertEqual(self.records, records)
+
+    def test_lazy_contents_survive_new_snapshot(self):
+        write_snapshot(self.path, self.records)
+        records = load_snapshot(self.path, lazy=True)
+        write_snapshot(self.path, list(reversed(self.records)))
+        for record in records:
+            record["content"] = str(record["content"])
+        self.assertEqual(self.records, records)
+
+    def test_missing_snapshot(self):
+        self.assertEqual(None, load_snapshot(self.path))
+
+    def test_changed_file_invalidates_snapshot(self):
+        write_snapshot(self.path, self.records)
+        with open(self.path, "a") as xml_file:
+            xml_file.write("\n")
+        self.assertEqual(None, load_snapshot(self.path))
+
+    def test_same_size_and_mtime_is_checked_by_hash(self):
+        write_snapshot(self.path, self.records)
+        stat = os.stat(self.path)
+        with open(self.path, "r") as xml_file:
+            content = xml_file.read()
+        with open(self.path, "w") as xml_file:
+            xml_file.write(content.replace("roadmap", "ROADMAP"))
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(None, load_snapshot(self.path))
+
+    def test_damaged_snapshot_is_ignored(self):
+        write_snapshot(self.path, self.records)
+        with open(snapshot_path(self.path), "wb") as snapshot_file:
+            snapshot_file.write(b"garbage")
+        self.assertEqual(None, load_snapshot(self.path))
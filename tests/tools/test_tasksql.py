@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+import os
+
+from GTG.tools import tasksql
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data',
+                         'test-data', 'standard', 'xdg', 'data', 'gtg',
+                         '866eace6-7482-41e9-b450-e9664a5d1602.xml')
+
+
+def make_record(tid, **fields):
+    record = {
+        "tid": tid,
+        "uuid": "uuid-" + tid,
+        "status": "Active",
+        "title": "Task " + tid,
+        "due_date": "2014-03-01",
+        "start_date": "",
+        "closed_date": "",
+        "modified": "2014-01-01T10:00:00",
+        "content": "<content>body</content>",
+        "tags": ["@a", "@b"],
+        "subtasks": ["3", "2"],
+        "attributes": [("ns", "key", "value")],
+    }
+    record.update(fields)
+    return record
+
+
+class TestTaskSQL(TestCase):
+
+    def setUp(self):
+        self.db = tasksql.open_database(":memory:")
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_record_round_trip(self):
+        record = make_record("1")
+        with self.db:
+            tasksql.save_record(self.db, record)
+        self.assertEqual([record], list(tasksql.iter_records(self.db)))
+
+    def test_save_replaces_task(self):
+        with self.db:
+            tasksql.save_record(self.db, make_record("1"))
+            tasksql.save_record(self.db, make_record("1", tags=["@c"],
+                                                     subtasks=[]))
+        records = list(tasksql.iter_records(self.db))
+        self.assertEqual(1, len(records))
+        self.assertEqual(["@c"], records[0]["tags"])
+        self.assertEqual([], records[0]["subtasks"])
+
+    def test_remove_task(self):
+        with self.db:
+            tasksql.save_record(self.db, make_record("1"))
+            self.assertTrue(tasksql.remove_record(self.db, "1"))
+            self.assertFalse(tasksql.remove_record(self.db, "1"))
+        self.assertEqual([], list(tasksql.iter_records(self.db)))
+        self.assertEqual([], self.db.execute(
+            "SELECT * FROM task_tags").fetchall())
+
+    def test_import_xml(self):
+        self.assertEqual(59, tasksql.import_xml(self.db, TEST_DATA))
+        records = {record["tid"]: record
+                   for record in tasksql.iter_records(self.db)}
+        self.assertEqual(59, len(records))
+        first = records["0@1"]
+        self.assertEqual("Define GTG 0.3 roadmap", first["title"])
+        self.assertEqual(["@gtg", "@hacking"], first["tags"])
+        self.assertEqual(["1@1", "2@1", "3@1"], first["subtasks"])
+        self.assertEqual("2009-12-15", first["due_date"])
+        self.assertTrue(first["content"].startswith("<content>"))